@@ -0,0 +1,43 @@
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+from utils.ratelimit import TokenBucket
+
+
+async def stream_batch(
+    terms: List[str],
+    run: Callable[[str], Awaitable[Dict]],
+    concurrency: int,
+    rate_limit: float = 0,
+) -> AsyncIterator[bytes]:
+    """Run `run(term)` over `terms` with bounded concurrency, yielding NDJSON lines as they finish.
+
+    At most `concurrency` runs are in flight and at most `concurrency`
+    finished lines are buffered, so memory does not grow with batch size.
+    """
+    pending = iter(terms)
+    bucket = TokenBucket(rate_limit, capacity=concurrency)
+    out: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+    async def worker():
+        for term in pending:
+            await bucket.acquire()
+            try:
+                line = await run(term)
+            except Exception as exc:
+                line = {"term": term, "error": str(exc) or exc.__class__.__name__}
+            await out.put(json.dumps(line).encode() + b"\n")
+        await out.put(None)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(min(concurrency, len(terms)))]
+    try:
+        finished = 0
+        while finished < len(workers):
+            line = await out.get()
+            if line is None:
+                finished += 1
+                continue
+            yield line
+    finally:
+        for w in workers:
+            w.cancel()
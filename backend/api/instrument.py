@@ -0,0 +1,103 @@
+import os
+import time
+
+from starlette.datastructures import MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.compress import STREAMING_TYPES
+from utils.metrics import METRICS, server_timing, start_request
+from utils.profiler import SamplingProfiler
+
+# ?profile=1 is honoured only when PROFILE_REQUESTS=1; with PROFILE_DIR set,
+# every request is profiled and its stacks written there instead.
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+
+
+def _route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    endpoint = scope.get("endpoint")
+    return endpoint.__name__ if endpoint is not None else "unmatched"
+
+
+class InstrumentMiddleware:
+    """Time every request, add a Server-Timing header and optionally profile it.
+
+    Requests are timed until the last body chunk is sent, so SSE and NDJSON
+    streams count their full duration in http_request_seconds. Stage
+    timings recorded while the handler runs (see utils.metrics) become
+    Server-Timing entries; for a stream the header leaves with the first
+    byte, so it reports `headers` (time to headers) instead of `total`.
+    With ?profile=1 the collapsed-stack profile replaces the body.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = start_request()
+        wants_profile = PROFILE_REQUESTS and QueryParams(scope.get("query_string", b"")).get("profile") == "1"
+        profiler = SamplingProfiler().start() if wants_profile or PROFILE_DIR else None
+        start = time.perf_counter()
+        finished = False
+
+        def finish() -> float:
+            nonlocal finished
+            total = time.perf_counter() - start
+            if not finished:
+                finished = True
+                METRICS.observe("http_request_seconds", total, route=_route_name(scope), method=scope["method"])
+                if profiler is not None:
+                    profiler.stop()
+                    if PROFILE_DIR:
+                        self._save(profiler, start, _route_name(scope))
+            return total
+
+        async def send_instrumented(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                if wants_profile:
+                    return  # replaced by the profile once the body is complete
+                elapsed = time.perf_counter() - start
+                headers = MutableHeaders(raw=message["headers"])
+                if headers.get("content-type", "").startswith(STREAMING_TYPES):
+                    headers["Server-Timing"] = server_timing(timings, elapsed, "headers")
+                else:
+                    headers["Server-Timing"] = server_timing(timings, elapsed)
+                await send(message)
+                return
+            if message["type"] != "http.response.body" or message.get("more_body", False):
+                if not wants_profile:
+                    await send(message)
+                return
+            total = finish()
+            if not wants_profile:
+                await send(message)
+                return
+            body = profiler.collapsed().encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"server-timing", server_timing(timings, total).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+
+        try:
+            await self.app(scope, receive, send_instrumented)
+        finally:
+            finish()  # errors and client disconnects are timed too
+
+    @staticmethod
+    def _save(profiler: SamplingProfiler, start: float, route: str) -> None:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(start * 1e6) % 1000000:06d}-{route.strip('/').replace('/', '_') or 'root'}.folded"
+        with open(os.path.join(PROFILE_DIR, name), "w", encoding="utf-8") as fh:
+            fh.write(profiler.collapsed())
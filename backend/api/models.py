@@ -0,0 +1,62 @@
+from typing import List, Optional
+from pydantic import BaseModel, confloat, conint, conlist, constr
+
+
+# Response item schemas. The pipeline builders emit plain dicts with these
+# fields rather than constructing the models.
+
+class Opportunity(BaseModel):
+    disease: str
+    summary: str
+    confidence: float
+    sources: List[str]
+class Treatment(BaseModel):
+    medicine: str
+    summary: str
+    confidence: float
+    sources: List[str]
+    metrics: dict = {}
+    rationale: str = ""
+
+class ExplorerItem(BaseModel):
+    medicine: str
+    condition: str
+    summary: str
+    confidence: float
+    market: dict
+    patent: dict
+    regulatory: dict
+    sources: List[str]
+
+
+class AnalyzeRequest(BaseModel):
+    drug: str
+    max_records: int = 15
+    budget_ms: Optional[conint(gt=0)] = None
+    fields: Optional[str] = None
+    limit: Optional[conint(ge=0)] = None
+    offset: conint(ge=0) = 0
+
+
+class TrackRequest(BaseModel):
+    term: constr(min_length=2)
+    kind: constr(regex="^(drug|condition)$") = "drug"
+    # Records per source pulled on the first sync; later syncs only fetch deltas.
+    max_records: conint(ge=1, le=1000) = 50
+
+
+class DrugBatchRequest(BaseModel):
+    names: conlist(constr(min_length=2), min_items=1, max_items=200)
+
+
+class BatchRequest(BaseModel):
+    terms: List[constr(min_length=2)]
+    max_records: int = 15
+    concurrency: conint(ge=1, le=32) = 4
+    # Pipeline runs started per second across the batch; 0 disables the limit.
+    rate_limit: confloat(ge=0) = 0
+
+
+class TreatBatchRequest(BatchRequest):
+    min_phase: constr(regex="^(any|phase 1|phase 2|phase 3)$") = "any"
+    min_year: int = 0
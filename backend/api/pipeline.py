@@ -0,0 +1,276 @@
+import asyncio
+import inspect
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from data_sources.pubmed import fetch_pubmed_abstracts
+from data_sources.tracked import get_tracked_store
+from data_sources.trials import fetch_trials
+from nlp.extract import disease_evidence, drug_evidence
+from nlp.summarize import summarize_counts
+from nlp.tfidf import with_relevance
+from utils.evidence import EvidenceTable, LITS, Ranked, TRIALS
+from utils.scoring import phase_rank
+from utils.demo_data import demo_evidence, demo_treatments
+from utils.memo import DEGRADED_RESULT_TTL, RESULTS, Expiring, SingleFlight, TTLCache, _MISSING, memoized
+from utils.metrics import timed
+from workers.base import enrich
+from workers.market import market_worker
+from workers.patent import patent_worker
+from workers.regulatory import regulatory_worker
+
+EXPLORER_WORKERS = [market_worker, patent_worker, regulatory_worker]
+# Bodies built from tracked records, by term, stored revision and options.
+TRACKED_RESULTS = TTLCache(maxsize=64, ttl=RESULTS.ttl)
+_tracked_flight = SingleFlight()
+
+
+async def fetch_sources(term: str, max_records: int):
+    """Fetch PubMed abstracts and trials concurrently; latency is the slower of the two."""
+    return await asyncio.gather(
+        fetch_pubmed_abstracts(term, retmax=max_records),
+        fetch_trials(term, max_records=max_records),
+    )
+
+
+_background: set = set()
+
+
+def _detach(task: asyncio.Task) -> None:
+    # Let a source that missed the deadline finish so its response still
+    # lands in the upstream cache for the next request.
+    _background.add(task)
+    task.add_done_callback(lambda t: (_background.discard(t), t.cancelled() or t.exception()))
+
+
+async def fetch_sources_within(term: str, max_records: int, budget_ms: int) -> Tuple[List[Dict], List[Dict], List[str]]:
+    """fetch_sources() bounded by a deadline.
+
+    Sources still running when `budget_ms` expires come back empty and are
+    named in the returned list of timed-out sources.
+    """
+    tasks = {
+        "pubmed": asyncio.ensure_future(fetch_pubmed_abstracts(term, retmax=max_records)),
+        "trials": asyncio.ensure_future(fetch_trials(term, max_records=max_records)),
+    }
+    try:
+        await asyncio.wait(tasks.values(), timeout=budget_ms / 1000)
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    fetched: Dict[str, List[Dict]] = {}
+    timed_out: List[str] = []
+    for name, task in tasks.items():
+        if task.done():
+            fetched[name] = task.result()
+        else:
+            fetched[name] = []
+            timed_out.append(name)
+            _detach(task)
+    return fetched["pubmed"], fetched["trials"], timed_out
+
+
+@timed("build")
+def build_opportunities(
+    drug: str,
+    abstracts: List[Dict],
+    trials: List[Dict],
+    fallback: bool = True,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    if not abstracts and not trials:
+        if not fallback:
+            return Ranked()
+        # Offline/demo fallback
+        table = EvidenceTable.from_map(demo_evidence(drug))
+    else:
+        table = disease_evidence(with_relevance(abstracts, drug), trials)
+
+    scores = table.scores()
+    opportunities: List[Dict] = []
+    for i in table.ranking(scores, limit):
+        disease = table.names[i]
+        c = table.counts[i]
+        summary = summarize_counts(drug, disease, c[TRIALS], c[LITS], table.phases[i], table.statuses[i])
+        opportunities.append({
+            "disease": disease,
+            "summary": summary,
+            "confidence": round(float(scores[i]), 2),
+            "sources": table.source_ids(i),
+        })
+    return Ranked(opportunities, len(table))
+
+
+@timed("build")
+def build_treatments(
+    condition: str,
+    abstracts: List[Dict],
+    trials: List[Dict],
+    min_phase: str = "any",
+    min_year: int = 0,
+    fallback: bool = True,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    # Apply filters to trials
+    required = {"any": 0, "phase 1": 1, "phase 2": 2, "phase 3": 3}[min_phase]
+    if required > 0:
+        trials = [t for t in trials if phase_rank(t.get("phase", "")) >= required]
+
+    if min_year > 0:
+        def to_year(s: str) -> int:
+            m = re.search(r"\d{4}", s or "")
+            return int(m.group()) if m else 0
+        trials = [t for t in trials if max(to_year(t.get("start_date", "")), to_year(t.get("completion_date", ""))) >= min_year]
+
+    table = drug_evidence(with_relevance(abstracts, condition), trials)
+    # Fallback to curated demo data if nothing extracted (even if APIs returned content)
+    if not table and fallback:
+        demo = demo_treatments(condition)
+        if demo:
+            table = EvidenceTable.from_map(demo)
+
+    scores = table.scores()
+    treatments: List[Dict] = []
+    for i in table.ranking(scores, limit):
+        med = table.names[i]
+        c = table.counts[i]
+        summary = summarize_counts(med, condition, c[TRIALS], c[LITS], table.phases[i], table.statuses[i])
+        top_phase = {3: "Phase 3", 2: "Phase 2", 1: "Phase 1", 0: ""}[table.top_phase(i)]
+        metrics = {"trials": c[TRIALS], "publications": c[LITS], "topPhase": top_phase}
+        rationale = f"{c[TRIALS]} trials, {c[LITS]} publications; highest evidence {top_phase or 'observational'}"
+
+        treatments.append({
+            "medicine": med,
+            "summary": summary,
+            "confidence": round(float(scores[i]), 2),
+            "sources": table.source_ids(i),
+            "metrics": metrics,
+            "rationale": rationale,
+        })
+    return Ranked(treatments, len(table))
+
+
+@timed("build")
+async def build_explorer_items(
+    condition: str,
+    abstracts: List[Dict],
+    trials: List[Dict],
+    fallback: bool = True,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    table = drug_evidence(with_relevance(abstracts, condition), trials)
+    if not table and fallback:
+        table = EvidenceTable.from_map(demo_treatments(condition))
+
+    scores = table.scores()
+    ranked = table.ranking(scores, limit)
+    # All workers run concurrently over every candidate.
+    enrichment = await enrich([{"drug": table.names[i], "condition": condition} for i in ranked], EXPLORER_WORKERS)
+    items: List[Dict] = []
+    for i, extra in zip(ranked, enrichment):
+        med = table.names[i]
+        c = table.counts[i]
+        summary = summarize_counts(med, condition, c[TRIALS], c[LITS], table.phases[i], table.statuses[i])
+        items.append({
+            "medicine": med,
+            "condition": condition,
+            "summary": summary,
+            "confidence": round(float(scores[i]), 2),
+            "market": extra["market"],
+            "patent": extra["patent"],
+            "regulatory": extra["regulatory"],
+            "sources": table.source_ids(i),
+        })
+    return Ranked(items, len(table))
+
+
+def explorer_body(condition: str, items: List[Dict]) -> Dict:
+    """Explorer response. Market data depends on the condition only, so it is
+    also given once at the top level; clients can drop the per-item copies
+    with fields=-market."""
+    return {"condition": condition, "market": items[0]["market"] if items else None, "items": items}
+
+
+def memo_result(body: Dict, abstracts: List[Dict], trials: List[Dict]):
+    """`body` as a memoized result: kept only briefly when a source came back empty.
+
+    The trial fetcher returns [] on upstream errors, so an empty source may
+    be a transient failure; the upstream cache does not keep those either.
+    """
+    if abstracts and trials:
+        return body
+    return Expiring(body, DEGRADED_RESULT_TTL)
+
+
+# Memoized end-to-end runners. Concurrent identical calls share one
+# computation and repeats within the TTL are served from the LRU.
+
+@memoized("repurpose")
+async def run_repurpose(drug: str, max_records: int = 15) -> Dict:
+    abstracts, trials = await fetch_sources(drug, max_records)
+    return memo_result({"drug": drug, "opportunities": build_opportunities(drug, abstracts, trials)}, abstracts, trials)
+
+
+@memoized("treat")
+async def run_treat(condition: str, max_records: int = 15, min_phase: str = "any", min_year: int = 0) -> Dict:
+    abstracts, trials = await fetch_sources(condition, max_records)
+    treatments = build_treatments(condition, abstracts, trials, min_phase, min_year)
+    return memo_result({"condition": condition, "treatments": treatments}, abstracts, trials)
+
+
+@memoized("explorer")
+async def run_explorer(condition: str, max_records: int = 12) -> Dict:
+    abstracts, trials = await fetch_sources(condition, max_records)
+    body = explorer_body(condition, await build_explorer_items(condition, abstracts, trials))
+    return memo_result(body, abstracts, trials)
+
+
+async def run_tracked(term: str, entry: Dict, build: Callable[[List[Dict], List[Dict]], Dict], *args) -> Dict:
+    """`build(abstracts, trials)` over a tracked term's stored records.
+
+    Memoized per revision of the store (see TrackedStore.get), so reads
+    between refreshes cost one lookup instead of decoding and re-extracting
+    the whole history; SQLite is read off the event loop.
+    """
+    key = (entry["kind"], term, entry["revision"]) + args
+    body = TRACKED_RESULTS.get(key)
+    if body is not _MISSING:
+        return body
+
+    async def compute():
+        abstracts, trials = await asyncio.to_thread(get_tracked_store().records, term)
+        built = build(abstracts, trials)
+        TRACKED_RESULTS.set(key, built)
+        return built
+
+    return await _tracked_flight.do(key, compute)
+
+
+async def run_within_budget(
+    runner,
+    build: Callable[[List[Dict], List[Dict], bool], Dict],
+    term: str,
+    max_records: int,
+    budget_ms: int,
+    *args,
+    limit: Optional[int] = None,
+) -> Dict:
+    """Answer a memoized runner's request within `budget_ms`.
+
+    `build(abstracts, trials, fallback, limit)` returns the response body
+    (or an awaitable of it). When a
+    source misses the deadline the body is built from what arrived (no demo
+    fallback), ranked only down to `limit` items, flagged `partial` and not
+    memoized; complete bodies are built in full and primed into the
+    runner's cache.
+    """
+    cached = runner.peek(term, max_records, *args)
+    if cached is not None:
+        return dict(cached, partial=False, timed_out=[])
+    abstracts, trials, timed_out = await fetch_sources_within(term, max_records, budget_ms)
+    body = build(abstracts, trials, not timed_out, limit if timed_out else None)
+    if inspect.isawaitable(body):
+        body = await body
+    if not timed_out:
+        runner.prime(memo_result(body, abstracts, trials), term, max_records, *args)
+    return dict(body, partial=bool(timed_out), timed_out=timed_out)
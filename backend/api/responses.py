@@ -0,0 +1,65 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used without it
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when installed.
+
+    Handlers that return one directly also skip FastAPI's jsonable_encoder
+    pass; the pipeline builders already emit plain JSON-ready dicts.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Dict[str, bool]]:
+    """`a,b` keeps only those item fields, `-a,-b` drops them; None keeps everything."""
+    names = [f.strip() for f in (fields or "").split(",") if f.strip()]
+    if not names:
+        return None
+    excluded = [n.startswith("-") for n in names]
+    if any(excluded) and not all(excluded):
+        raise HTTPException(status_code=422, detail="fields: list fields to keep or -fields to drop, not both")
+    return {n.lstrip("-"): not excluded[0] for n in names}
+
+
+def _project(item: Dict, fields: Dict[str, bool]) -> Dict:
+    keep = next(iter(fields.values()))
+    return {k: v for k, v in item.items() if (k in fields) == keep}
+
+
+def shape(body: Dict, key: str, fields: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> FastJSONResponse:
+    """Serve an analysis body with its `key` list paged and projected.
+
+    `limit`/`offset` select a window of the ranked list and add `total`
+    (the unpaged length: a builder that ranked only the top items reports
+    its candidate count, see utils.evidence.Ranked); `fields` projects
+    each item (see parse_fields).
+    """
+    projection = parse_fields(fields)
+    if projection is None and limit is None and not offset:
+        return FastJSONResponse(body)
+    items: List[Dict] = body.get(key)
+    if items is None:
+        items = []
+    out = dict(body)
+    if limit is not None or offset:
+        out["total"] = getattr(items, "total", len(items))
+        items = items[offset:offset + limit if limit is not None else None]
+    out[key] = [_project(i, projection) for i in items] if projection else items
+    return FastJSONResponse(out)
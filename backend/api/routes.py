@@ -1,65 +1,85 @@
+import asyncio
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
-from pydantic import BaseModel
+from fastapi.responses import Response, StreamingResponse
+from api.batch import stream_batch
+from api.models import AnalyzeRequest, BatchRequest, DrugBatchRequest, TrackRequest, TreatBatchRequest
+from api.pipeline import (
+    fetch_sources, run_repurpose, run_treat, run_explorer, run_tracked, run_within_budget,
+    build_opportunities, build_treatments, build_explorer_items, explorer_body,
+)
+from api.responses import shape
+from api.stream import SSE_HEADERS, progressive, replay
+from api.warmer import get_warmer
+from data_sources.hedge import HEDGE_REQUESTS, HEDGE_STATS
+from data_sources.ncbi import get_ncbi_client
 from data_sources.pubmed import fetch_pubmed_abstracts
 from data_sources.trials import fetch_trials
-from data_sources.pubchem import fetch_drug_info
-from nlp.extract import extract_diseases, extract_drugs
-from nlp.summarize import summarize_evidence
-from utils.scoring import score_opportunity
-from utils.demo_data import demo_evidence, demo_treatments
-from workers.market import market_insight
-from workers.patent import patent_risk
-from workers.regulatory import regulatory_pathway
+from data_sources.tracked import get_tracked_store, refresh_all_tracked, refresh_tracked
+from data_sources.pubchem import fetch_drug_info, fetch_drug_summaries, fetch_drug_summary
+from data_sources.cache import cache_stats
+from nlp.cooccurrence import get_cooccurrence_index
+from nlp.tfidf import get_tfidf_index
+from utils.demo_data import demo_evidence
+from utils.memo import RESULTS, get_shared_results
+from utils.metrics import render
 
 router = APIRouter()
 
-class Opportunity(BaseModel):
-    disease: str
-    summary: str
-    confidence: float
-    sources: List[str]
-class Treatment(BaseModel):
-    medicine: str
-    summary: str
-    confidence: float
-    sources: List[str]
-    metrics: dict = {}
-    rationale: str = ""
-
-class ExplorerItem(BaseModel):
-    medicine: str
-    condition: str
-    summary: str
-    confidence: float
-    market: dict
-    patent: dict
-    regulatory: dict
-    sources: List[str]
-
-
-class AnalyzeRequest(BaseModel):
-    drug: str
-    max_records: int = 15
-
 @router.get("/health")
 def health():
     return {"status": "ok"}
 
+@router.get("/cache/stats")
+def cache_statistics():
+    shared = get_shared_results()
+    return {
+        "sources": cache_stats(),
+        "results": {"size": len(RESULTS), "hits": RESULTS.hits, "misses": RESULTS.misses},
+        "shared_results": {"hits": shared.hits, "misses": shared.misses} if shared else None,
+        "ncbi": dict(get_ncbi_client().stats),
+        "hedging": dict(HEDGE_STATS, enabled=HEDGE_REQUESTS),
+    }
+
+@router.get("/warmer")
+def warmer_status():
+    """Cache warmer coverage: the top queries, whether each is warm and when it is refreshed next."""
+    return get_warmer().status()
+
+@router.get("/metrics")
+def metrics():
+    """Prometheus text exposition: stage/upstream/route latency histograms plus cache and upstream counters.
+
+    With several workers each process reports its own counters.
+    """
+    shared = get_shared_results()
+    snapshot = {
+        "upstream_cache_requests_total": {
+            (("outcome", outcome), ("source", source)): n
+            for source, counters in cache_stats().items() for outcome, n in counters.items()
+        },
+        "result_cache_requests_total": {(("outcome", "hits"),): RESULTS.hits, (("outcome", "misses"),): RESULTS.misses},
+        "shared_result_cache_requests_total": {
+            (("outcome", "hits"),): shared.hits, (("outcome", "misses"),): shared.misses
+        } if shared else {},
+        "ncbi_client_events_total": {(("event", k),): v for k, v in get_ncbi_client().stats.items()},
+        "hedge_events_total": {(("event", k),): v for k, v in HEDGE_STATS.items()},
+    }
+    return Response(render(snapshot=snapshot), media_type="text/plain; version=0.0.4")
+
 @router.get("/literature")
-def literature(drug: str = Query(..., min_length=2), max_records: int = 10):
-    abstracts = fetch_pubmed_abstracts(drug, retmax=max_records)
+async def literature(drug: str = Query(..., min_length=2), max_records: int = 10):
+    abstracts = await fetch_pubmed_abstracts(drug, retmax=max_records)
     return {"drug": drug, "count": len(abstracts), "results": abstracts}
 
 @router.get("/trials")
-def trials(drug: str = Query(..., min_length=2), max_records: int = 20):
-    trials = fetch_trials(drug, max_records=max_records)
+async def trials(drug: str = Query(..., min_length=2), max_records: int = 20):
+    trials = await fetch_trials(drug, max_records=max_records)
     return {"drug": drug, "count": len(trials), "results": trials}
 
 @router.get("/diagnostics")
-def diagnostics(drug: str = Query("metformin"), max_records: int = 10):
-    abs_ = fetch_pubmed_abstracts(drug, retmax=max_records)
-    tri_ = fetch_trials(drug, max_records=max_records)
+async def diagnostics(drug: str = Query("metformin"), max_records: int = 10):
+    abs_, tri_ = await fetch_sources(drug, max_records)
     demo = demo_evidence(drug)
     return {
         "drug": drug,
@@ -69,132 +89,236 @@ def diagnostics(drug: str = Query("metformin"), max_records: int = 10):
     }
 
 @router.get("/drug/{name}")
-def drug_info(name: str):
-    info = fetch_drug_info(name)
+async def drug_info(name: str, view: str = Query("summary", regex="^(summary|full)$")):
+    """Selected PubChem properties; view=full returns the complete PC_Compounds record."""
+    info = await (fetch_drug_info(name) if view == "full" else fetch_drug_summary(name))
     if not info:
         raise HTTPException(status_code=404, detail="Drug not found")
     return info
 
-@router.get("/repurpose")
-def repurpose(drug: str = Query(..., min_length=2), max_records: int = 15):
-    abstracts = fetch_pubmed_abstracts(drug, retmax=max_records)
-    trials = fetch_trials(drug, max_records=max_records)
+@router.post("/drug/batch")
+async def drug_info_batch(payload: DrugBatchRequest):
+    """Property summaries for many drugs; unknown names map to null."""
+    return {"results": await fetch_drug_summaries(payload.names)}
+
+async def _tracked_entry(term: str, kind: str):
+    entry = await asyncio.to_thread(get_tracked_store().get, term)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Not tracked; POST /api/tracked first")
+    if entry["kind"] != kind:
+        raise HTTPException(status_code=409, detail=f"Tracked as a {entry['kind']}; track it with kind={kind}")
+    return entry
+
+
+def _cooccurrence_index():
+    index = get_cooccurrence_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Co-occurrence index not built; run build_index.py cooccurrence")
+    return index
+
+
+@router.get("/similar")
+def similar(drug: str = Query(..., min_length=2), k: int = Query(10, ge=1, le=100)):
+    """Drugs with the most similar literature profiles (TF-IDF cosine over the corpus index)."""
+    index = get_tfidf_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="TF-IDF index not built; run build_index.py tfidf")
+    return {"drug": drug, "similar": index.similar(drug, k) or []}
+
 
-    if not abstracts and not trials:
-        # Offline/demo fallback
-        diseases = demo_evidence(drug)
+# Analysis endpoints take `fields` (item projection, e.g. -summary,-sources)
+# and `limit`/`offset` (a window of the ranked list); see api.responses.shape.
+FIELDS = Query(None, description="item fields to keep (a,b) or drop (-a,-b)")
+LIMIT = Query(None, ge=0)
+OFFSET = Query(0, ge=0)
+
+
+def _top(limit: Optional[int], offset: int) -> Optional[int]:
+    """How many ranked items a page needs, for builders whose output is not memoized."""
+    return None if limit is None else limit + offset
+
+
+@router.get("/repurpose")
+async def repurpose(
+    drug: str = Query(..., min_length=2),
+    max_records: int = 15,
+    source: str = Query("live", regex="^(live|index|tracked)$"),
+    budget_ms: Optional[int] = Query(None, gt=0),
+    fields: Optional[str] = FIELDS,
+    limit: Optional[int] = LIMIT,
+    offset: int = OFFSET,
+):
+    if source == "index":
+        # Precomputed corpus-wide evidence: max_records is the top-k.
+        body = {"drug": drug, "opportunities": _cooccurrence_index().repurpose(drug, max_records)}
+    elif source == "tracked":
+        def build(abstracts, trials):
+            return {"drug": drug, "opportunities": build_opportunities(drug, abstracts, trials, fallback=False)}
+        body = await run_tracked(drug, await _tracked_entry(drug, "drug"), build)
+    elif budget_ms:
+        body = await _repurpose_within(drug, max_records, budget_ms, _top(limit, offset))
     else:
-        diseases = extract_diseases(abstracts, trials)
+        body = await run_repurpose(drug, max_records)
+    return shape(body, "opportunities", fields, limit, offset)
 
-    opportunities: List[Opportunity] = []
-    for disease, evidence in diseases.items():
-        summary = summarize_evidence(drug, disease, evidence)
-        confidence = score_opportunity(drug, disease, evidence)
-        sources = list({e.get("source_id", "") for e in evidence if e.get("source_id")})
-        opportunities.append(Opportunity(disease=disease, summary=summary, confidence=round(confidence, 2), sources=sources))
 
-    opportunities.sort(key=lambda x: x.confidence, reverse=True)
-    return {"drug": drug, "opportunities": [o.dict() for o in opportunities]}
+async def _repurpose_within(drug: str, max_records: int, budget_ms: int, top: Optional[int] = None):
+    def build(abstracts, trials, fallback, limit=None):
+        return {"drug": drug, "opportunities": build_opportunities(drug, abstracts, trials, fallback, limit)}
+    return await run_within_budget(run_repurpose, build, drug, max_records, budget_ms, limit=top)
 
 
 @router.get("/treat")
-def treat(
+async def treat(
     condition: str = Query(..., min_length=2),
     max_records: int = 15,
     min_phase: str = Query("any", regex="^(any|phase 1|phase 2|phase 3)$"),
     min_year: int = 0,
+    source: str = Query("live", regex="^(live|index|tracked)$"),
+    budget_ms: Optional[int] = Query(None, gt=0),
+    fields: Optional[str] = FIELDS,
+    limit: Optional[int] = LIMIT,
+    offset: int = OFFSET,
 ):
-    abstracts = fetch_pubmed_abstracts(condition, retmax=max_records)
-    trials = fetch_trials(condition, max_records=max_records)
-
-    # Apply filters to trials
-    def phase_rank(p: str) -> int:
-        p = (p or "").lower()
-        if "phase 3" in p:
-            return 3
-        if "phase 2" in p:
-            return 2
-        if "phase 1" in p:
-            return 1
-        return 0
-
-    required = {"any": 0, "phase 1": 1, "phase 2": 2, "phase 3": 3}[min_phase]
-    if required > 0:
-        trials = [t for t in trials if phase_rank(t.get("phase", "")) >= required]
-
-    if min_year > 0:
-        def to_year(s: str) -> int:
-            try:
-                return int((s or "").split(" ")[-1])
-            except Exception:
-                return 0
-        trials = [t for t in trials if max(to_year(t.get("start_date", "")), to_year(t.get("completion_date", ""))) >= min_year]
-
-    medicines = extract_drugs(abstracts, trials)
-    # Fallback to curated demo data if nothing extracted (even if APIs returned content)
-    if not medicines:
-        demo = demo_treatments(condition)
-        if demo:
-            medicines = demo
-
-    treatments: List[Treatment] = []
-    for med, evidence in medicines.items():
-        summary = summarize_evidence(med, condition, evidence)
-        confidence = score_opportunity(med, condition, evidence)
-        sources = list({e.get("source_id", "") for e in evidence if e.get("source_id")})
-
-        trials_e = [e for e in evidence if e.get("type") == "trial"]
-        lit_e = [e for e in evidence if e.get("type") == "literature"]
-        ranks = [phase_rank(t.get("phase", "")) for t in trials_e]
-        top_phase = {3: "Phase 3", 2: "Phase 2", 1: "Phase 1", 0: ""}.get(max(ranks) if ranks else 0, "")
-        metrics = {"trials": len(trials_e), "publications": len(lit_e), "topPhase": top_phase}
-        rationale = f"{len(trials_e)} trials, {len(lit_e)} publications; highest evidence {top_phase or 'observational'}"
-
-        treatments.append(Treatment(
-            medicine=med,
-            summary=summary,
-            confidence=round(confidence, 2),
-            sources=sources,
-            metrics=metrics,
-            rationale=rationale,
-        ))
-
-    treatments.sort(key=lambda x: x.confidence, reverse=True)
-    return {"condition": condition, "treatments": [t.dict() for t in treatments]}
+    if source == "index":
+        # The index has no trial dates, so min_year does not apply here.
+        required = {"any": 0, "phase 1": 1, "phase 2": 2, "phase 3": 3}[min_phase]
+        body = {"condition": condition, "treatments": _cooccurrence_index().treat(condition, max_records, required)}
+    elif source == "tracked":
+        def build(abstracts, trials):
+            treatments = build_treatments(condition, abstracts, trials, min_phase, min_year, False)
+            return {"condition": condition, "treatments": treatments}
+        body = await run_tracked(condition, await _tracked_entry(condition, "condition"), build, min_phase, min_year)
+    elif budget_ms:
+        def build(abstracts, trials, fallback, limit=None):
+            treatments = build_treatments(condition, abstracts, trials, min_phase, min_year, fallback, limit)
+            return {"condition": condition, "treatments": treatments}
+        body = await run_within_budget(
+            run_treat, build, condition, max_records, budget_ms, min_phase, min_year, limit=_top(limit, offset)
+        )
+    else:
+        body = await run_treat(condition, max_records, min_phase, min_year)
+    return shape(body, "treatments", fields, limit, offset)
 
 
 @router.get("/explorer")
-def explorer(condition: str = Query(..., min_length=2), max_records: int = 12):
+async def explorer(
+    condition: str = Query(..., min_length=2),
+    max_records: int = 12,
+    budget_ms: Optional[int] = Query(None, gt=0),
+    fields: Optional[str] = FIELDS,
+    limit: Optional[int] = LIMIT,
+    offset: int = OFFSET,
+):
     """Interactive explorer: for a given condition, surface candidate medicines with market/unmet-need and patent signals."""
-    abstracts = fetch_pubmed_abstracts(condition, retmax=max_records)
-    trials = fetch_trials(condition, max_records=max_records)
-
-    medicines = extract_drugs(abstracts, trials)
-    if not medicines:
-        medicines = demo_treatments(condition)
-
-    items: List[ExplorerItem] = []
-    for med, evidence in medicines.items():
-        summary = summarize_evidence(med, condition, evidence)
-        confidence = score_opportunity(med, condition, evidence)
-        sources = list({e.get("source_id", "") for e in evidence if e.get("source_id")})
-        market = market_insight(condition)
-        patent = patent_risk(med, condition)
-        reg = regulatory_pathway(med, condition)
-        items.append(ExplorerItem(
-            medicine=med,
-            condition=condition,
-            summary=summary,
-            confidence=round(confidence, 2),
-            market=market,
-            patent=patent,
-            regulatory=reg,
-            sources=sources,
-        ))
-
-    items.sort(key=lambda x: x.confidence, reverse=True)
-    return {"condition": condition, "items": [i.dict() for i in items]}
+    if budget_ms:
+        async def build(abstracts, trials, fallback, limit=None):
+            return explorer_body(condition, await build_explorer_items(condition, abstracts, trials, fallback, limit))
+        body = await run_within_budget(run_explorer, build, condition, max_records, budget_ms, limit=_top(limit, offset))
+    else:
+        body = await run_explorer(condition, max_records)
+    return shape(body, "items", fields, limit, offset)
 
 @router.post("/analyze")
-def analyze(payload: AnalyzeRequest):
-    return repurpose(payload.drug, payload.max_records)
+async def analyze(payload: AnalyzeRequest):
+    if payload.budget_ms:
+        body = await _repurpose_within(payload.drug, payload.max_records, payload.budget_ms, _top(payload.limit, payload.offset))
+    else:
+        body = await run_repurpose(payload.drug, payload.max_records)
+    return shape(body, "opportunities", payload.fields, payload.limit, payload.offset)
+
+
+# Tracked queries: evidence is stored per term and refreshed with deltas
+# only; /repurpose and /treat read it with source=tracked.
+
+@router.get("/tracked")
+def tracked_list():
+    return {"tracked": get_tracked_store().list()}
+
+
+@router.post("/tracked")
+async def track(payload: TrackRequest):
+    await asyncio.to_thread(get_tracked_store().track, payload.term, payload.kind, payload.max_records)
+    return await refresh_tracked(payload.term)
+
+
+@router.post("/tracked/refresh")
+async def tracked_refresh_all():
+    return {"results": await refresh_all_tracked()}
+
+
+@router.post("/tracked/{term}/refresh")
+async def tracked_refresh(term: str):
+    try:
+        return await refresh_tracked(term)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Not tracked")
+
+
+@router.delete("/tracked/{term}")
+def untrack(term: str):
+    if not get_tracked_store().untrack(term):
+        raise HTTPException(status_code=404, detail="Not tracked")
+    return {"term": term, "tracked": False}
+
+
+@router.post("/repurpose/batch")
+async def repurpose_batch(payload: BatchRequest):
+    """Screen many drugs; each drug's result is streamed as one NDJSON line when ready."""
+    async def run(drug: str):
+        return await run_repurpose(drug, payload.max_records)
+    lines = stream_batch(payload.terms, run, payload.concurrency, payload.rate_limit)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.post("/treat/batch")
+async def treat_batch(payload: TreatBatchRequest):
+    async def run(condition: str):
+        return await run_treat(condition, payload.max_records, payload.min_phase, payload.min_year)
+    lines = stream_batch(payload.terms, run, payload.concurrency, payload.rate_limit)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+# Progressive (Server-Sent Events) variants: results from the faster
+# upstream are pushed first and refined as the other source arrives.
+
+@router.get("/repurpose/stream")
+async def repurpose_stream(drug: str = Query(..., min_length=2), max_records: int = 15):
+    cached = run_repurpose.peek(drug, max_records)
+    if cached is not None:
+        return StreamingResponse(replay(cached), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    def build(abstracts, trials, fallback):
+        return {"drug": drug, "opportunities": build_opportunities(drug, abstracts, trials, fallback)}
+    events = progressive(drug, max_records, build, lambda body: run_repurpose.prime(body, drug, max_records))
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/treat/stream")
+async def treat_stream(
+    condition: str = Query(..., min_length=2),
+    max_records: int = 15,
+    min_phase: str = Query("any", regex="^(any|phase 1|phase 2|phase 3)$"),
+    min_year: int = 0,
+):
+    args = (condition, max_records, min_phase, min_year)
+    cached = run_treat.peek(*args)
+    if cached is not None:
+        return StreamingResponse(replay(cached), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    def build(abstracts, trials, fallback):
+        return {"condition": condition, "treatments": build_treatments(condition, abstracts, trials, min_phase, min_year, fallback)}
+    events = progressive(condition, max_records, build, lambda body: run_treat.prime(body, *args))
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/explorer/stream")
+async def explorer_stream(condition: str = Query(..., min_length=2), max_records: int = 12):
+    cached = run_explorer.peek(condition, max_records)
+    if cached is not None:
+        return StreamingResponse(replay(cached), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    async def build(abstracts, trials, fallback):
+        return explorer_body(condition, await build_explorer_items(condition, abstracts, trials, fallback))
+    events = progressive(condition, max_records, build, lambda body: run_explorer.prime(body, condition, max_records))
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
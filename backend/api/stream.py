@@ -0,0 +1,69 @@
+import asyncio
+import inspect
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List
+from api.pipeline import memo_result
+from data_sources.http import UpstreamError
+from data_sources.pubmed import fetch_pubmed_abstracts
+from data_sources.trials import fetch_trials
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse(event: str, data: Dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def progressive(
+    term: str,
+    max_records: int,
+    build: Callable[[List[Dict], List[Dict], bool], Any],
+    on_complete: Callable[[Any], None] = None,
+) -> AsyncIterator[bytes]:
+    """Server-Sent Events for one analysis as each upstream source lands.
+
+    `build(abstracts, trials, fallback)` returns the response body, or an
+    awaitable of it. The
+    first body is sent as `candidates` as soon as the faster source is in;
+    each later source triggers an `update` with merged evidence and
+    recomputed confidence. The last body equals the non-streaming
+    response (demo fallback only applies once every source is in), and a
+    final `done` event closes the stream. A source that stays throttled is
+    reported in `sources_failed` instead of aborting the stream. When no
+    source failed, `on_complete` receives the last body as a memoized
+    result (see memo_result).
+    """
+    tasks = {
+        asyncio.ensure_future(fetch_pubmed_abstracts(term, retmax=max_records)): "pubmed",
+        asyncio.ensure_future(fetch_trials(term, max_records=max_records)): "trials",
+    }
+    fetched: Dict[str, List[Dict]] = {"pubmed": [], "trials": []}
+    received: List[str] = []
+    failed: List[str] = []
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    fetched[tasks[task]] = task.result()
+                    received.append(tasks[task])
+                except UpstreamError:
+                    failed.append(tasks[task])
+            body = build(fetched["pubmed"], fetched["trials"], not pending)
+            if inspect.isawaitable(body):
+                body = await body
+            event = "update" if len(received) + len(failed) > len(done) else "candidates"
+            yield sse(event, dict(body, sources_received=list(received), sources_failed=list(failed)))
+        if on_complete is not None and not failed:
+            on_complete(memo_result(body, fetched["pubmed"], fetched["trials"]))
+        yield sse("done", {"sources_received": received, "sources_failed": failed})
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def replay(body: Dict) -> AsyncIterator[bytes]:
+    """Stream an already-computed body (e.g. a memoized result) as one event."""
+    yield sse("candidates", dict(body, sources_received=["cache"]))
+    yield sse("done", {"sources_received": ["cache"]})
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, every process warms
+    fcntl = None
+from typing import Dict, Optional
+
+from utils.memo import QUERIES, RESULTS, RUNNERS
+from utils.ratelimit import TokenBucket
+
+WARMER_ENABLED = os.getenv("WARMER_ENABLED", "1") == "1"
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", "20"))
+# Re-run before results expire from the LRU (default: at 80% of its TTL).
+WARM_INTERVAL = float(os.getenv("WARM_INTERVAL", str(RESULTS.ttl * 0.8)))
+# Warm runs started per second; each run costs one search per upstream.
+WARM_RATE = float(os.getenv("WARM_RATE", "0.5"))
+WARM_STATS_PATH = os.getenv(
+    "WARM_STATS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "query_stats.json"),
+)
+# Held by the one worker process that runs the warmer.
+WARM_LOCK_PATH = os.getenv("WARM_LOCK_PATH", WARM_STATS_PATH + ".lock")
+
+
+class CacheWarmer:
+    """Keeps the most requested results computed.
+
+    Every `interval` seconds the `top_n` most requested (endpoint,
+    arguments) pairs are recomputed through their runner and primed into
+    the result cache, paced by a token bucket on top of the upstream
+    clients' own rate limits. Query counts are persisted to `stats_path`
+    so the first cycle after a restart warms yesterday's popular queries.
+
+    With several worker processes only the one holding `lock_path` runs
+    the warmer; its results reach the others through the shared result
+    cache, and its ranking is drawn from the share of traffic it serves.
+    """
+
+    def __init__(self, top_n: int = WARM_TOP_N, interval: float = WARM_INTERVAL,
+                 rate: float = WARM_RATE, stats_path: str = WARM_STATS_PATH, lock_path: str = WARM_LOCK_PATH):
+        self.top_n = top_n
+        self.interval = interval
+        self.stats_path = stats_path
+        self.lock_path = lock_path
+        self._lock_fd: Optional[int] = None
+        self.bucket = TokenBucket(rate)
+        self.last_run: Optional[float] = None
+        self.next_run: Optional[float] = None
+        self.warmed: Dict[tuple, float] = {}
+        self.errors: Dict[tuple, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def warm_once(self) -> int:
+        warmed = 0
+        for key, _ in QUERIES.top(self.top_n):
+            runner = RUNNERS.get(key[0])
+            if runner is None:
+                continue
+            args = QUERIES.args[key]
+            await self.bucket.acquire()
+            try:
+                # Call the undecorated runner so warming is not counted as demand.
+                runner.prime(await runner.__wrapped__(*args), *args)
+            except Exception as exc:
+                self.errors[key] = str(exc) or exc.__class__.__name__
+                continue
+            self.errors.pop(key, None)
+            self.warmed[key] = time.time()
+            warmed += 1
+        return warmed
+
+    async def _run(self) -> None:
+        while True:
+            self.next_run = None
+            try:
+                await self.warm_once()
+                QUERIES.save(self.stats_path)
+            except Exception:
+                pass  # a failed cycle must not stop the scheduler
+            self.last_run = time.time()
+            self.next_run = self.last_run + self.interval
+            await asyncio.sleep(self.interval)
+
+    def _acquire_lock(self) -> bool:
+        if fcntl is None or self._lock_fd is not None:
+            return True
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _release_lock(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # closing drops the flock
+            self._lock_fd = None
+
+    def start(self) -> bool:
+        """Start warming unless another worker process already does; returns whether this one does."""
+        if not self._acquire_lock():
+            return False
+        try:
+            QUERIES.load(self.stats_path)
+        except (OSError, ValueError):
+            pass
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return True
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            QUERIES.save(self.stats_path)
+        except OSError:
+            pass
+        self._release_lock()
+
+    def status(self) -> Dict:
+        top = QUERIES.top(self.top_n)
+        total = sum(QUERIES.counts.values())
+        entries = []
+        for key, count in top:
+            expires_in = RESULTS.expires_in(key)
+            last = self.warmed.get(key)
+            entries.append({
+                "endpoint": key[0],
+                "args": list(key[1:]),
+                "requests": count,
+                "warm": expires_in is not None,
+                "expires_in": round(expires_in, 1) if expires_in is not None else None,
+                "last_warmed": last,
+                "next_refresh": self.next_run if self._task is not None else None,
+                "error": self.errors.get(key),
+            })
+        warm = [e for e in entries if e["warm"]]
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "pid": os.getpid(),
+            "top_n": self.top_n,
+            "interval": self.interval,
+            "last_run": self.last_run,
+            "next_run": self.next_run,
+            "coverage": {
+                "warm_entries": len(warm),
+                "tracked_entries": len(entries),
+                # Share of all recorded requests whose result is currently warm.
+                "request_share": round(sum(e["requests"] for e in warm) / total, 3) if total else 0.0,
+            },
+            "entries": entries,
+        }
+
+
+_warmer: Optional[CacheWarmer] = None
+
+
+def get_warmer() -> CacheWarmer:
+    global _warmer
+    if _warmer is None:
+        _warmer = CacheWarmer()
+    return _warmer
@@ -0,0 +1,73 @@
+"""Compare the compiled disease matcher against the old per-term regex loop.
+
+    python benchmarks/bench_disease_matcher.py [--terms 5000] [--abstracts 500]
+
+Prints one JSON object per vocabulary size.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlp.matcher import PhraseMatcher  # noqa: E402
+
+WORDS = ["patients", "treated", "with", "showed", "improved", "outcomes", "in", "the", "cohort", "and", "risk"]
+
+
+def legacy_find(terms, text):
+    # The pre-matcher loop, with the word-boundary escape fixed so it matches.
+    text = text.lower()
+    return [t.title() for t in terms if re.search(r"\b" + re.escape(t) + r"\b", text)]
+
+
+def synthetic(n_terms, n_abstracts, seed=0):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    terms = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(5, 12))) +
+                    rng.choice(["", " disease", " syndrome"]) for _ in range(n_terms)})
+    abstracts = []
+    for _ in range(n_abstracts):
+        words = [rng.choice(WORDS) for _ in range(200)]
+        for _ in range(3):
+            words.insert(rng.randrange(len(words)), rng.choice(terms))
+        abstracts.append(" ".join(words))
+    return terms, abstracts
+
+
+def run(n_terms, n_abstracts):
+    terms, abstracts = synthetic(n_terms, n_abstracts)
+    t0 = time.perf_counter()
+    matcher = PhraseMatcher({t: t.title() for t in terms})
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new_hits = sum(len(matcher.find(a)) for a in abstracts)
+    new = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    old_hits = sum(len(legacy_find(terms, a)) for a in abstracts)
+    old = time.perf_counter() - t0
+    return {
+        "terms": len(terms),
+        "abstracts": n_abstracts,
+        "matcher_build_s": round(build, 4),
+        "matcher_s": round(new, 4),
+        "legacy_loop_s": round(old, 4),
+        "speedup": round(old / new, 1) if new else None,
+        "matcher_hits": new_hits,
+        "legacy_hits": old_hits,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--terms", type=int, default=5000)
+    ap.add_argument("--abstracts", type=int, default=200)
+    args = ap.parse_args()
+    for n in (30, 1000, args.terms):
+        print(json.dumps(run(n, args.abstracts)))
@@ -0,0 +1,172 @@
+"""Benchmark the parsing, extraction, scoring and serialization hot paths on fixed synthetic corpora.
+
+    python benchmarks/bench_suite.py [--sizes 10,100,1000,10000,100000] [--repeat 5]
+                                     [--only parse_pubmed,score] [--out results.json]
+                                     [--baseline previous.json --max-regression 0.2]
+
+Corpora come from benchmarks/synthetic.py with a fixed seed, so two runs
+time the same work. Prints one JSON document with run metadata and one
+entry per (benchmark, size); with --baseline, exits 1 when any median is
+more than --max-regression slower than the baseline's (differences under
+1 ms are treated as noise).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import efetch_xml, make_abstracts, make_studies  # noqa: E402
+from data_sources.pubmed_xml import PubmedArticleParser  # noqa: E402
+from data_sources.trials import parse_study  # noqa: E402
+from nlp.extract import disease_evidence, drug_evidence  # noqa: E402
+from nlp.matcher import get_disease_matcher  # noqa: E402
+from nlp.lexicon import get_drug_lexicon  # noqa: E402
+from utils.scoring import score_opportunity  # noqa: E402
+from api.models import Opportunity  # noqa: E402
+from api.pipeline import build_opportunities  # noqa: E402
+from api.responses import dumps  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+CHUNK = 64 * 1024
+NOISE_FLOOR = 0.001
+
+
+def parse_pubmed(xml: bytes) -> int:
+    parser = PubmedArticleParser()
+    n = 0
+    for i in range(0, len(xml), CHUNK):
+        n += len(parser.feed(xml[i:i + CHUNK]))
+    return n + len(parser.close())
+
+
+def legacy_scores(evidence_map: Dict[str, List[dict]]) -> List[float]:
+    return [score_opportunity("drug", disease, ev) for disease, ev in evidence_map.items()]
+
+
+def legacy_serialize(opportunities: List[dict]) -> bytes:
+    # Model round trip, jsonable_encoder and stdlib json, as responses were encoded before.
+    body = {"drug": "drug", "opportunities": [Opportunity(**o).dict() for o in opportunities]}
+    return json.dumps(jsonable_encoder(body)).encode("utf-8")
+
+
+def benchmarks(size: int) -> Dict[str, Callable[[], object]]:
+    """name -> zero-argument callable, over corpora of `size` abstracts and `size` trials."""
+    abstracts = make_abstracts(size)
+    raw_studies = make_studies(size)
+    trials = [parse_study(s) for s in raw_studies]
+    xml = efetch_xml(abstracts)
+    table = disease_evidence(abstracts, trials)
+    evidence_map = table.to_map()
+    opportunities = build_opportunities("drug", abstracts, trials)
+    return {
+        "parse_pubmed": lambda: parse_pubmed(xml),
+        "parse_trials": lambda: [parse_study(s) for s in raw_studies],
+        "extract_diseases": lambda: disease_evidence(abstracts, trials),
+        "extract_drugs": lambda: drug_evidence(abstracts, trials),
+        # drug_evidence only scans abstracts when no trial names a drug.
+        "extract_drugs_literature": lambda: drug_evidence(abstracts, []),
+        "score": table.scores,
+        "score_legacy": lambda: legacy_scores(evidence_map),
+        "build_opportunities": lambda: build_opportunities("drug", abstracts, trials),
+        "serialize": lambda: dumps({"drug": "drug", "opportunities": opportunities}),
+        "serialize_legacy": lambda: legacy_serialize(opportunities),
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int) -> List[float]:
+    fn()  # warm-up: lazy singletons, first-call caches
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run(sizes: List[int], repeat: int, only: List[str]) -> Dict:
+    # Load the vocabularies before timing anything.
+    get_disease_matcher()
+    get_drug_lexicon()
+    results = []
+    for size in sizes:
+        for name, fn in benchmarks(size).items():
+            if only and name not in only:
+                continue
+            times = measure(fn, repeat)
+            median = statistics.median(times)
+            results.append({
+                "bench": name,
+                "size": size,
+                "repeat": repeat,
+                "min_s": round(min(times), 6),
+                "median_s": round(median, 6),
+                "per_item_us": round(median / size * 1e6, 3),
+            })
+            print(f"{name:<26} {size:>7} {median * 1000:>10.2f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def regressions(current: Dict, baseline: Dict, max_regression: float) -> List[Dict]:
+    before = {(r["bench"], r["size"]): r["median_s"] for r in baseline.get("results", [])}
+    out = []
+    for r in current["results"]:
+        base = before.get((r["bench"], r["size"]))
+        if base is None:
+            continue
+        if r["median_s"] > base * (1 + max_regression) and r["median_s"] - base > NOISE_FLOOR:
+            out.append({"bench": r["bench"], "size": r["size"], "baseline_s": base,
+                        "median_s": r["median_s"], "ratio": round(r["median_s"] / base, 2) if base else None})
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--only", default="", help="comma-separated benchmark names")
+    ap.add_argument("--out", help="also write the JSON report to this file")
+    ap.add_argument("--baseline", help="JSON report from a previous run to compare against")
+    ap.add_argument("--max-regression", type=float, default=0.2, help="allowed slowdown, as a fraction")
+    args = ap.parse_args()
+
+    report = run([int(s) for s in args.sizes.split(",") if s], args.repeat,
+                 [s for s in args.only.split(",") if s])
+    failed = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            failed = regressions(report, json.load(fh), args.max_regression)
+        report["regressions"] = failed
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text)
+    sys.exit(1 if failed else 0)
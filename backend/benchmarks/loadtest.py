@@ -0,0 +1,251 @@
+"""Load-test the API against the stub upstream.
+
+    python benchmarks/loadtest.py [--concurrency 1,8,32] [--duration 30]
+                                  [--mix repurpose=5,treat=3,explorer=2] [--zipf 1.1]
+                                  [--latency-ms 150] [--jitter-ms 50] [--error-rate 0.01]
+                                  [--out report.json]
+
+Starts benchmarks/stub_upstream.py and the app (main.py with --workers, with
+the upstream base URLs pointed at the stub and caches in a temporary
+directory), then runs one closed-loop stage per concurrency level: that
+many clients each send the next request as soon as the previous one
+returns. Drug and condition names are drawn from the bundled vocabularies
+with Zipfian popularity, so a few queries dominate as in real traffic.
+Each stage reports throughput, per-endpoint p50/p95/p99 latency and error
+counts, and upstream calls per request as counted by the stub. The app
+keeps its NCBI quota unless --ncbi-rate is given. Pass
+--app-url / --stub-url to measure already running processes instead.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stub_upstream import base_env  # noqa: E402
+from benchmarks.synthetic import DISEASES, DRUGS  # noqa: E402
+
+ENDPOINTS = {
+    "repurpose": ("/api/repurpose", "drug"),
+    "treat": ("/api/treat", "condition"),
+    "explorer": ("/api/explorer", "condition"),
+}
+
+
+class Zipf:
+    """Draws names with probability proportional to 1 / rank ** s."""
+
+    def __init__(self, names: List[str], s: float, rng: random.Random):
+        self.names = names
+        self.weights = [1 / (rank ** s) for rank in range(1, len(names) + 1)]
+        self.rng = rng
+
+    def draw(self) -> str:
+        return self.rng.choices(self.names, self.weights)[0]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint in --mix: {name!r} (choose from {', '.join(ENDPOINTS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: List[Tuple[str, float, int]], elapsed: float) -> Dict:
+    out: Dict[str, Dict] = {}
+    for endpoint in sorted({s[0] for s in samples}):
+        latencies = sorted(s[1] for s in samples if s[0] == endpoint)
+        statuses = [s[2] for s in samples if s[0] == endpoint]
+        out[endpoint] = {
+            "requests": len(latencies),
+            "errors": sum(1 for st in statuses if st >= 400 or st == 0),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1),
+        }
+    return out
+
+
+async def stage(app_url: str, stub_url: str, concurrency: int, duration: float,
+                mix: Dict[str, float], drugs: Zipf, conditions: Zipf, rng: random.Random) -> Dict:
+    endpoints, weights = list(mix), list(mix.values())
+    samples: List[Tuple[str, float, int]] = []
+    timeout = httpx.Timeout(60.0)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=app_url, timeout=timeout, limits=limits) as client:
+        await client.post(f"{stub_url}/__reset")
+        deadline = time.perf_counter() + duration
+
+        async def user() -> None:
+            while time.perf_counter() < deadline:
+                endpoint = rng.choices(endpoints, weights)[0]
+                path, param = ENDPOINTS[endpoint]
+                name = drugs.draw() if param == "drug" else conditions.draw()
+                start = time.perf_counter()
+                try:
+                    status = (await client.get(path, params={param: name})).status_code
+                except httpx.HTTPError:
+                    status = 0
+                samples.append((endpoint, time.perf_counter() - start, status))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        upstream = (await client.get(f"{stub_url}/__stats")).json()
+
+    total = len(samples)
+    calls = upstream.get("requests", {})
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(1 for s in samples if s[2] >= 400 or s[2] == 0),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "endpoints": summarize(samples, elapsed),
+        "upstream": {
+            "calls": calls,
+            "injected_errors": upstream.get("errors", {}),
+            "calls_per_request": round(upstream.get("total", 0) / total, 3) if total else None,
+            "per_request": {name: round(n / total, 3) for name, n in calls.items()} if total else {},
+        },
+    }
+
+
+def wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise SystemExit(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start_processes(args, workdir: str) -> Tuple[List[subprocess.Popen], str, str]:
+    procs = []
+    stub_url, app_url = args.stub_url, args.app_url
+    if not stub_url:
+        cmd = [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "stub_upstream.py"),
+               "--port", str(args.stub_port), "--latency-ms", str(args.latency_ms),
+               "--jitter-ms", str(args.jitter_ms), "--error-rate", str(args.error_rate)]
+        if args.fixtures:
+            cmd += ["--fixtures", args.fixtures]
+        procs.append(subprocess.Popen(cmd, stdout=subprocess.DEVNULL))
+        stub_url = f"http://127.0.0.1:{args.stub_port}"
+        wait_until_up(f"{stub_url}/__stats")
+    if not app_url:
+        env = dict(os.environ, **base_env("127.0.0.1", int(stub_url.rsplit(":", 1)[1])))
+        env.update(
+            CACHE_PATH=os.path.join(workdir, "cache.sqlite3"),
+            TRACKED_DB_PATH=os.path.join(workdir, "tracked.sqlite3"),
+            WARM_STATS_PATH=os.path.join(workdir, "query_stats.json"),
+            WARMER_ENABLED="1" if args.warmer else "0",
+            WARM_LOCK_PATH=os.path.join(workdir, "warmer.lock"),
+            RESULT_CACHE_PATH=os.path.join(workdir, "results.sqlite3") if args.workers > 1 else "",
+        )
+        if args.ncbi_rate:
+            env["NCBI_RATE"] = str(args.ncbi_rate)
+        cmd = [sys.executable, "main.py", "--host", "127.0.0.1", "--port", str(args.app_port),
+               "--workers", str(args.workers), "--no-reload", "--log-level", "warning"]
+        procs.append(subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env))
+        app_url = f"http://127.0.0.1:{args.app_port}"
+        wait_until_up(f"{app_url}/api/health")
+    return procs, app_url, stub_url
+
+
+def print_stage(result: Dict) -> None:
+    print(f"concurrency {result['concurrency']}: {result['requests']} requests, "
+          f"{result['throughput_rps']} req/s, {result['errors']} errors, "
+          f"{result['upstream']['calls_per_request']} upstream calls/request", file=sys.stderr)
+    for name, e in result["endpoints"].items():
+        print(f"  {name:<10} n={e['requests']:<6} p50={e['p50_ms']:>8} p95={e['p95_ms']:>8} "
+              f"p99={e['p99_ms']:>8} ms  errors={e['errors']}", file=sys.stderr)
+
+
+async def main(args) -> Dict:
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    drugs = Zipf([canonical for canonical, _ in DRUGS][:args.vocab], args.zipf, rng)
+    conditions = Zipf([canonical for canonical, _ in DISEASES][:args.vocab], args.zipf, rng)
+    stages = []
+    for concurrency in [int(c) for c in args.concurrency.split(",") if c]:
+        result = await stage(args.app_url, args.stub_url, concurrency, args.duration, mix, drugs, conditions, rng)
+        print_stage(result)
+        stages.append(result)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "mix": mix,
+            "zipf": args.zipf,
+            "vocab": args.vocab,
+            "duration_s": args.duration,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "warmer": args.warmer,
+            "workers": args.workers,
+            "ncbi_rate": args.ncbi_rate,
+        },
+        "stages": stages,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels, one stage each")
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds per stage")
+    ap.add_argument("--mix", default="repurpose=5,treat=3,explorer=2")
+    ap.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of query popularity")
+    ap.add_argument("--vocab", type=int, default=500, help="distinct drugs/conditions to draw from")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--latency-ms", type=float, default=150.0)
+    ap.add_argument("--jitter-ms", type=float, default=50.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--fixtures", help="fixtures directory for the stub")
+    ap.add_argument("--warmer", action="store_true", help="run the app with the cache warmer enabled")
+    ap.add_argument("--ncbi-rate", type=float, help="override the app's NCBI quota (requests/s); "
+                    "by default the real limit applies, as it bounds production throughput")
+    ap.add_argument("--workers", type=int, default=1, help="app worker processes")
+    ap.add_argument("--app-port", type=int, default=8800)
+    ap.add_argument("--stub-port", type=int, default=8900)
+    ap.add_argument("--app-url", help="use a running app instead of starting one")
+    ap.add_argument("--stub-url", help="use a running stub instead of starting one")
+    ap.add_argument("--out", help="also write the JSON report to this file")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        procs, args.app_url, args.stub_url = start_processes(args, workdir)
+        try:
+            report = asyncio.run(main(args))
+        finally:
+            for proc in reversed(procs):
+                proc.terminate()
+                proc.wait(timeout=10)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text)
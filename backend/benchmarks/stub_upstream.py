@@ -0,0 +1,120 @@
+"""Local stand-in for PubMed E-utilities, ClinicalTrials.gov and PubChem.
+
+    python benchmarks/stub_upstream.py [--port 8900] [--fixtures DIR]
+                                       [--latency-ms 150] [--jitter-ms 50] [--error-rate 0.01]
+
+Requests are answered from fixtures recorded with UPSTREAM_RECORD_DIR when
+one matches, otherwise with synthetic records derived from the query (see
+benchmarks/synthetic.py). Every response is delayed by --latency-ms plus up
+to --jitter-ms, and --error-rate of them fail with a 503. Point the app at
+the stub with the environment printed on startup. GET /__stats returns
+request counts per upstream; POST /__reset clears them.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from collections import Counter
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import JSONResponse, Response  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from benchmarks.synthetic import respond  # noqa: E402
+from data_sources.fixtures import fixture_key, load_fixture  # noqa: E402
+
+NCBI_PATH = "/entrez/eutils"
+CTGOV_PATH = "/api/v2/studies"
+PUBCHEM_PATH = "/rest/pug"
+
+
+def upstream_of(path: str) -> str:
+    if path.startswith(NCBI_PATH):
+        return "pubmed"
+    if path.startswith(CTGOV_PATH):
+        return "trials"
+    if path.startswith(PUBCHEM_PATH):
+        return "pubchem"
+    return "other"
+
+
+def base_env(host: str, port: int) -> Dict[str, str]:
+    root = f"http://{host}:{port}"
+    return {
+        "NCBI_EUTILS_BASE": root + NCBI_PATH,
+        "CTGOV_BASE": root + CTGOV_PATH,
+        "PUBCHEM_BASE": root + PUBCHEM_PATH,
+    }
+
+
+def create_app(fixtures: Optional[str] = None, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+               error_rate: float = 0.0, seed: int = 0) -> Starlette:
+    rng = random.Random(seed)
+    calls: Counter = Counter()
+    errors: Counter = Counter()
+    replayed: Counter = Counter()
+
+    async def stats(request: Request) -> JSONResponse:
+        return JSONResponse({
+            "requests": dict(calls),
+            "errors": dict(errors),
+            "replayed": dict(replayed),
+            "total": sum(calls.values()),
+        })
+
+    async def reset(request: Request) -> JSONResponse:
+        calls.clear()
+        errors.clear()
+        replayed.clear()
+        return JSONResponse({"reset": True})
+
+    async def upstream(request: Request) -> Response:
+        path = request.url.path
+        name = upstream_of(path)
+        calls[name] += 1
+        body = await request.body()
+        delay = latency_ms + rng.uniform(0, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if rng.random() < error_rate:
+            errors[name] += 1
+            return JSONResponse({"error": "injected failure"}, status_code=503)
+        fixture = None
+        if fixtures:
+            fixture = load_fixture(fixtures, fixture_key(request.method, path, request.url.query, body))
+        if fixture is not None:
+            replayed[name] += 1
+            return Response(fixture["content"], status_code=fixture["status"], media_type=fixture["content_type"])
+        status, content_type, content = respond(request.method, path, request.url.query, body)
+        return Response(content, status_code=status, media_type=content_type)
+
+    return Starlette(routes=[
+        Route("/__stats", stats, methods=["GET"]),
+        Route("/__reset", reset, methods=["POST"]),
+        Route("/{path:path}", upstream, methods=["GET", "POST"]),
+    ])
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--fixtures", help="directory of fixtures recorded with UPSTREAM_RECORD_DIR")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    for key, value in base_env(args.host, args.port).items():
+        print(f"{key}={value}")
+    sys.stdout.flush()
+    app = create_app(args.fixtures, args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,204 @@
+"""Deterministic synthetic PubMed / ClinicalTrials.gov / PubChem data.
+
+Used by the benchmark suite (fixed corpora of a given size) and by the stub
+upstream server (responses derived from the query term, so the same query
+always gets the same records). Drug and disease names come from the bundled
+vocabularies so the extractors find realistic numbers of mentions.
+"""
+import hashlib
+import json
+import os
+import random
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote
+from xml.sax.saxutils import escape
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nlp", "data")
+
+FILLER = (
+    "patients treated with showed improved outcomes in the cohort and reduced risk of adverse events "
+    "during follow up compared to placebo this randomized study evaluated efficacy safety dose response "
+    "we observed significant association between exposure and clinical benefit across subgroups"
+).split()
+PHASES = [["PHASE1"], ["PHASE2"], ["PHASE3"], ["PHASE2", "PHASE3"], ["EARLY_PHASE1"], ["NA"], []]
+STATUSES = ["COMPLETED", "RECRUITING", "ACTIVE_NOT_RECRUITING", "TERMINATED", "NOT_YET_RECRUITING"]
+INTERVENTION_FORMS = ["{}", "{} 500 mg", "{} tablets", "{} hydrochloride", "Placebo"]
+
+
+def _vocab(name: str) -> List[Tuple[str, List[str]]]:
+    out = []
+    with open(os.path.join(DATA_DIR, name), encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip() and not line.startswith("#"):
+                canonical, _, synonyms = line.rstrip("\n").partition("\t")
+                out.append((canonical, [s for s in synonyms.split("|") if s]))
+    return out
+
+
+DISEASES = _vocab("diseases.tsv")
+DRUGS = _vocab("drugs.tsv")
+_DISEASE_NAMES = {n.lower() for canonical, synonyms in DISEASES for n in [canonical] + synonyms}
+
+
+def _is_disease(term: Optional[str]) -> bool:
+    return bool(term) and " ".join(term.lower().split()) in _DISEASE_NAMES
+
+
+def _rng(*parts) -> random.Random:
+    return random.Random(hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest())
+
+
+def _mention(rng: random.Random, vocab) -> str:
+    canonical, synonyms = rng.choice(vocab)
+    return rng.choice([canonical] + synonyms)
+
+
+def make_abstract(pmid: str, rng: random.Random, term: Optional[str] = None) -> Dict:
+    # A query term is placed in the drug or disease slot, whichever it is.
+    drug = term if term and not _is_disease(term) else _mention(rng, DRUGS)
+    disease = term if _is_disease(term) else _mention(rng, DISEASES)
+    words = [rng.choice(FILLER) for _ in range(rng.randint(120, 220))]
+    for mention in [drug, disease] + [_mention(rng, DISEASES) for _ in range(rng.randint(0, 2))]:
+        words.insert(rng.randrange(len(words)), mention)
+    abstract = " ".join(words)
+    return {
+        "pmid": pmid,
+        "title": f"{drug} in {disease}: a randomized study",
+        "abstract": abstract,
+        "abstract_sections": [{"label": "", "text": abstract}],
+        "year": rng.randint(1995, 2025),
+        "mesh_terms": [],
+        "publication_types": ["Journal Article"],
+        "source_id": f"PMID:{pmid}",
+    }
+
+
+def make_study(nct_id: str, rng: random.Random, term: Optional[str] = None) -> Dict:
+    """A ClinicalTrials.gov v2 study (the raw API shape, before parse_study)."""
+    drugs = [term if term and not _is_disease(term) else _mention(rng, DRUGS)]
+    drugs += [_mention(rng, DRUGS) for _ in range(rng.randint(0, 1))]
+    conditions = sorted({rng.choice(DISEASES)[0] for _ in range(rng.randint(1, 3))})
+    if _is_disease(term):
+        conditions = [term] + [c for c in conditions if c.lower() != term.lower()][:1]
+    start = rng.randint(2000, 2024)
+    return {
+        "protocolSection": {
+            "identificationModule": {"nctId": nct_id, "briefTitle": f"{drugs[0]} for {conditions[0]}"},
+            "conditionsModule": {"conditions": conditions},
+            "armsInterventionsModule": {"interventions": [
+                {"name": rng.choice(INTERVENTION_FORMS).format(d), "type": "DRUG"} for d in drugs
+            ]},
+            "designModule": {"phases": rng.choice(PHASES)},
+            "statusModule": {
+                "overallStatus": rng.choice(STATUSES),
+                "startDateStruct": {"date": f"{start}-0{rng.randint(1, 9)}"},
+                "completionDateStruct": {"date": f"{start + rng.randint(1, 6)}-0{rng.randint(1, 9)}"},
+            },
+        }
+    }
+
+
+def make_abstracts(n: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [make_abstract(str(10_000_000 + i), rng) for i in range(n)]
+
+
+def make_studies(n: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed + 1)
+    return [make_study(f"NCT{i:08d}", rng) for i in range(n)]
+
+
+def efetch_xml(records: List[Dict]) -> bytes:
+    parts = ["<?xml version=\"1.0\" ?>\n<PubmedArticleSet>"]
+    for r in records:
+        parts.append(
+            "<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>"
+            "<Journal><JournalIssue><PubDate><Year>{year}</Year></PubDate></JournalIssue></Journal>"
+            "<ArticleTitle>{title}</ArticleTitle><Abstract><AbstractText>{abstract}</AbstractText></Abstract>"
+            "<PublicationTypeList><PublicationType>Journal Article</PublicationType></PublicationTypeList>"
+            "</Article></MedlineCitation></PubmedArticle>".format(
+                pmid=r["pmid"], year=r["year"], title=escape(r["title"]), abstract=escape(r["abstract"])
+            )
+        )
+    parts.append("</PubmedArticleSet>")
+    return "\n".join(parts).encode("utf-8")
+
+
+# Synthetic upstream: answers the requests the app's clients make, with
+# records derived from the query term.
+
+HITS_PER_TERM = 400
+# PMID -> the term whose search returned it, so efetch can mention that term.
+_pmid_terms: Dict[str, str] = {}
+
+
+def hash_int(term: str) -> int:
+    return int(hashlib.sha1(" ".join(term.lower().split()).encode()).hexdigest()[:5], 16) * 1000
+
+
+def _term_pmids(term: str, retmax: int) -> List[str]:
+    ids = [str(hash_int(term) + i) for i in range(min(retmax, HITS_PER_TERM))]
+    for pmid in ids:
+        _pmid_terms[pmid] = term
+    return ids
+
+
+def _pmid_record(pmid: str) -> Dict:
+    return make_abstract(pmid, _rng("pmid", pmid), _pmid_terms.get(pmid))
+
+
+def respond(method: str, path: str, query: str, body: bytes) -> Tuple[int, str, bytes]:
+    """(status, content type, body) for one upstream request."""
+    params = dict(parse_qsl(query, keep_blank_values=True))
+    if method == "POST":
+        params.update(parse_qsl(body.decode("utf-8", "replace"), keep_blank_values=True))
+    if path.endswith("esearch.fcgi"):
+        term = params.get("term", "")
+        ids = _term_pmids(term, int(params.get("retmax", 20)))
+        result = {"count": str(HITS_PER_TERM), "idlist": ids}
+        if params.get("usehistory") == "y":
+            result.update(webenv=f"stub-{term}", querykey="1", idlist=[])
+        return 200, "application/json", json.dumps({"esearchresult": result}).encode()
+    if path.endswith("efetch.fcgi"):
+        if "WebEnv" in params:
+            term = params["WebEnv"][len("stub-"):]
+            start, size = int(params.get("retstart", 0)), int(params.get("retmax", 20))
+            ids = _term_pmids(term, start + size)[start:]
+        else:
+            ids = [p for p in params.get("id", "").split(",") if p]
+        return 200, "text/xml", efetch_xml([_pmid_record(p) for p in ids])
+    if path.endswith("/studies"):
+        term = params.get("query.term", "")
+        size = int(params.get("pageSize", 20))
+        start = int(params.get("pageToken", 0) or 0)
+        rng = _rng("trials", term, start)
+        total = HITS_PER_TERM // 4
+        studies = [make_study(f"NCT{hash_int(term) + i:08d}", rng, term) for i in range(start, min(total, start + size))]
+        page = {"studies": studies}
+        if start + size < total:
+            page["nextPageToken"] = str(start + size)
+        return 200, "application/json", json.dumps(page).encode()
+    if "/rest/pug/" in path:
+        return _pubchem(path, params)
+    return 404, "application/json", b'{"error": "unknown upstream path"}'
+
+
+def _pubchem(path: str, params: Dict[str, str]) -> Tuple[int, str, bytes]:
+    parts = path.split("/")
+    if "name" in parts:
+        name = unquote(parts[parts.index("name") + 1])
+        cids = [hash_int(name) + 1]
+    else:
+        cids = [int(c) for c in params.get("cid", "").split(",") if c] or [int(parts[parts.index("cid") + 1])]
+    if path.endswith("/cids/JSON"):
+        payload = {"IdentifierList": {"CID": cids}}
+    elif "/property/" in path:
+        payload = {"PropertyTable": {"Properties": [
+            {"CID": c, "MolecularFormula": "C9H8O4", "MolecularWeight": "180.16",
+             "CanonicalSMILES": "CC(=O)OC1=CC=CC=C1C(=O)O", "InChIKey": f"STUB{c:010d}"} for c in cids
+        ]}}
+    elif path.endswith("/synonyms/JSON"):
+        payload = {"InformationList": {"Information": [{"CID": c, "Synonym": [f"compound-{c}"]} for c in cids]}}
+    else:
+        payload = {"PC_Compounds": [{"id": {"id": {"cid": c}}, "props": []} for c in cids]}
+    return 200, "application/json", json.dumps(payload).encode()
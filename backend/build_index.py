@@ -0,0 +1,37 @@
+"""Build offline indexes from the local corpus (see ingest.py).
+
+    python build_index.py cooccurrence|tfidf [--out DIR]
+
+cooccurrence: sparse drug x disease evidence matrix used by
+/api/repurpose?source=index and /api/treat?source=index.
+tfidf: TF-IDF drug profiles over the corpus abstracts, used by /api/similar
+and for abstract relevance weights.
+"""
+import argparse
+import json
+import sys
+
+from data_sources.local import LocalCorpus, LOCAL_DB_PATH
+from nlp.cooccurrence import COOCCURRENCE_PATH, build_cooccurrence
+from nlp.tfidf import TFIDF_PATH, build_tfidf
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("index", choices=["cooccurrence", "tfidf"])
+    ap.add_argument("--db", default=LOCAL_DB_PATH)
+    ap.add_argument("--out", help=f"default: {COOCCURRENCE_PATH} or {TFIDF_PATH}")
+    ap.add_argument("--min-df", type=int, default=2, help="tfidf: drop terms in fewer documents")
+    args = ap.parse_args(argv)
+
+    corpus = LocalCorpus(args.db)
+    if args.index == "tfidf":
+        stats = build_tfidf(corpus.iter_articles(), args.out or TFIDF_PATH, min_df=args.min_df)
+    else:
+        stats = build_cooccurrence(corpus.iter_articles(), corpus.iter_trials(), args.out or COOCCURRENCE_PATH)
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+import asyncio
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from utils.db import connect, fail_fast
+
+CACHE_PATH = os.getenv(
+    "CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "upstream.sqlite3"),
+)
+
+# Seconds an entry is served as fresh, then how much longer it may be served
+# stale while a background refresh runs.
+TTLS = {
+    "pubmed": 6 * 3600,
+    "trials": 6 * 3600,
+    "pubchem": 7 * 24 * 3600,
+    "pubchem_props": 7 * 24 * 3600,
+    "pubchem_cid": 30 * 24 * 3600,
+}
+STALE_TTLS = {
+    "pubmed": 24 * 3600,
+    "trials": 24 * 3600,
+    "pubchem": 30 * 24 * 3600,
+    "pubchem_props": 30 * 24 * 3600,
+    "pubchem_cid": 90 * 24 * 3600,
+}
+
+
+class ResponseCache:
+    """Upstream responses persisted in SQLite so they survive restarts and are shared by all workers.
+
+    Every PURGE_EVERY writes, rows past their source's TTL plus stale TTL
+    (which are never served again) are deleted. A database locked by
+    another worker counts as a miss or a skipped write instead of blocking
+    the event loop.
+    """
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path: str):
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        fail_fast(self._conn)
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, age in seconds) or None."""
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT value, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), time.time() - row[1]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time()),
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    self._purge()
+                self._conn.commit()
+            except sqlite3.OperationalError:
+                self._conn.rollback()
+
+    def _purge(self) -> None:
+        now = time.time()
+        for source, ttl in TTLS.items():
+            # Keys are "<source>:<params>"; a range scan on the primary key finds a source's rows.
+            self._conn.execute(
+                "DELETE FROM responses WHERE key >= ? AND key < ? AND stored_at < ?",
+                (f"{source}:", f"{source};", now - ttl - STALE_TTLS[source]),
+            )
+
+    def record(self, source: str, outcome: str) -> None:
+        counters = self.stats.setdefault(source, {"hits": 0, "stale_hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+
+_cache: Optional[ResponseCache] = None
+_refreshing: Dict[str, asyncio.Task] = {}
+
+
+def get_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(CACHE_PATH)
+    return _cache
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    return value
+
+
+def make_key(source: str, params: Dict[str, Any]) -> str:
+    normalized = {k: _normalize(v) for k, v in params.items()}
+    return f"{source}:{json.dumps(normalized, sort_keys=True)}"
+
+
+def cached(source: str):
+    """Cache an async fetcher's result under `source` with stale-while-revalidate.
+
+    Empty results are not stored: the fetchers return them on upstream errors.
+    """
+    def decorator(fn):
+        sig = inspect.signature(fn)
+
+        def key_for(*args, **kwargs) -> str:
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return make_key(source, bound.arguments)
+
+        async def refresh(key: str, args, kwargs):
+            try:
+                value = await fn(*args, **kwargs)
+                if value:
+                    get_cache().set(key, value)
+            except Exception:
+                pass  # keep serving the stale entry; the next request retries
+            finally:
+                _refreshing.pop(key, None)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = key_for(*args, **kwargs)
+            cache = get_cache()
+            entry = cache.get(key)
+            if entry is not None:
+                value, age = entry
+                if age < TTLS[source]:
+                    cache.record(source, "hits")
+                    return value
+                if age < TTLS[source] + STALE_TTLS[source]:
+                    cache.record(source, "stale_hits")
+                    if key not in _refreshing:
+                        _refreshing[key] = asyncio.create_task(refresh(key, args, kwargs))
+                    return value
+            cache.record(source, "misses")
+            value = await fn(*args, **kwargs)
+            if value:
+                cache.set(key, value)
+            return value
+
+        def peek(*args, **kwargs):
+            """Cached value (fresh or stale) for these arguments, or None; never fetches."""
+            entry = get_cache().get(key_for(*args, **kwargs))
+            if entry is None or entry[1] >= TTLS[source] + STALE_TTLS[source]:
+                return None
+            return entry[0]
+
+        def prime(value, *args, **kwargs):
+            """Store a value obtained elsewhere (e.g. from a batched request)."""
+            if value:
+                get_cache().set(key_for(*args, **kwargs), value)
+
+        wrapper.peek = peek
+        wrapper.prime = prime
+        return wrapper
+    return decorator
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return {source: dict(counters) for source, counters in get_cache().stats.items()}
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+from urllib.parse import parse_qsl
+
+import httpx
+
+# Never written to fixtures nor part of their keys.
+SECRET_PARAMS = {"api_key"}
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _params(raw: str):
+    return sorted((k, v) for k, v in parse_qsl(raw, keep_blank_values=True) if k not in SECRET_PARAMS)
+
+
+def fixture_key(method: str, path: str, query: str, body: bytes) -> str:
+    """Host-independent key, so fixtures recorded upstream replay through a stub base URL with the same path."""
+    text = body.decode("utf-8", "replace")
+    body_key = _params(text) if "=" in text and "{" not in text else text
+    raw = json.dumps([method.upper(), path, _params(query), body_key])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def request_key(request: httpx.Request) -> str:
+    return fixture_key(request.method, request.url.path, request.url.query.decode("ascii"), request.content)
+
+
+def load_fixture(directory: str, key: str) -> Optional[Dict]:
+    path = os.path.join(directory, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save_fixture(directory: str, key: str, request: httpx.Request, status: int, content_type: str, content: bytes) -> None:
+    os.makedirs(directory, exist_ok=True)
+    fixture = {
+        "method": request.method,
+        "path": request.url.path,
+        "params": _params(request.url.query.decode("ascii")),
+        "status": status,
+        "content_type": content_type,
+        "content": content.decode("utf-8", "replace"),
+    }
+    tmp = os.path.join(directory, f"{key}.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(fixture, fh)
+    os.replace(tmp, os.path.join(directory, f"{key}.json"))
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests through to `inner` and saves every response under `directory`."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, directory: str):
+        self.inner = inner
+        self.directory = directory
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        try:
+            content = await response.aread()  # decoded, hence the dropped encoding headers
+        finally:
+            await response.aclose()
+        content_type = response.headers.get("content-type", "")
+        save_fixture(self.directory, request_key(request), request, response.status_code, content_type, content)
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROP_HEADERS]
+        return httpx.Response(response.status_code, headers=headers, content=content)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves recorded fixtures without touching the network; unknown requests get a 404."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request)
+        fixture = load_fixture(self.directory, key)
+        if fixture is None:
+            return httpx.Response(404, json={"error": "no fixture", "key": key})
+        return httpx.Response(
+            fixture["status"],
+            headers={"content-type": fixture["content_type"]},
+            content=fixture["content"].encode("utf-8"),
+        )
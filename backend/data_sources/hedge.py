@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from utils.metrics import METRICS
+from utils.ratelimit import TokenBucket
+
+# Off by default: a hedge is a second upstream request, which counts
+# against upstream rate limits.
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "0") == "1"
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+MIN_SAMPLES = 20
+
+
+class LatencyTracker:
+    """Recent call latencies per upstream, used to pick the hedging delay."""
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, upstream: str, seconds: float) -> None:
+        self.samples.setdefault(upstream, deque(maxlen=self.size)).append(seconds)
+
+    def quantile(self, upstream: str, q: float) -> Optional[float]:
+        samples = self.samples.get(upstream)
+        if not samples or len(samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+LATENCIES = LatencyTracker()
+HEDGE_STATS = {"hedged": 0, "hedge_wins": 0, "hedges_skipped": 0}
+
+
+async def hedged(upstream: str, call: Callable[[], Awaitable[Any]], bucket: Optional[TokenBucket] = None) -> Any:
+    """Await `call()`, firing a second identical call if the first is slower than the observed p95.
+
+    The first call to succeed wins and the other is cancelled; an error only
+    propagates once both have failed. Until MIN_SAMPLES latencies are known
+    (or with HEDGE_REQUESTS off) this is a plain await.
+
+    With a rate-limit `bucket`, the first call waits for a token before it
+    is timed, so latencies measure the upstream rather than the queue, and
+    the hedge is sent only if a token is free at once: when the quota is
+    exhausted no extra load is added.
+    """
+    async def timed():
+        start = time.perf_counter()
+        try:
+            result = await call()
+        except Exception as exc:
+            METRICS.inc("upstream_errors_total", upstream=upstream, error=exc.__class__.__name__)
+            raise
+        elapsed = time.perf_counter() - start
+        LATENCIES.observe(upstream, elapsed)
+        METRICS.observe("upstream_request_seconds", elapsed, upstream=upstream)
+        status = getattr(result, "status_code", 200)
+        if status >= 400:
+            METRICS.inc("upstream_errors_total", upstream=upstream, error=f"HTTP {status}")
+        return result
+
+    if bucket is not None:
+        await bucket.acquire()
+    delay = LATENCIES.quantile(upstream, HEDGE_QUANTILE) if HEDGE_REQUESTS else None
+    if delay is None:
+        return await timed()
+
+    first = asyncio.ensure_future(timed())
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            if bucket is None or bucket.try_acquire():
+                HEDGE_STATS["hedged"] += 1
+                tasks.append(asyncio.ensure_future(timed()))
+            else:
+                HEDGE_STATS["hedges_skipped"] += 1
+        pending = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((t for t in done if t.exception() is None), None)
+            if winner is not None:
+                if winner is not first:
+                    HEDGE_STATS["hedge_wins"] += 1
+                return winner.result()
+            if not pending:
+                return done.pop().result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,45 @@
+import os
+import httpx
+from typing import Optional
+from data_sources.fixtures import RecordingTransport, ReplayTransport
+
+# One pooled client per process so upstream connections are kept alive
+# across requests instead of re-handshaking TLS on every call.
+_client: Optional[httpx.AsyncClient] = None
+
+LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+# Worker processes on this host (set by main.py); per-process upstream
+# rate limits take an equal share of each quota.
+WORKERS = max(1, int(os.getenv("WORKERS", "1")))
+
+# Record every upstream response to fixtures, or serve only from them.
+UPSTREAM_RECORD_DIR = os.getenv("UPSTREAM_RECORD_DIR", "")
+UPSTREAM_REPLAY_DIR = os.getenv("UPSTREAM_REPLAY_DIR", "")
+
+
+def _transport() -> Optional[httpx.AsyncBaseTransport]:
+    if UPSTREAM_REPLAY_DIR:
+        return ReplayTransport(UPSTREAM_REPLAY_DIR)
+    if UPSTREAM_RECORD_DIR:
+        return RecordingTransport(httpx.AsyncHTTPTransport(limits=LIMITS), UPSTREAM_RECORD_DIR)
+    return None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(limits=LIMITS, timeout=TIMEOUT, follow_redirects=True, transport=_transport())
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+class UpstreamError(Exception):
+    """An upstream kept failing (throttling or server errors) after retries."""
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+DATA_BACKEND = os.getenv("DATA_BACKEND", "live")
+LOCAL_DB_PATH = os.getenv(
+    "LOCAL_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".data", "corpus.sqlite3"),
+)
+
+# Base tables hold the full record as JSON (same shape the live fetchers
+# return); FTS5 external-content tables index the searchable text and are
+# kept in sync by triggers.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    pmid TEXT PRIMARY KEY, title TEXT, abstract TEXT, year INTEGER, record TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, abstract, content='articles', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts(rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, abstract) VALUES ('delete', old.rowid, old.title, old.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, abstract) VALUES ('delete', old.rowid, old.title, old.abstract);
+    INSERT INTO articles_fts(rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+END;
+
+CREATE TABLE IF NOT EXISTS trials (
+    nct_id TEXT PRIMARY KEY, title TEXT, conditions TEXT, interventions TEXT, record TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS trials_fts USING fts5(
+    title, conditions, interventions, content='trials', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS trials_ai AFTER INSERT ON trials BEGIN
+    INSERT INTO trials_fts(rowid, title, conditions, interventions)
+    VALUES (new.rowid, new.title, new.conditions, new.interventions);
+END;
+CREATE TRIGGER IF NOT EXISTS trials_ad AFTER DELETE ON trials BEGIN
+    INSERT INTO trials_fts(trials_fts, rowid, title, conditions, interventions)
+    VALUES ('delete', old.rowid, old.title, old.conditions, old.interventions);
+END;
+CREATE TRIGGER IF NOT EXISTS trials_au AFTER UPDATE ON trials BEGIN
+    INSERT INTO trials_fts(trials_fts, rowid, title, conditions, interventions)
+    VALUES ('delete', old.rowid, old.title, old.conditions, old.interventions);
+    INSERT INTO trials_fts(rowid, title, conditions, interventions)
+    VALUES (new.rowid, new.title, new.conditions, new.interventions);
+END;
+
+CREATE TABLE IF NOT EXISTS ingest_files (
+    path TEXT PRIMARY KEY, kind TEXT NOT NULL, records INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0, updated_at REAL
+);
+"""
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + " ".join(term.split()).replace('"', '""') + '"'
+
+
+class LocalCorpus:
+    """Embedded PubMed/ClinicalTrials.gov store with a full-text index."""
+
+    def __init__(self, path: str = LOCAL_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run during ingestion."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Queries. Matches are returned newest-ingested first: ordering by rowid
+    # lets FTS5 stop after `limit` hits instead of ranking every match, which
+    # keeps common terms fast on multi-million-row corpora.
+
+    def search_articles(self, term: str, limit: int = 10) -> List[Dict]:
+        rows = self.connection().execute(
+            "SELECT a.record FROM articles_fts JOIN articles a ON a.rowid = articles_fts.rowid "
+            "WHERE articles_fts MATCH ? ORDER BY articles_fts.rowid DESC LIMIT ?",
+            (_fts_phrase(term), limit),
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def search_trials(self, term: str, limit: int = 20) -> List[Dict]:
+        rows = self.connection().execute(
+            "SELECT t.record FROM trials_fts JOIN trials t ON t.rowid = trials_fts.rowid "
+            "WHERE trials_fts MATCH ? ORDER BY trials_fts.rowid DESC LIMIT ?",
+            (_fts_phrase(term), limit),
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def iter_articles(self) -> Iterable[Dict]:
+        for (record,) in self.connection().execute("SELECT record FROM articles"):
+            yield json.loads(record)
+
+    def iter_trials(self) -> Iterable[Dict]:
+        for (record,) in self.connection().execute("SELECT record FROM trials"):
+            yield json.loads(record)
+
+    # Ingestion. Callers batch writes and record per-file progress in the same
+    # transaction, so an interrupted run resumes exactly where it stopped.
+
+    def add_articles(self, records: Iterable[Dict]) -> None:
+        self.connection().executemany(
+            "INSERT INTO articles (pmid, title, abstract, year, record) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(pmid) DO UPDATE SET title = excluded.title, abstract = excluded.abstract, "
+            "year = excluded.year, record = excluded.record",
+            [(r["pmid"], r.get("title", ""), r.get("abstract", ""), r.get("year"), json.dumps(r)) for r in records],
+        )
+
+    def delete_articles(self, pmids: Iterable[str]) -> None:
+        self.connection().executemany("DELETE FROM articles WHERE pmid = ?", [(p,) for p in pmids])
+
+    def add_trials(self, records: Iterable[Dict]) -> None:
+        self.connection().executemany(
+            "INSERT INTO trials (nct_id, title, conditions, interventions, record) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(nct_id) DO UPDATE SET title = excluded.title, conditions = excluded.conditions, "
+            "interventions = excluded.interventions, record = excluded.record",
+            [
+                (r["nct_id"], r.get("title", ""), " | ".join(r.get("conditions", [])),
+                 " | ".join(r.get("interventions", [])), json.dumps(r))
+                for r in records
+            ],
+        )
+
+    def file_progress(self, path: str) -> Optional[Dict]:
+        row = self.connection().execute(
+            "SELECT records, done FROM ingest_files WHERE path = ?", (path,)
+        ).fetchone()
+        return {"records": row[0], "done": bool(row[1])} if row else None
+
+    def set_file_progress(self, path: str, kind: str, records: int, done: bool = False) -> None:
+        self.connection().execute(
+            "INSERT INTO ingest_files (path, kind, records, done, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET records = excluded.records, done = excluded.done, "
+            "updated_at = excluded.updated_at",
+            (path, kind, records, int(done), time.time()),
+        )
+
+    def commit(self) -> None:
+        self.connection().commit()
+
+    def counts(self) -> Dict[str, int]:
+        conn = self.connection()
+        return {
+            "articles": conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0],
+            "trials": conn.execute("SELECT COUNT(*) FROM trials").fetchone()[0],
+        }
+
+
+_corpus: Optional[LocalCorpus] = None
+
+
+def get_corpus() -> LocalCorpus:
+    global _corpus
+    if _corpus is None:
+        _corpus = LocalCorpus(LOCAL_DB_PATH)
+    return _corpus
+
+
+async def search_local_articles(term: str, limit: int) -> List[Dict]:
+    return await asyncio.to_thread(get_corpus().search_articles, term, limit)
+
+
+async def search_local_trials(term: str, limit: int) -> List[Dict]:
+    return await asyncio.to_thread(get_corpus().search_trials, term, limit)
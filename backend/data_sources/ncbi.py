@@ -0,0 +1,174 @@
+import asyncio
+import itertools
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from data_sources.hedge import hedged
+from data_sources.http import WORKERS, UpstreamError, get_client
+from data_sources.pubmed_xml import PubmedArticleParser
+from utils.metrics import METRICS, record
+from utils.ratelimit import TokenBucket
+
+# Overridable so benchmarks and load tests can point at a stub server.
+NCBI_EUTILS_BASE = os.getenv("NCBI_EUTILS_BASE", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
+ESEARCH = f"{NCBI_EUTILS_BASE}/esearch.fcgi"
+EFETCH = f"{NCBI_EUTILS_BASE}/efetch.fcgi"
+
+NCBI_API_KEY = os.getenv("NCBI_API_KEY", "")
+# NCBI allows 3 requests/s without a key and 10 with one, per host.
+NCBI_RATE = float(os.getenv("NCBI_RATE", "10" if NCBI_API_KEY else "3")) / WORKERS
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+BATCH_WINDOW = 0.02
+MAX_BATCH = 200
+
+_RETRY = object()
+
+
+async def read_json(resp: httpx.Response) -> Dict:
+    await resp.aread()
+    return resp.json()
+
+
+async def parse_efetch(resp: httpx.Response) -> List[Dict]:
+    # Parse the efetch body as it streams in instead of buffering it whole.
+    parser = PubmedArticleParser()
+    records: List[Dict] = []
+    parsing = 0.0
+    async for chunk in resp.aiter_bytes():
+        start = time.perf_counter()
+        records.extend(parser.feed(chunk))
+        parsing += time.perf_counter() - start
+    start = time.perf_counter()
+    records.extend(parser.close())
+    record("parse_pubmed", parsing + time.perf_counter() - start)
+    return records
+
+
+class NcbiClient:
+    """E-utilities access shared by every request in the process.
+
+    All calls draw from one token bucket sized to the NCBI quota, retry 429
+    and 5xx responses and dropped connections with jittered exponential
+    backoff (honouring Retry-After), and raise UpstreamError once retries
+    are exhausted. Timeouts and refused connections are not retried.
+    efetch_ids() merges PMIDs requested by concurrent callers within
+    BATCH_WINDOW into shared efetch calls of up to MAX_BATCH IDs.
+    """
+
+    def __init__(self, api_key: str = NCBI_API_KEY, rate: float = NCBI_RATE):
+        self.api_key = api_key
+        self.bucket = TokenBucket(rate, capacity=rate)
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "failures": 0, "batched_ids": 0, "batches": 0}
+        self._waiting: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches: set = set()
+
+    def _with_key(self, params: Dict) -> Dict:
+        return dict(params, api_key=self.api_key) if self.api_key else params
+
+    async def request(self, method: str, url: str, handle: Callable[[httpx.Response], Awaitable], **kwargs):
+        """Rate-limited call; `handle` consumes the streamed response on success."""
+        if "params" in kwargs:
+            kwargs["params"] = self._with_key(kwargs["params"])
+        if "data" in kwargs:
+            kwargs["data"] = self._with_key(kwargs["data"])
+
+        async def attempt():
+            self.stats["requests"] += 1
+            async with get_client().stream(method, url, **kwargs) as resp:
+                if resp.status_code == 429 or resp.status_code >= 500:
+                    if resp.status_code == 429:
+                        self.stats["throttled"] += 1
+                    METRICS.inc("upstream_errors_total", upstream="pubmed", error=f"HTTP {resp.status_code}")
+                    return _RETRY, f"HTTP {resp.status_code}", resp.headers.get("Retry-After")
+                resp.raise_for_status()
+                return await handle(resp), "", None
+
+        reason = ""
+        for n in range(MAX_RETRIES + 1):
+            if n:
+                self.stats["retries"] += 1
+            try:
+                value, reason, retry_after = await hedged("pubmed", attempt, self.bucket)
+            except httpx.TransportError as exc:
+                # An unreachable or unresponsive host (refused connection or
+                # any timeout): retrying only multiplies the caller's wait.
+                if isinstance(exc, (httpx.ConnectError, httpx.TimeoutException)) or n == MAX_RETRIES:
+                    raise
+                value, reason, retry_after = _RETRY, exc.__class__.__name__, None
+            if value is not _RETRY:
+                return value
+            if n < MAX_RETRIES:
+                delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** n) * random.uniform(0.5, 1.5)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+        self.stats["failures"] += 1
+        raise UpstreamError(f"NCBI {url.rsplit('/', 1)[-1]} failed after {MAX_RETRIES + 1} attempts ({reason})")
+
+    async def get_json(self, url: str, params: Dict, timeout: float = 20) -> Dict:
+        return await self.request("GET", url, read_json, params=params, timeout=timeout)
+
+    async def efetch_ids(self, pmids: List[str]) -> List[Dict]:
+        """Records for `pmids` in the given order; IDs efetch did not return are skipped."""
+        if not pmids:
+            return []
+        loop = asyncio.get_running_loop()
+        futures = []
+        for pmid in pmids:
+            fut = loop.create_future()
+            self._waiting.setdefault(pmid, []).append(fut)
+            futures.append(fut)
+        if len(self._waiting) >= MAX_BATCH:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(BATCH_WINDOW, self._flush)
+        records = await asyncio.gather(*futures)
+        return [r for r in records if r is not None]
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiting:
+            batch = dict(itertools.islice(self._waiting.items(), MAX_BATCH))
+            for pmid in batch:
+                del self._waiting[pmid]
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: Dict[str, List[asyncio.Future]]) -> None:
+        self.stats["batches"] += 1
+        self.stats["batched_ids"] += len(batch)
+        try:
+            # POST keeps 200 IDs out of the URL.
+            data = {"db": "pubmed", "id": ",".join(batch), "retmode": "xml"}
+            records = await self.request("POST", EFETCH, parse_efetch, data=data, timeout=30)
+        except Exception as exc:
+            for futures in batch.values():
+                for fut in futures:
+                    if not fut.done():
+                        fut.set_exception(exc)
+            return
+        by_id = {r["pmid"]: r for r in records}
+        for pmid, futures in batch.items():
+            for fut in futures:
+                if not fut.done():
+                    fut.set_result(by_id.get(pmid))
+
+
+_ncbi: Optional[NcbiClient] = None
+
+
+def get_ncbi_client() -> NcbiClient:
+    global _ncbi
+    if _ncbi is None:
+        _ncbi = NcbiClient()
+    return _ncbi
@@ -1,13 +1,36 @@
-import requests
-from typing import Dict, Optional
+import asyncio
+import os
+from typing import Dict, List, Optional
+from urllib.parse import quote
+from data_sources.cache import cached
+from data_sources.hedge import hedged
+from data_sources.http import WORKERS, get_client
+from utils.metrics import timed
+from utils.ratelimit import TokenBucket
 
-BASE = "https://pubchem.ncbi.nlm.nih.gov/rest/pug"
+BASE = os.getenv("PUBCHEM_BASE", "https://pubchem.ncbi.nlm.nih.gov/rest/pug")
+PROPERTIES = ["MolecularFormula", "MolecularWeight", "CanonicalSMILES", "InChIKey"]
+MAX_SYNONYMS = 10
+# PubChem asks for at most 5 requests per second, per host.
+PUBCHEM_RATE = float(os.getenv("PUBCHEM_RATE", "5")) / WORKERS
+_bucket = TokenBucket(PUBCHEM_RATE, capacity=PUBCHEM_RATE)
 
 
-def fetch_drug_info(name: str) -> Optional[Dict]:
+async def _get(path: str):
+    return await hedged("pubchem", lambda: get_client().get(f"{BASE}/{path}", timeout=20), _bucket)
+
+
+async def _post_cids(path: str, cids: List[int]):
+    data = {"cid": ",".join(str(c) for c in cids)}
+    return await hedged("pubchem", lambda: get_client().post(f"{BASE}/{path}", data=data, timeout=20), _bucket)
+
+
+@timed("fetch_pubchem")
+@cached("pubchem")
+async def fetch_drug_info(name: str) -> Optional[Dict]:
     try:
         # Get CID
-        r = requests.get(f"{BASE}/compound/name/{name}/cids/JSON", timeout=20)
+        r = await _get(f"compound/name/{name}/cids/JSON")
         if r.status_code != 200:
             return None
         cids = r.json().get("IdentifierList", {}).get("CID", [])
@@ -15,10 +38,123 @@ def fetch_drug_info(name: str) -> Optional[Dict]:
             return None
         cid = cids[0]
         # Get summary
-        s = requests.get(f"{BASE}/compound/cid/{cid}/JSON", timeout=20)
+        s = await _get(f"compound/cid/{cid}/JSON")
         s.raise_for_status()
         data = s.json()
         props = data.get("PC_Compounds", [{}])[0]
         return {"cid": cid, "raw": props}
     except Exception:
         return None
+
+
+def _summary(props: Dict, synonyms: List[str]) -> Dict:
+    return {
+        "cid": props.get("CID"),
+        "formula": props.get("MolecularFormula", ""),
+        "molecular_weight": float(props.get("MolecularWeight") or 0) or None,
+        # PubChem has been renaming its SMILES properties; accept either spelling.
+        "smiles": props.get("CanonicalSMILES") or props.get("ConnectivitySMILES") or props.get("SMILES", ""),
+        "inchikey": props.get("InChIKey", ""),
+        "synonyms": synonyms[:MAX_SYNONYMS],
+    }
+
+
+def _synonym_map(payload: Dict) -> Dict[int, List[str]]:
+    info = payload.get("InformationList", {}).get("Information", [])
+    return {i.get("CID"): i.get("Synonym", []) for i in info}
+
+
+@cached("pubchem_cid")
+async def resolve_cid(name: str) -> Optional[int]:
+    """Name -> CID. PubChem's name input takes one name per request, so these cannot be batched."""
+    try:
+        r = await _get(f"compound/name/{quote(name, safe='')}/cids/JSON")
+        if r.status_code != 200:
+            return None
+        cids = r.json().get("IdentifierList", {}).get("CID", [])
+        return cids[0] if cids else None
+    except Exception:
+        return None
+
+
+async def fetch_properties(cids: List[int]) -> Dict[int, Dict]:
+    """Property summaries for many CIDs: one POST each to the property and synonym endpoints, sent in parallel."""
+    cids = list(dict.fromkeys(c for c in cids if c))
+    if not cids:
+        return {}
+    props_r, syn_r = await asyncio.gather(
+        _post_cids(f"compound/cid/property/{','.join(PROPERTIES)}/JSON", cids),
+        _post_cids("compound/cid/synonyms/JSON", cids),
+    )
+    props_r.raise_for_status()
+    synonyms = _synonym_map(syn_r.json()) if syn_r.status_code == 200 else {}
+    rows = props_r.json().get("PropertyTable", {}).get("Properties", [])
+    return {p["CID"]: _summary(p, synonyms.get(p["CID"], [])) for p in rows if "CID" in p}
+
+
+@timed("fetch_pubchem")
+@cached("pubchem_props")
+async def fetch_drug_summary(name: str) -> Optional[Dict]:
+    """Formula, molecular weight, SMILES, InChIKey and top synonyms for `name` in one round trip.
+
+    With the CID already cached the properties are fetched by CID;
+    otherwise the property and synonym endpoints are queried by name in
+    parallel and the CID they report is cached for later batch calls.
+    """
+    try:
+        cid = resolve_cid.peek(name)
+        if cid:
+            return (await fetch_properties([cid])).get(cid)
+        encoded = quote(name, safe="")
+        props_r, syn_r = await asyncio.gather(
+            _get(f"compound/name/{encoded}/property/{','.join(PROPERTIES)}/JSON"),
+            _get(f"compound/name/{encoded}/synonyms/JSON"),
+        )
+        if props_r.status_code != 200:
+            return None
+        rows = props_r.json().get("PropertyTable", {}).get("Properties", [])
+        if not rows:
+            return None
+        synonyms = _synonym_map(syn_r.json()) if syn_r.status_code == 200 else {}
+        summary = _summary(rows[0], synonyms.get(rows[0].get("CID"), []))
+        resolve_cid.prime(summary["cid"], name)
+        return summary
+    except Exception:
+        return None
+
+
+async def fetch_drug_summaries(names: List[str]) -> Dict[str, Optional[Dict]]:
+    """fetch_drug_summary() for many names.
+
+    Cached summaries are served directly. Names with a cached CID share one
+    batched POST by CID; the rest are looked up by name concurrently (within
+    the PubChem rate limit).
+    """
+    results: Dict[str, Optional[Dict]] = {}
+    by_cid: Dict[str, int] = {}
+    by_name: List[str] = []
+    for name in dict.fromkeys(names):
+        summary = fetch_drug_summary.peek(name)
+        if summary is not None:
+            results[name] = summary
+            continue
+        cid = resolve_cid.peek(name)
+        if cid:
+            by_cid[name] = cid
+        else:
+            by_name.append(name)
+
+    async def batch() -> None:
+        try:
+            props = await fetch_properties(list(by_cid.values()))
+        except Exception:
+            props = {}
+        for name, cid in by_cid.items():
+            results[name] = props.get(cid)
+            fetch_drug_summary.prime(results[name], name)
+
+    async def single(name: str) -> None:
+        results[name] = await fetch_drug_summary(name)
+
+    await asyncio.gather(batch(), *(single(n) for n in by_name))
+    return {name: results.get(name) for name in names}
@@ -1,47 +1,98 @@
-import requests
-from typing import List, Dict
+import asyncio
+from collections import deque
+from typing import AsyncIterator, List, Dict, Optional
+from data_sources.cache import cached
+from data_sources.http import UpstreamError
+from data_sources.local import DATA_BACKEND, search_local_articles
+from data_sources.ncbi import EFETCH, ESEARCH, get_ncbi_client, parse_efetch
+from utils.metrics import timed
 
-ESEARCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-EFETCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+PAGE_SIZE = 200
+MAX_PARALLEL_PAGES = 3
 
 
-def fetch_pubmed_abstracts(drug: str, retmax: int = 10) -> List[Dict]:
-    params = {"db": "pubmed", "term": drug, "retmode": "json", "retmax": retmax}
+async def _fetch_page(history: Dict, retstart: int, retmax: int) -> List[Dict]:
+    fetch_params = {
+        "db": "pubmed",
+        "WebEnv": history["webenv"],
+        "query_key": history["querykey"],
+        "retstart": retstart,
+        "retmax": retmax,
+        "retmode": "xml",
+    }
+    return await get_ncbi_client().request("GET", EFETCH, parse_efetch, params=fetch_params, timeout=30)
+
+
+async def search_pmids(term: str, retmax: int, since: Optional[str] = None, retstart: int = 0) -> List[str]:
+    """PMIDs matching `term`; with `since` (YYYY/MM/DD) only those added to PubMed on or after that day."""
+    params = {"db": "pubmed", "term": term, "retmode": "json", "retmax": retmax}
+    if retstart:
+        params["retstart"] = retstart
+    if since:
+        params.update(datetype="edat", mindate=since, maxdate="3000")
+    result = await get_ncbi_client().get_json(ESEARCH, params)
+    return result.get("esearchresult", {}).get("idlist", [])
+
+
+async def fetch_pmids(pmids: List[str]) -> List[Dict]:
+    return await get_ncbi_client().efetch_ids(pmids)
+
+
+async def iter_pubmed_abstracts(term: str, max_records: int = 10) -> AsyncIterator[Dict]:
+    """Yield PubMed records for `term` in search order.
+
+    Searches of up to PAGE_SIZE records fetch their PMIDs through the shared
+    NCBI client, which merges them with concurrent requests into batched
+    efetch calls. Larger ones page efetch through the NCBI history server
+    with up to MAX_PARALLEL_PAGES pages in flight.
+    """
+    ncbi = get_ncbi_client()
+    if max_records <= PAGE_SIZE:
+        for record in await ncbi.efetch_ids(await search_pmids(term, max_records)):
+            yield record
+        return
+
+    params = {"db": "pubmed", "term": term, "retmode": "json", "retmax": 0, "usehistory": "y"}
+    history = (await ncbi.get_json(ESEARCH, params)).get("esearchresult", {})
+    total = min(int(history.get("count", 0)), max_records)
+    if not total or not history.get("webenv"):
+        return
+
+    starts = iter(range(0, total, PAGE_SIZE))
+    pending: deque = deque()
+
+    def schedule() -> None:
+        start = next(starts, None)
+        if start is not None:
+            pending.append(asyncio.ensure_future(_fetch_page(history, start, min(PAGE_SIZE, total - start))))
+
+    try:
+        for _ in range(MAX_PARALLEL_PAGES):
+            schedule()
+        while pending:
+            page = await pending.popleft()
+            schedule()
+            for record in page:
+                yield record
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+@cached("pubmed")
+async def _fetch_pubmed_live(drug: str, retmax: int = 10) -> List[Dict]:
     try:
-        ids_resp = requests.get(ESEARCH, params=params, timeout=20)
-        ids_resp.raise_for_status()
-        idlist = ids_resp.json().get("esearchresult", {}).get("idlist", [])
-        if not idlist:
-            return []
-        ids = ",".join(idlist)
-        fetch_params = {"db": "pubmed", "id": ids, "retmode": "xml"}
-        data = requests.get(EFETCH, params=fetch_params, timeout=30)
-        data.raise_for_status()
-        # Simple XML parsing by string ops to keep dependencies low
-        xml = data.text
-        results: List[Dict] = []
-        for pmid in idlist:
-            # Extract title
-            title_tag = f"<ArticleId IdType=\"pubmed\">{pmid}</ArticleId>"
-            idx = xml.find(title_tag)
-            if idx == -1:
-                continue
-            # Backtrack to ArticleTitle and AbstractText nearest before this id occurrence
-            at_start = xml.rfind("<ArticleTitle>", 0, idx)
-            at_end = xml.find("</ArticleTitle>", at_start)
-            title = xml[at_start + 14:at_end] if at_start != -1 and at_end != -1 else ""
-            ab_start = xml.rfind("<Abstract>", 0, idx)
-            ab_end = xml.find("</Abstract>", ab_start)
-            abstract = xml[ab_start:ab_end] if ab_start != -1 and ab_end != -1 else ""
-            # Strip tags from abstract
-            abstract = abstract.replace("<Abstract>", "").replace("</Abstract>", "")
-            abstract = abstract.replace("<AbstractText>", "").replace("</AbstractText>", "")
-            results.append({
-                "pmid": pmid,
-                "title": title,
-                "abstract": abstract,
-                "source_id": f"PMID:{pmid}"
-            })
-        return results
+        return [record async for record in iter_pubmed_abstracts(drug, retmax)]
+    except UpstreamError:
+        # Throttled past our retries: surface it instead of an empty result
+        # that would silently trigger the demo fallback.
+        raise
     except Exception:
         return []
+
+
+@timed("fetch_pubmed")
+async def fetch_pubmed_abstracts(drug: str, retmax: int = 10) -> List[Dict]:
+    if DATA_BACKEND == "local":
+        return await search_local_articles(drug, retmax)
+    return await _fetch_pubmed_live(drug, retmax)
@@ -0,0 +1,94 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+from xml.etree.ElementTree import Element, XMLPullParser
+
+_YEAR = re.compile(r"\d{4}")
+
+
+def _text(elem: Optional[Element]) -> str:
+    # itertext() keeps inline markup such as <i> or <sup> in titles.
+    return "".join(elem.itertext()).strip() if elem is not None else ""
+
+
+def _year(article: Element) -> Optional[int]:
+    for path in ("Journal/JournalIssue/PubDate/Year", "Journal/JournalIssue/PubDate/MedlineDate", "ArticleDate/Year"):
+        m = _YEAR.search(_text(article.find(path)))
+        if m:
+            return int(m.group())
+    return None
+
+
+def parse_article(elem: Element) -> Dict:
+    """Turn one <PubmedArticle> element into the record shape used across the app."""
+    citation = elem.find("MedlineCitation")
+    if citation is None:
+        citation = Element("MedlineCitation")
+    article = citation.find("Article")
+    if article is None:
+        article = Element("Article")
+    pmid = _text(citation.find("PMID"))
+
+    sections = []
+    for at in article.iterfind("Abstract/AbstractText"):
+        text = _text(at)
+        if text:
+            sections.append({"label": at.get("Label", ""), "text": text})
+    abstract = "\n".join(f"{s['label']}: {s['text']}" if s["label"] else s["text"] for s in sections)
+
+    return {
+        "pmid": pmid,
+        "title": _text(article.find("ArticleTitle")),
+        "abstract": abstract,
+        "abstract_sections": sections,
+        "year": _year(article),
+        "mesh_terms": [_text(d) for d in citation.iterfind("MeshHeadingList/MeshHeading/DescriptorName")],
+        "publication_types": [_text(p) for p in article.iterfind("PublicationTypeList/PublicationType")],
+        "source_id": f"PMID:{pmid}",
+    }
+
+
+class PubmedArticleParser:
+    """Incremental efetch XML parser.
+
+    Feed raw byte chunks as they arrive; each call returns the articles
+    completed so far. Finished elements are dropped from the tree, so memory
+    stays bounded by one article regardless of how many are streamed.
+    PMIDs listed in <DeleteCitation> (PubMed update files) are collected in
+    `deleted`.
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._root: Optional[Element] = None
+        self.deleted: List[str] = []
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Dict]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[Dict]:
+        records: List[Dict] = []
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                continue
+            if elem.tag == "PubmedArticle":
+                records.append(parse_article(elem))
+            elif elem.tag == "DeleteCitation":
+                self.deleted.extend(_text(p) for p in elem.iterfind("PMID"))
+            if elem.tag in ("PubmedArticle", "PubmedBookArticle", "DeleteCitation") and self._root is not None:
+                self._root.clear()
+        return records
+
+
+def iter_articles(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """Parse a synchronous stream of chunks, e.g. a file read in blocks."""
+    parser = PubmedArticleParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
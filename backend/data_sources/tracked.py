@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from data_sources.pubmed import fetch_pmids, search_pmids
+from data_sources.trials import iter_trials
+from utils.db import connect
+
+TRACKED_DB_PATH = os.getenv(
+    "TRACKED_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".data", "tracked.sqlite3"),
+)
+# Upper bound on new PubMed records fetched in one refresh; the rest are
+# fetched by the next refresh.
+DELTA_MAX_RECORDS = int(os.getenv("DELTA_MAX_RECORDS", "1000"))
+# PMIDs per esearch page when listing everything added since the last sync.
+ID_PAGE_SIZE = 10000
+# Both upstream date filters have day granularity; re-reading the previous
+# day catches records added after the last sync on the same day.
+OVERLAP_SECONDS = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracked (
+    term TEXT PRIMARY KEY, kind TEXT NOT NULL, max_records INTEGER NOT NULL,
+    created_at REAL NOT NULL, last_sync REAL
+);
+CREATE TABLE IF NOT EXISTS tracked_records (
+    term TEXT NOT NULL, source TEXT NOT NULL, source_id TEXT NOT NULL,
+    record TEXT NOT NULL, updated_at REAL NOT NULL,
+    PRIMARY KEY (term, source, source_id)
+);
+CREATE INDEX IF NOT EXISTS tracked_records_updated ON tracked_records (term, updated_at);
+"""
+
+
+def _term_key(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+class TrackedStore:
+    """Evidence records accumulated per tracked drug/condition, with the last sync time.
+
+    Calls are blocking (with the full SQLite busy timeout); async code runs
+    them through asyncio.to_thread.
+    """
+
+    def __init__(self, path: str = TRACKED_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def track(self, term: str, kind: str, max_records: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO tracked (term, kind, max_records, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(term) DO UPDATE SET kind = excluded.kind, max_records = excluded.max_records",
+                (_term_key(term), kind, max_records, time.time()),
+            )
+            self._conn.commit()
+
+    def untrack(self, term: str) -> bool:
+        key = _term_key(term)
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM tracked WHERE term = ?", (key,)).rowcount
+            self._conn.execute("DELETE FROM tracked_records WHERE term = ?", (key,))
+            self._conn.commit()
+        return bool(deleted)
+
+    def get(self, term: str) -> Optional[Dict]:
+        """The tracked entry; its `revision` changes whenever records are merged."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT term, kind, max_records, created_at, last_sync, "
+                "(SELECT MAX(updated_at) FROM tracked_records r WHERE r.term = tracked.term) "
+                "FROM tracked WHERE term = ?",
+                (_term_key(term),),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(self._row(row), revision=row[5])
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT term, kind, max_records, created_at, last_sync FROM tracked ORDER BY term"
+            ).fetchall()
+            counts = dict(
+                ((t, s), n) for t, s, n in self._conn.execute(
+                    "SELECT term, source, COUNT(*) FROM tracked_records GROUP BY term, source"
+                )
+            )
+        out = []
+        for row in rows:
+            item = self._row(row)
+            item["articles"] = counts.get((item["term"], "pubmed"), 0)
+            item["trials"] = counts.get((item["term"], "trials"), 0)
+            out.append(item)
+        return out
+
+    @staticmethod
+    def _row(row: Tuple) -> Dict:
+        return {"term": row[0], "kind": row[1], "max_records": row[2], "created_at": row[3], "last_sync": row[4]}
+
+    def known_ids(self, term: str, source: str) -> set:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source_id FROM tracked_records WHERE term = ? AND source = ?", (_term_key(term), source)
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def merge(self, term: str, articles: List[Dict], trials: List[Dict], synced_at: float, complete: bool = True) -> None:
+        """Upsert fetched records (trials are replaced by their newer version).
+
+        The sync time only advances when the delta is `complete`, so records
+        left for a later refresh are still inside its date window.
+        """
+        key = _term_key(term)
+        rows = [(key, "pubmed", a["pmid"], json.dumps(a), synced_at) for a in articles if a.get("pmid")]
+        rows += [(key, "trials", t["nct_id"], json.dumps(t), synced_at) for t in trials if t.get("nct_id")]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO tracked_records (term, source, source_id, record, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(term, source, source_id) DO UPDATE SET record = excluded.record, "
+                "updated_at = excluded.updated_at",
+                rows,
+            )
+            if complete:
+                self._conn.execute("UPDATE tracked SET last_sync = ? WHERE term = ?", (synced_at, key))
+            self._conn.commit()
+
+    def records(self, term: str) -> Tuple[List[Dict], List[Dict]]:
+        """Stored (abstracts, trials) for `term`, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, record FROM tracked_records WHERE term = ? ORDER BY updated_at DESC, rowid DESC",
+                (_term_key(term),),
+            ).fetchall()
+        abstracts = [json.loads(r) for s, r in rows if s == "pubmed"]
+        trials = [json.loads(r) for s, r in rows if s == "trials"]
+        return abstracts, trials
+
+
+_store: Optional[TrackedStore] = None
+
+
+def get_tracked_store() -> TrackedStore:
+    global _store
+    if _store is None:
+        _store = TrackedStore(TRACKED_DB_PATH)
+    return _store
+
+
+async def refresh_tracked(term: str) -> Dict:
+    """Fetch what is new for a tracked term since its last sync and merge it into the store.
+
+    The first sync pulls the newest `max_records` per source. Later ones
+    list the PMIDs added since the last sync (entrez date) and efetch only
+    those not stored yet, at most DELTA_MAX_RECORDS per refresh, and page
+    through every ClinicalTrials.gov study updated since then, so the cost
+    follows the number of new or changed records rather than the size of
+    the history. When PubMed records are left over the response says
+    `truncated` and the sync time stays put, so the next refresh fetches
+    them.
+    """
+    store = get_tracked_store()
+    entry = await asyncio.to_thread(store.get, term)
+    if entry is None:
+        raise KeyError(term)
+    started = time.time()
+    since = entry["last_sync"] - OVERLAP_SECONDS if entry["last_sync"] else None
+    pending = 0
+
+    async def new_pmids() -> List[str]:
+        if since is None:
+            return await search_pmids(term, entry["max_records"])
+        day = time.strftime("%Y/%m/%d", time.gmtime(since))
+        pmids: List[str] = []
+        while True:
+            page = await search_pmids(term, ID_PAGE_SIZE, day, retstart=len(pmids))
+            pmids += page
+            if len(page) < ID_PAGE_SIZE:
+                return pmids
+
+    async def new_articles() -> List[Dict]:
+        nonlocal pending
+        known = await asyncio.to_thread(store.known_ids, term, "pubmed")
+        unknown = [p for p in dict.fromkeys(await new_pmids()) if p not in known]
+        pending = max(len(unknown) - DELTA_MAX_RECORDS, 0)
+        return await fetch_pmids(unknown[:DELTA_MAX_RECORDS])
+
+    async def changed_trials() -> List[Dict]:
+        if since is None:
+            return [t async for t in iter_trials(term, entry["max_records"])]
+        day = time.strftime("%Y-%m-%d", time.gmtime(since))
+        return [t async for t in iter_trials(term, sys.maxsize, day)]
+
+    articles, trials = await asyncio.gather(new_articles(), changed_trials())
+    await asyncio.to_thread(store.merge, term, articles, trials, started, complete=not pending)
+    return {
+        "term": entry["term"],
+        "kind": entry["kind"],
+        "full_sync": since is None,
+        "new_articles": len(articles),
+        "updated_trials": len(trials),
+        "truncated": bool(pending),
+        "pending_articles": pending,
+        "last_sync": started if not pending else entry["last_sync"],
+    }
+
+
+async def refresh_all_tracked() -> List[Dict]:
+    """refresh_tracked() for every tracked term; one failure does not stop the rest."""
+    results = []
+    for entry in await asyncio.to_thread(get_tracked_store().list):
+        try:
+            results.append(await refresh_tracked(entry["term"]))
+        except Exception as exc:
+            results.append({"term": entry["term"], "error": str(exc) or exc.__class__.__name__})
+    return results
@@ -1,7 +1,13 @@
-import requests
-from typing import List, Dict
+import asyncio
+import os
+from typing import AsyncIterator, List, Dict, Optional
+from data_sources.cache import cached
+from data_sources.hedge import hedged
+from data_sources.http import get_client
+from data_sources.local import DATA_BACKEND, search_local_trials
+from utils.metrics import stage, timed
 
-BASE = "https://clinicaltrials.gov/api/query/study_fields"
+BASE = os.getenv("CTGOV_BASE", "https://clinicaltrials.gov/api/v2/studies")
 FIELDS = [
     "NCTId",
     "BriefTitle",
@@ -13,35 +19,89 @@ FIELDS = [
     "StartDate",
     "CompletionDate",
 ]
+PAGE_SIZE = 500
 
 
-def fetch_trials(drug: str, max_records: int = 20) -> List[Dict]:
+def _format_phase(phase: str) -> str:
+    if phase == "NA":
+        return "Not Applicable"
+    return phase.replace("EARLY_PHASE", "Early Phase ").replace("PHASE", "Phase ").strip()
+
+
+def parse_study(s: Dict) -> Dict:
+    """Flatten a ClinicalTrials.gov v2 study into the trial record shape used across the app."""
+    p = s.get("protocolSection", {})
+    ident = p.get("identificationModule", {})
+    status = p.get("statusModule", {})
+    interventions = p.get("armsInterventionsModule", {}).get("interventions", [])
+    nct_id = ident.get("nctId", "")
+    return {
+        "nct_id": nct_id,
+        "title": ident.get("briefTitle", ""),
+        "conditions": p.get("conditionsModule", {}).get("conditions", []),
+        "interventions": [i.get("name", "") for i in interventions],
+        "intervention_types": [i.get("type", "") for i in interventions],
+        "phase": "/".join(_format_phase(ph) for ph in p.get("designModule", {}).get("phases", [])),
+        "status": status.get("overallStatus", "").replace("_", " ").capitalize(),
+        "start_date": status.get("startDateStruct", {}).get("date", ""),
+        "completion_date": status.get("completionDateStruct", {}).get("date", ""),
+        "source_id": f"NCT:{nct_id}"
+    }
+
+
+async def _fetch_page(drug: str, page_size: int, token: Optional[str], since: Optional[str] = None) -> Dict:
     params = {
-        "expr": drug,
+        "query.term": drug,
         "fields": ",".join(FIELDS),
-        "min_rnk": 1,
-        "max_rnk": max_records,
-        "fmt": "json",
+        "pageSize": page_size,
+        "format": "json",
     }
+    if token:
+        params["pageToken"] = token
+    if since:
+        params["filter.advanced"] = f"AREA[LastUpdatePostDate]RANGE[{since},MAX]"
+    r = await hedged("trials", lambda: get_client().get(BASE, params=params, timeout=30))
+    r.raise_for_status()
+    with stage("parse_trials"):
+        return r.json()
+
+
+async def iter_trials(drug: str, max_records: int = 20, since: Optional[str] = None) -> AsyncIterator[Dict]:
+    """Yield trials for `drug`, following ClinicalTrials.gov page tokens.
+
+    Page tokens make paging sequential, so the next page is requested while
+    the current one is being consumed. With `since` (YYYY-MM-DD) only
+    studies whose record was last updated on or after that day are returned.
+    """
+    remaining = max_records
+    page = await _fetch_page(drug, min(PAGE_SIZE, remaining), None, since)
+    while page is not None:
+        studies = page.get("studies", [])[:remaining]
+        remaining -= len(studies)
+        token = page.get("nextPageToken")
+        next_page = None
+        if token and remaining > 0:
+            next_page = asyncio.ensure_future(_fetch_page(drug, min(PAGE_SIZE, remaining), token, since))
+        try:
+            for s in studies:
+                yield parse_study(s)
+        except BaseException:
+            if next_page is not None:
+                next_page.cancel()
+            raise
+        page = await next_page if next_page is not None else None
+
+
+@cached("trials")
+async def _fetch_trials_live(drug: str, max_records: int = 20) -> List[Dict]:
     try:
-        r = requests.get(BASE, params=params, timeout=30)
-        r.raise_for_status()
-        data = r.json()
-        studies = data.get("StudyFieldsResponse", {}).get("StudyFields", [])
-        results: List[Dict] = []
-        for s in studies:
-            results.append({
-                "nct_id": (s.get("NCTId") or [""])[0],
-                "title": (s.get("BriefTitle") or [""])[0],
-                "conditions": s.get("Condition") or [],
-                "interventions": s.get("InterventionName") or [],
-                "intervention_types": s.get("InterventionType") or [],
-                "phase": (s.get("Phase") or [""])[0],
-                "status": (s.get("OverallStatus") or [""])[0],
-                "start_date": (s.get("StartDate") or [""])[0],
-                "completion_date": (s.get("CompletionDate") or [""])[0],
-                "source_id": f"NCT:{(s.get('NCTId') or [''])[0]}"
-            })
-        return results
+        return [trial async for trial in iter_trials(drug, max_records)]
     except Exception:
         return []
+
+
+@timed("fetch_trials")
+async def fetch_trials(drug: str, max_records: int = 20) -> List[Dict]:
+    if DATA_BACKEND == "local":
+        return await search_local_trials(drug, max_records)
+    return await _fetch_trials_live(drug, max_records)
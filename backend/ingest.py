@@ -0,0 +1,137 @@
+"""Load PubMed and ClinicalTrials.gov bulk dumps into the local corpus.
+
+    python ingest.py pubmed pubmed24n0001.xml.gz pubmed24n0002.xml.gz ...
+    python ingest.py trials ctg-studies.json.zip
+
+PubMed baseline/update files (.xml or .xml.gz) are stream-parsed; update
+files may also delete citations. Trial dumps may be a ClinicalTrials.gov
+zip of per-study JSON files, a directory of those files, a JSON-lines
+file, or a JSON document holding one study, a list or {"studies": [...]}.
+
+Progress is committed every --batch records together with the record
+count per file, so re-running the same command resumes an interrupted
+file and skips finished ones. Set LOCAL_DB_PATH to choose the database,
+then serve from it with DATA_BACKEND=local.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import zipfile
+from typing import Dict, Iterator, List
+
+from data_sources.local import LocalCorpus, LOCAL_DB_PATH
+from data_sources.pubmed_xml import PubmedArticleParser
+from data_sources.trials import parse_study
+
+CHUNK = 1 << 20
+
+
+def _iter_pubmed_file(path: str, parser: PubmedArticleParser) -> Iterator[Dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as fh:
+        while True:
+            chunk = fh.read(CHUNK)
+            if not chunk:
+                break
+            yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def _studies_from_json(doc) -> List[Dict]:
+    if isinstance(doc, list):
+        return doc
+    if "studies" in doc:
+        return doc["studies"]
+    return [doc]
+
+
+def _iter_trials_file(path: str) -> Iterator[Dict]:
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".json"):
+                with open(os.path.join(path, name), encoding="utf-8") as fh:
+                    yield from _studies_from_json(json.load(fh))
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for name in sorted(zf.namelist()):
+                if name.endswith(".json"):
+                    yield from _studies_from_json(json.loads(zf.read(name)))
+    elif path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding="utf-8") as fh:
+            yield from _studies_from_json(json.load(fh))
+
+
+def ingest_pubmed(corpus: LocalCorpus, path: str, batch: int) -> int:
+    key = os.path.abspath(path)
+    progress = corpus.file_progress(key) or {"records": 0, "done": False}
+    if progress["done"]:
+        return 0
+    skip, count, buf = progress["records"], 0, []
+    parser = PubmedArticleParser()
+    for record in _iter_pubmed_file(path, parser):
+        count += 1
+        if count <= skip:
+            continue
+        buf.append(record)
+        if len(buf) >= batch:
+            corpus.add_articles(buf)
+            corpus.set_file_progress(key, "pubmed", count)
+            corpus.commit()
+            buf = []
+    corpus.add_articles(buf)
+    corpus.delete_articles(parser.deleted)
+    corpus.set_file_progress(key, "pubmed", count, done=True)
+    corpus.commit()
+    return count - skip
+
+
+def ingest_trials(corpus: LocalCorpus, path: str, batch: int) -> int:
+    key = os.path.abspath(path)
+    progress = corpus.file_progress(key) or {"records": 0, "done": False}
+    if progress["done"]:
+        return 0
+    skip, count, buf = progress["records"], 0, []
+    for study in _iter_trials_file(path):
+        count += 1
+        if count <= skip:
+            continue
+        record = parse_study(study)
+        if record["nct_id"]:
+            buf.append(record)
+        if len(buf) >= batch:
+            corpus.add_trials(buf)
+            corpus.set_file_progress(key, "trials", count)
+            corpus.commit()
+            buf = []
+    corpus.add_trials(buf)
+    corpus.set_file_progress(key, "trials", count, done=True)
+    corpus.commit()
+    return count - skip
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("kind", choices=["pubmed", "trials"])
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--db", default=LOCAL_DB_PATH)
+    ap.add_argument("--batch", type=int, default=1000)
+    args = ap.parse_args(argv)
+
+    corpus = LocalCorpus(args.db)
+    ingest = ingest_pubmed if args.kind == "pubmed" else ingest_trials
+    for path in args.paths:
+        n = ingest(corpus, path, args.batch)
+        print(f"{path}: {n} records ingested", file=sys.stderr)
+    print(json.dumps(corpus.counts()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
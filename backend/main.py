@@ -1,9 +1,26 @@
+import argparse
+import asyncio
+import os
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from api.routes import router
+from api.compress import CompressionMiddleware
+from api.instrument import InstrumentMiddleware
+from api.responses import FastJSONResponse
+from api.warmer import WARMER_ENABLED, get_warmer
+from data_sources.http import UpstreamError, close_client
+from nlp.lexicon import get_drug_lexicon
+from nlp.matcher import get_disease_matcher
+from utils.demo_data import get_demo_index
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+# Seconds in-flight requests get to finish on shutdown.
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
 
-app = FastAPI(title="Drug Repurposing API", version="0.1.0")
+app = FastAPI(title="Drug Repurposing API", version="0.1.0", default_response_class=FastJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -11,7 +28,61 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(InstrumentMiddleware)
+app.add_middleware(CompressionMiddleware)
 app.include_router(router, prefix="/api")
 
+
+@app.exception_handler(UpstreamError)
+async def upstream_error(request: Request, exc: UpstreamError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+
+@app.on_event("startup")
+async def startup():
+    # Build the vocabularies and demo index before taking traffic rather than on the first request.
+    await asyncio.gather(
+        asyncio.to_thread(get_disease_matcher), asyncio.to_thread(get_drug_lexicon), asyncio.to_thread(get_demo_index)
+    )
+    if WARMER_ENABLED:
+        get_warmer().start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if WARMER_ENABLED:
+        await get_warmer().stop()
+    await close_client()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Run the API. One process with auto-reload by default; "
+                                             "--workers N runs N processes for production.")
+    ap.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    ap.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    ap.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", "1")))
+    ap.add_argument("--reload", action=argparse.BooleanOptionalAction, default=None,
+                    help="restart on code changes (default: on with one worker)")
+    ap.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    args = ap.parse_args()
+    reload = args.workers == 1 if args.reload is None else args.reload
+    if reload and args.workers > 1:
+        ap.error("--reload cannot be combined with --workers > 1")
+    # Worker processes inherit these: upstream quotas are split between them
+    # and computed results go to a cache they all read.
+    os.environ["WORKERS"] = str(args.workers)
+    if args.workers > 1:
+        os.environ.setdefault("RESULT_CACHE_PATH", os.path.join(BACKEND_DIR, ".cache", "results.sqlite3"))
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        reload=reload,
+        workers=args.workers if args.workers > 1 else None,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+    )
+
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    main()
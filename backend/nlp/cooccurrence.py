@@ -0,0 +1,216 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from nlp.extract import extract_diseases, extract_drugs
+from nlp.lexicon import get_drug_lexicon
+from nlp.matcher import get_disease_matcher
+from utils.scoring import confidence, phase_rank
+
+COOCCURRENCE_PATH = os.getenv(
+    "COOCCURRENCE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".data", "cooccurrence"),
+)
+
+# Columns of the per-pair count matrix.
+TRIALS, LITS, PHASE1, PHASE2, PHASE3 = range(5)
+
+
+def build_cooccurrence(articles: Iterable[Dict], trials: Iterable[Dict], out_dir: str = COOCCURRENCE_PATH) -> Dict[str, int]:
+    """Run the live extractors over a whole corpus and save a sparse drug x disease matrix.
+
+    Every trial and article is passed through extract_drugs/extract_diseases
+    on its own; each (drug, disease) pair they share gets trial, literature
+    and per-phase counts plus a posting list of source IDs. The result is
+    written as .npy arrays (CSR by drug, CSC by disease sharing the same
+    pair rows) that CooccurrenceIndex memory-maps.
+    """
+    drug_ids: Dict[str, int] = {}
+    disease_ids: Dict[str, int] = {}
+    source_ids: Dict[str, int] = {}
+    pair_rows: Dict[tuple, int] = {}
+    counts: List[List[int]] = []
+    postings: List[List[int]] = []
+
+    def add(drugs, diseases, source_id: str, column: int, rank: int) -> None:
+        src = source_ids.setdefault(source_id, len(source_ids))
+        for drug in drugs:
+            d = drug_ids.setdefault(drug, len(drug_ids))
+            for disease in diseases:
+                c = disease_ids.setdefault(disease, len(disease_ids))
+                row = pair_rows.get((d, c))
+                if row is None:
+                    row = pair_rows[(d, c)] = len(counts)
+                    counts.append([0, 0, 0, 0, 0])
+                    postings.append([])
+                counts[row][column] += 1
+                if rank:
+                    counts[row][PHASE1 + rank - 1] += 1
+                postings[row].append(src)
+
+    for t in trials:
+        drugs = extract_drugs([], [t])
+        diseases = extract_diseases([], [t])
+        if drugs and diseases:
+            add(drugs, diseases, t.get("source_id", ""), TRIALS, phase_rank(t.get("phase", "")))
+    for a in articles:
+        diseases = extract_diseases([a], [])
+        if not diseases:
+            continue
+        drugs = extract_drugs([a], [])
+        if drugs:
+            add(drugs, diseases, a.get("source_id", ""), LITS, 0)
+
+    # Order pair rows by (drug, disease) for the CSR view...
+    keys = np.array(list(pair_rows.keys()), dtype=np.int64).reshape(-1, 2)
+    rows = np.array(list(pair_rows.values()), dtype=np.int64)
+    order = np.lexsort((keys[:, 1], keys[:, 0])) if len(keys) else np.zeros(0, dtype=np.int64)
+    rows, keys = rows[order], keys[order]
+    n_drugs, n_diseases = len(drug_ids), len(disease_ids)
+    indptr = np.zeros(n_drugs + 1, dtype=np.int64)
+    np.add.at(indptr, keys[:, 0] + 1, 1)
+    indptr = np.cumsum(indptr)
+    count_arr = np.array(counts, dtype=np.int32).reshape(-1, 5)[rows]
+    post_lists = [postings[r] for r in rows]
+    post_ptr = np.zeros(len(post_lists) + 1, dtype=np.int64)
+    post_ptr[1:] = np.cumsum([len(p) for p in post_lists])
+    post_ids = np.fromiter((s for p in post_lists for s in p), dtype=np.int32, count=int(post_ptr[-1]))
+
+    # ...and a CSC view by disease that points back into the same rows.
+    col_order = np.lexsort((keys[:, 0], keys[:, 1])) if len(keys) else np.zeros(0, dtype=np.int64)
+    col_indptr = np.zeros(n_diseases + 1, dtype=np.int64)
+    np.add.at(col_indptr, keys[col_order, 1] + 1, 1)
+    col_indptr = np.cumsum(col_indptr)
+
+    sources = list(source_ids)
+    blob = "\n".join(sources).encode("utf-8")
+
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = {
+        "indptr": indptr,
+        "indices": keys[:, 1].astype(np.int32),
+        "counts": count_arr,
+        "post_ptr": post_ptr,
+        "post_ids": post_ids,
+        "col_indptr": col_indptr,
+        "col_indices": keys[col_order, 0].astype(np.int32),
+        "col_rows": col_order.astype(np.int64),
+    }
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr)
+    with open(os.path.join(out_dir, "sources.txt"), "wb") as fh:
+        fh.write(blob)
+    with open(os.path.join(out_dir, "vocab.json"), "w", encoding="utf-8") as fh:
+        json.dump({"drugs": list(drug_ids), "diseases": list(disease_ids)}, fh)
+    return {"drugs": n_drugs, "diseases": n_diseases, "pairs": len(rows), "sources": len(sources)}
+
+
+class CooccurrenceIndex:
+    """Memory-mapped drug x disease matrix answering repurpose/treat without upstream calls."""
+
+    def __init__(self, path: str = COOCCURRENCE_PATH):
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self.indptr = load("indptr")
+        self.indices = load("indices")
+        self.counts = load("counts")
+        self.post_ptr = load("post_ptr")
+        self.post_ids = load("post_ids")
+        self.col_indptr = load("col_indptr")
+        self.col_indices = load("col_indices")
+        self.col_rows = load("col_rows")
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as fh:
+            vocab = json.load(fh)
+        self.drugs: List[str] = vocab["drugs"]
+        self.diseases: List[str] = vocab["diseases"]
+        self._drug_ids = {d.lower(): i for i, d in enumerate(self.drugs)}
+        self._disease_ids = {d.lower(): i for i, d in enumerate(self.diseases)}
+        with open(os.path.join(path, "sources.txt"), "rb") as fh:
+            self.sources = fh.read().decode("utf-8").split("\n")
+
+    def drug_id(self, name: str) -> Optional[int]:
+        i = self._drug_ids.get(name.strip().lower())
+        if i is None:
+            i = self._drug_ids.get(get_drug_lexicon().normalize(name).lower())
+        return i
+
+    def disease_id(self, name: str) -> Optional[int]:
+        i = self._disease_ids.get(name.strip().lower())
+        if i is None:
+            found = get_disease_matcher().find(name)
+            i = self._disease_ids.get(found[0].lower()) if found else None
+        return i
+
+    def _top(self, rows: np.ndarray, others: np.ndarray, k: int, min_rank: int = 0):
+        counts = np.asarray(self.counts[rows])
+        if min_rank:
+            keep = counts[:, PHASE1 + min_rank - 1:PHASE3 + 1].sum(axis=1) > 0
+            rows, others, counts = rows[keep], others[keep], counts[keep]
+        scores = confidence(counts[:, TRIALS], counts[:, LITS], counts[:, PHASE1], counts[:, PHASE2], counts[:, PHASE3])
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(others[i]), int(rows[i]), float(scores[i]), counts[i]) for i in top]
+
+    def _sources(self, row: int, limit: int = 20) -> List[str]:
+        start, end = int(self.post_ptr[row]), int(self.post_ptr[row + 1])
+        return [self.sources[s] for s in dict.fromkeys(self.post_ids[start:min(end, start + limit)].tolist())]
+
+    @staticmethod
+    def _summary(drug: str, disease: str, c: np.ndarray) -> str:
+        phases = ", ".join(f"Phase {p}: {int(c[PHASE1 + p - 1])}" for p in (3, 2, 1) if c[PHASE1 + p - 1])
+        return (f"Corpus index links {drug} and {disease} in {int(c[TRIALS])} trial(s) "
+                f"and {int(c[LITS])} publication(s) ({phases or 'no phase data'}).")
+
+    def repurpose(self, drug: str, k: int = 20) -> List[Dict]:
+        d = self.drug_id(drug)
+        if d is None:
+            return []
+        start, end = int(self.indptr[d]), int(self.indptr[d + 1])
+        rows = np.arange(start, end)
+        return [
+            {
+                "disease": self.diseases[c],
+                "summary": self._summary(drug, self.diseases[c], counts),
+                "confidence": round(score, 2),
+                "sources": self._sources(row),
+            }
+            for c, row, score, counts in self._top(rows, np.asarray(self.indices[start:end]), k)
+        ]
+
+    def treat(self, condition: str, k: int = 20, min_rank: int = 0) -> List[Dict]:
+        c = self.disease_id(condition)
+        if c is None:
+            return []
+        start, end = int(self.col_indptr[c]), int(self.col_indptr[c + 1])
+        results = []
+        top = self._top(np.asarray(self.col_rows[start:end]), np.asarray(self.col_indices[start:end]), k, min_rank)
+        for d, row, score, counts in top:
+            med = self.drugs[d]
+            top_phase = next((f"Phase {p}" for p in (3, 2, 1) if counts[PHASE1 + p - 1]), "")
+            n_trials, n_lits = int(counts[TRIALS]), int(counts[LITS])
+            results.append({
+                "medicine": med,
+                "summary": self._summary(med, condition, counts),
+                "confidence": round(score, 2),
+                "sources": self._sources(row),
+                "metrics": {"trials": n_trials, "publications": n_lits, "topPhase": top_phase},
+                "rationale": f"{n_trials} trials, {n_lits} publications; highest evidence {top_phase or 'observational'}",
+            })
+        return results
+
+
+_index: Optional[CooccurrenceIndex] = None
+
+
+def get_cooccurrence_index() -> Optional[CooccurrenceIndex]:
+    """The index at COOCCURRENCE_PATH, or None if it has not been built."""
+    global _index
+    if _index is None and os.path.exists(os.path.join(COOCCURRENCE_PATH, "vocab.json")):
+        _index = CooccurrenceIndex(COOCCURRENCE_PATH)
+    return _index
@@ -1,77 +1,78 @@
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
 import re
+from nlp.lexicon import DrugLexicon, get_drug_lexicon
+from nlp.matcher import PhraseMatcher, get_disease_matcher
+from utils.evidence import EvidenceTable
+from utils.metrics import timed
 
-COMMON_DISEASE_TERMS = [
-    "cancer", "carcinoma", "tumor", "tumour", "neoplasm", "diabetes", "obesity",
-    "alzheimer", "parkinson", "asthma", "copd", "hypertension", "depression",
-    "anxiety", "schizophrenia", "arthritis", "psoriasis", "hepatitis", "covid",
-    "influenza", "migraine", "epilepsy", "stroke", "heart failure", "coronary",
-    "ibd", "crohn", "colitis", "lupus", "fibrosis", "tuberculosis"
-]
 
-
-def extract_diseases(abstracts: List[dict], trials: List[dict]) -> Dict[str, List[dict]]:
-    evidence_map: Dict[str, List[dict]] = {}
+@timed("extract")
+def disease_evidence(
+    abstracts: Iterable[dict],
+    trials: Iterable[dict],
+    matcher: Optional[PhraseMatcher] = None,
+) -> EvidenceTable:
+    matcher = matcher or get_disease_matcher()
+    table = EvidenceTable()
 
     # From trials conditions
     for t in trials:
+        src = None
         for cond in t.get("conditions", []):
             disease = cond.strip()
             if not disease:
                 continue
-            evidence_map.setdefault(disease, []).append({
-                "type": "trial",
-                "title": t.get("title", ""),
-                "source_id": t.get("source_id", ""),
-                "phase": t.get("phase", ""),
-                "status": t.get("status", "")
-            })
-
-    # From abstracts text
+            if src is None:
+                src = table.source("trial", t.get("title", ""), t.get("source_id", ""), t.get("phase", ""), t.get("status", ""))
+            table.add(disease, src)
+
+    # From abstracts text: one matcher pass per abstract
     for a in abstracts:
-        text = f"{a.get('title','')}\n{a.get('abstract','')}".lower()
-        for term in COMMON_DISEASE_TERMS:
-            if re.search(r"\\b" + re.escape(term) + r"\\b", text):
-                key = term.title()
-                evidence_map.setdefault(key, []).append({
-                    "type": "literature",
-                    "title": a.get("title", ""),
-                    "source_id": a.get("source_id", ""),
-                })
+        text = f"{a.get('title','')}\n{a.get('abstract','')}"
+        src = None
+        for key in matcher.find(text):
+            if src is None:
+                src = table.source("literature", a.get("title", ""), a.get("source_id", ""), relevance=a.get("relevance", 1.0))
+            table.add(key, src)
 
-    return evidence_map
+    return table
 
 
-COMMON_DRUG_SUFFIXES = [
-    "mab",  # monoclonal antibodies
-    "nib",  # kinase inhibitors
-    "pril", "sartan", # anti-hypertensives
-    "statin", # lipid lowering
-    "caine", # anesthetics
-    "zolam", "zepam", # benzos
-    "oxetine", "triptyline", # antidepressants
-]
+def extract_diseases(
+    abstracts: Iterable[dict],
+    trials: Iterable[dict],
+    matcher: Optional[PhraseMatcher] = None,
+) -> Dict[str, List[dict]]:
+    return disease_evidence(abstracts, trials, matcher).to_map()
 
 
-def extract_drugs(abstracts: List[dict], trials: List[dict]) -> Dict[str, List[dict]]:
-    evidence_map: Dict[str, List[dict]] = {}
+@timed("extract")
+def drug_evidence(
+    abstracts: Iterable[dict],
+    trials: Iterable[dict],
+    lexicon: Optional[DrugLexicon] = None,
+) -> EvidenceTable:
+    lexicon = lexicon or get_drug_lexicon()
+    table = EvidenceTable()
+    display: Dict[str, str] = {}
 
-    # 1) Prefer clinical trial interventions (high precision)
+    # 1) Prefer clinical trial interventions (high precision). Names are
+    # normalized so dose/salt/formulation variants merge under one drug.
     for t in trials:
+        seen = set()
+        src = None
         for name in t.get("interventions", []):
-            drug = name.strip()
-            if not drug:
+            drug = lexicon.normalize(name.strip())
+            if not drug or drug.lower() in seen:
                 continue
-            evidence_map.setdefault(drug, []).append({
-                "type": "trial",
-                "title": t.get("title", ""),
-                "source_id": t.get("source_id", ""),
-                "phase": t.get("phase", ""),
-                "status": t.get("status", "")
-            })
+            seen.add(drug.lower())
+            drug = display.setdefault(drug.lower(), drug)
+            if src is None:
+                src = table.source("trial", t.get("title", ""), t.get("source_id", ""), t.get("phase", ""), t.get("status", ""))
+            table.add(drug, src)
 
-    if evidence_map:
-        return evidence_map
+    if table:
+        return table
 
     # 2) Fallback to lightweight literature heuristic with strict filters
     MONTHS = {
@@ -81,15 +82,26 @@ def extract_drugs(abstracts: List[dict], trials: List[dict]) -> Dict[str, List[d
     for a in abstracts:
         text = f"{a.get('title','')}\n{a.get('abstract','')}".lower()
         tokens = re.findall(r"[a-z][a-z\-]{4,}", text)
+        found = set()
         for tok in set(tokens):
             if tok in MONTHS:
                 continue
-            if any(tok.endswith(suf) for suf in COMMON_DRUG_SUFFIXES):
+            key = lexicon.lookup(tok)
+            if key is None and lexicon.has_drug_suffix(tok):
                 key = tok.title()
-                evidence_map.setdefault(key, []).append({
-                    "type": "literature",
-                    "title": a.get("title", ""),
-                    "source_id": a.get("source_id", ""),
-                })
+            if key:
+                found.add(key)
+        if found:
+            src = table.source("literature", a.get("title", ""), a.get("source_id", ""), relevance=a.get("relevance", 1.0))
+            for key in found:
+                table.add(key, src)
+
+    return table
+
 
-    return evidence_map
+def extract_drugs(
+    abstracts: Iterable[dict],
+    trials: Iterable[dict],
+    lexicon: Optional[DrugLexicon] = None,
+) -> Dict[str, List[dict]]:
+    return drug_evidence(abstracts, trials, lexicon).to_map()
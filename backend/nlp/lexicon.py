@@ -0,0 +1,106 @@
+import os
+import re
+from typing import Dict, Iterable, Optional
+
+from nlp.matcher import load_vocabulary
+
+DEFAULT_DRUG_LEXICON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "drugs.tsv")
+
+COMMON_DRUG_SUFFIXES = [
+    "mab",  # monoclonal antibodies
+    "nib",  # kinase inhibitors
+    "pril", "sartan", # anti-hypertensives
+    "statin", # lipid lowering
+    "caine", # anesthetics
+    "zolam", "zepam", # benzos
+    "oxetine", "triptyline", # antidepressants
+]
+
+# Words that describe the salt or formulation rather than the active drug.
+SALT_WORDS = {
+    "hydrochloride", "hcl", "dihydrochloride", "hydrobromide", "sodium", "potassium", "calcium",
+    "magnesium", "sulfate", "sulphate", "succinate", "tartrate", "maleate", "mesylate", "besylate",
+    "citrate", "phosphate", "acetate", "fumarate", "bromide", "chloride", "monohydrate", "dihydrate",
+    "anhydrous",
+}
+FORMULATION_WORDS = {
+    "tablet", "tablets", "tab", "tabs", "capsule", "capsules", "oral", "injection",
+    "injectable", "infusion", "solution", "suspension", "syrup", "cream", "gel", "ointment", "patch",
+    "spray", "inhaler", "inhalation", "powder", "drops", "extended", "delayed", "immediate", "sustained",
+    "modified", "controlled", "release", "er", "xr", "xl", "sr", "ir", "dr", "cr", "film-coated",
+    "iv", "intravenous", "subcutaneous", "intramuscular", "sc", "im", "topical", "nasal", "low-dose",
+    "dose", "high-dose",
+}
+_STRIP_WORDS = SALT_WORDS | FORMULATION_WORDS
+_DOSE = re.compile(
+    r"\b\d+(?:[.,]\d+)?\s*(?:mg/kg|mg/m2|mg/ml|mcg|µg|ug|mg|g|ml|iu|units?|%)(?:/\w+)?(?=\W|$)",
+    re.IGNORECASE,
+)
+_PARENS = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+
+
+class DrugLexicon:
+    """Exact/synonym lookup plus a reversed-suffix trie for class suffixes."""
+
+    def __init__(self, names: Dict[str, str], suffixes: Iterable[str] = COMMON_DRUG_SUFFIXES):
+        # names: lowercase name or synonym -> canonical name
+        self.names = names
+        self._suffix_trie: Dict[str, dict] = {}
+        for suf in suffixes:
+            node = self._suffix_trie
+            for ch in reversed(suf):
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+    @classmethod
+    def from_file(cls, path: str, suffixes: Iterable[str] = COMMON_DRUG_SUFFIXES) -> "DrugLexicon":
+        """Build a lexicon from a vocabulary file (see nlp.matcher.load_vocabulary)."""
+        return cls(load_vocabulary(path), suffixes)
+
+    def lookup(self, name: str) -> Optional[str]:
+        return self.names.get(" ".join(name.lower().split()))
+
+    def has_drug_suffix(self, token: str) -> bool:
+        """True if `token` ends with a known class suffix; O(len(token))."""
+        node = self._suffix_trie
+        for ch in reversed(token):
+            node = node.get(ch)
+            if node is None:
+                return False
+            if "" in node:
+                return True
+        return False
+
+    def normalize(self, name: str) -> str:
+        """Canonical drug for an intervention string such as "Metformin HCl 500 mg tablets".
+
+        Dose, formulation and parenthesised text are stripped, then trailing
+        salt words as long as a non-salt word is left ("Metformin HCl" ->
+        Metformin, but "Magnesium Sulfate" and "Sodium oxybate" stay whole).
+        The remainder is looked up in the lexicon, falling back to the
+        stripped text itself, or to the cleaned name if only formulation
+        words were left. Returns "" if nothing is left.
+        """
+        hit = self.lookup(name)
+        if hit:
+            return hit
+        text = _DOSE.sub(" ", _PARENS.sub(" ", name))
+        words = [w for w in re.split(r"[\s,;]+", text) if w.strip(" -/+")]
+        base = [w for w in words if w.lower() not in FORMULATION_WORDS] or words
+        while len(base) > 1 and base[-1].lower() in SALT_WORDS and any(w.lower() not in SALT_WORDS for w in base[:-1]):
+            base = base[:-1]
+        stripped = " ".join(base).strip(" -/+")
+        if not stripped:
+            return ""
+        return self.lookup(stripped) or stripped
+
+
+_drug_lexicon: Optional[DrugLexicon] = None
+
+
+def get_drug_lexicon() -> DrugLexicon:
+    """Process-wide lexicon built from DRUG_LEXICON_PATH (or the bundled list)."""
+    global _drug_lexicon
+    if _drug_lexicon is None:
+        _drug_lexicon = DrugLexicon.from_file(os.getenv("DRUG_LEXICON_PATH", DEFAULT_DRUG_LEXICON))
+    return _drug_lexicon
@@ -0,0 +1,86 @@
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_DISEASE_VOCAB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "diseases.tsv")
+
+
+def load_vocabulary(path: str) -> Dict[str, str]:
+    """Read `canonical<TAB>syn1|syn2|...` lines into lowercase synonym -> canonical name.
+
+    `#` starts a comment; the first file entry for a synonym wins.
+    """
+    vocabulary: Dict[str, str] = {}
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            canonical, _, synonyms = line.partition("\t")
+            canonical = canonical.strip()
+            for name in [canonical] + synonyms.split("|"):
+                name = " ".join(name.lower().split())
+                if name:
+                    vocabulary.setdefault(name, canonical)
+    return vocabulary
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Compile terms into a trie-shaped regex so one scan tests them all.
+
+    A flat alternation makes the regex engine try every term at every
+    position; nesting shared prefixes lets it reject a position after a
+    few characters regardless of vocabulary size.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = []
+        for ch in sorted(k for k in node if k):
+            atom = r"\s+" if ch == " " else re.escape(ch)
+            branches.append(atom + build(node[ch]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Optional groups are greedy, so longer terms win over their prefixes.
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class PhraseMatcher:
+    """Single-pass dictionary matcher mapping synonyms to canonical names."""
+
+    def __init__(self, vocabulary: Dict[str, str]):
+        # vocabulary: lowercase synonym -> canonical name
+        self.vocabulary = vocabulary
+        pattern = _trie_pattern(vocabulary) if vocabulary else r"(?!x)x"
+        self._regex = re.compile(r"(?<!\w)(?:" + pattern + r")(?!\w)")
+
+    @classmethod
+    def from_file(cls, path: str) -> "PhraseMatcher":
+        """Build a matcher from a vocabulary file (see load_vocabulary)."""
+        return cls(load_vocabulary(path))
+
+    def find(self, text: str) -> List[str]:
+        """Canonical names found in `text`, de-duplicated in order of appearance."""
+        found: Dict[str, None] = {}
+        for m in self._regex.finditer(text.lower()):
+            found[self.vocabulary[" ".join(m.group().split())]] = None
+        return list(found)
+
+
+_disease_matcher: Optional[PhraseMatcher] = None
+
+
+def get_disease_matcher() -> PhraseMatcher:
+    """Process-wide matcher built from DISEASE_VOCAB_PATH (or the bundled list)."""
+    global _disease_matcher
+    if _disease_matcher is None:
+        _disease_matcher = PhraseMatcher.from_file(os.getenv("DISEASE_VOCAB_PATH", DEFAULT_DISEASE_VOCAB))
+    return _disease_matcher
@@ -1,20 +1,32 @@
-from typing import List, Dict
+from typing import List, Dict, Iterable
 
 def summarize_evidence(drug: str, disease: str, evidence: List[Dict]) -> str:
     trials = [e for e in evidence if e.get("type") == "trial"]
     lits = [e for e in evidence if e.get("type") == "literature"]
+    phases = list({t.get("phase", "") for t in trials if t.get("phase")})
+    status_counts = {}
+    for t in trials:
+        s = t.get("status", "")
+        if s:
+            status_counts[s] = status_counts.get(s, 0) + 1
+    return summarize_counts(drug, disease, len(trials), len(lits), phases, status_counts)
+
+
+def summarize_counts(
+    drug: str,
+    disease: str,
+    n_trials: int,
+    n_lits: int,
+    phases: Iterable[str],
+    status_counts: Dict[str, int],
+) -> str:
+    """Summary text from pre-aggregated counters (see utils.evidence.EvidenceTable)."""
     parts = []
-    if trials:
-        phases = list({t.get("phase", "") for t in trials if t.get("phase")})
-        status_counts = {}
-        for t in trials:
-            s = t.get("status", "")
-            if s:
-                status_counts[s] = status_counts.get(s, 0) + 1
+    if n_trials:
         sc = ", ".join(f"{k}:{v}" for k, v in status_counts.items()) if status_counts else "trials found"
-        parts.append(f"ClinicalTrials.gov shows {len(trials)} trial(s) for {drug} in {disease} (phases: {', '.join(phases) or 'N/A'}, {sc}).")
-    if lits:
-        parts.append(f"Literature mentions support potential activity of {drug} in {disease} ({len(lits)} publication snippets).")
+        parts.append(f"ClinicalTrials.gov shows {n_trials} trial(s) for {drug} in {disease} (phases: {', '.join(phases) or 'N/A'}, {sc}).")
+    if n_lits:
+        parts.append(f"Literature mentions support potential activity of {drug} in {disease} ({n_lits} publication snippets).")
     if not parts:
         return f"Preliminary signals for {drug} in {disease}. Further investigation required."
     return " ".join(parts)
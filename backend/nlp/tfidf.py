@@ -0,0 +1,261 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from nlp.extract import extract_drugs
+from nlp.lexicon import get_drug_lexicon
+
+TFIDF_PATH = os.getenv(
+    "TFIDF_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".data", "tfidf"),
+)
+# Opt-in: RELEVANCE_WEIGHTS=1 weights each abstract between MIN_RELEVANCE
+# (least relevant of a result set) and 1; by default every abstract counts 1.
+RELEVANCE_WEIGHTS = os.getenv("RELEVANCE_WEIGHTS", "0") == "1"
+MIN_RELEVANCE = float(os.getenv("MIN_RELEVANCE", "0.25"))
+
+_TOKEN = re.compile(r"[a-z][a-z0-9\-]{2,}")
+STOPWORDS = frozenset(
+    "and are was were the for with from that this these those into than then have has had not but our their "
+    "its which who whom been being also may can could would should between among during after before about "
+    "over under within without both each other such only more most less least very all any some one two three "
+    "study studies patients patient results conclusion conclusions methods background objective aim".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def document_text(article: Dict) -> str:
+    return f"{article.get('title', '')}\n{article.get('abstract', '')}"
+
+
+def _rows_of(indptr: np.ndarray) -> np.ndarray:
+    """Row number of every stored entry of a CSR matrix."""
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+
+def _normalize(indptr: np.ndarray, data: np.ndarray) -> np.ndarray:
+    """L2-normalize CSR rows (empty rows stay empty)."""
+    norms = np.sqrt(np.bincount(_rows_of(indptr), weights=data.astype(np.float64) ** 2, minlength=len(indptr) - 1))
+    norms[norms == 0] = 1.0
+    return (data / np.repeat(norms, np.diff(indptr))).astype(np.float32)
+
+
+def _gather(indptr: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of the entries of `rows` in a CSR/CSC matrix, and how many each row has."""
+    starts = np.asarray(indptr[rows], dtype=np.int64)
+    lens = np.asarray(indptr[rows + 1], dtype=np.int64) - starts
+    offsets = np.repeat(starts - np.cumsum(lens) + lens, lens)
+    return offsets + np.arange(int(lens.sum()), dtype=np.int64), lens
+
+
+class Vectorizer:
+    """Sublinear-tf x idf weighting over a fixed vocabulary; rows are L2-normalized."""
+
+    def __init__(self, terms: List[str], idf: np.ndarray):
+        self.terms = terms
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.vocab = {t: i for i, t in enumerate(terms)}
+
+    @classmethod
+    def fit(cls, texts: Iterable[str], min_df: int = 1, max_df: float = 1.0) -> "Vectorizer":
+        df: Counter = Counter()
+        n = 0
+        for text in texts:
+            df.update(set(tokenize(text)))
+            n += 1
+        limit = max_df * n
+        terms = sorted(t for t, f in df.items() if min_df <= f <= limit)
+        idf = np.array([math.log((1 + n) / (1 + df[t])) + 1 for t in terms], dtype=np.float32)
+        return cls(terms, idf)
+
+    def transform(self, texts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """CSR (indptr, indices, data) with one row per text."""
+        indptr = [0]
+        indices: List[int] = []
+        tfs: List[int] = []
+        for text in texts:
+            counts = Counter(i for i in (self.vocab.get(t) for t in tokenize(text)) if i is not None)
+            indices.extend(counts.keys())
+            tfs.extend(counts.values())
+            indptr.append(len(indices))
+        indptr = np.array(indptr, dtype=np.int64)
+        indices = np.array(indices, dtype=np.int32)
+        data = (1 + np.log(np.array(tfs, dtype=np.float32))) * self.idf[indices]
+        return indptr, indices, _normalize(indptr, data)
+
+
+def build_tfidf(articles: Iterable[Dict], out_dir: str = TFIDF_PATH, min_df: int = 2, max_df: float = 0.5) -> Dict[str, int]:
+    """TF-IDF vectors for a corpus of abstracts plus one aggregated profile per drug.
+
+    Each drug's profile is the normalized sum of the vectors of the
+    abstracts extract_drugs finds it in. Profiles are saved by drug (CSR)
+    and by term (CSC) as .npy arrays that TfidfIndex memory-maps.
+    """
+    texts: List[str] = []
+    drug_ids: Dict[str, int] = {}
+    doc_drugs: List[Tuple[int, int]] = []  # (document, drug)
+    for doc, article in enumerate(articles):
+        texts.append(document_text(article))
+        for drug in extract_drugs([article], []):
+            doc_drugs.append((doc, drug_ids.setdefault(drug, len(drug_ids))))
+    vectorizer = Vectorizer.fit(texts, min_df, max_df)
+    indptr, indices, data = vectorizer.transform(texts)
+
+    pairs = np.array(doc_drugs, dtype=np.int64).reshape(-1, 2)
+    n_drugs, n_terms = len(drug_ids), len(vectorizer.terms)
+
+    # Sum document rows into drug rows: every (document, drug) pair
+    # contributes that document's entries, merged by (drug, term).
+    positions, lens = _gather(indptr, pairs[:, 0])
+    keys = np.repeat(pairs[:, 1], lens) * n_terms + indices[positions]
+    merged, inverse = np.unique(keys, return_inverse=True)
+    values = np.bincount(inverse, weights=data[positions], minlength=len(merged))
+    rows, cols = merged // max(n_terms, 1), (merged % max(n_terms, 1)).astype(np.int32)
+    prof_indptr = np.zeros(n_drugs + 1, dtype=np.int64)
+    np.add.at(prof_indptr, rows + 1, 1)
+    prof_indptr = np.cumsum(prof_indptr)
+    prof_data = _normalize(prof_indptr, values)
+
+    order = np.lexsort((rows, cols))
+    col_indptr = np.zeros(n_terms + 1, dtype=np.int64)
+    np.add.at(col_indptr, cols[order].astype(np.int64) + 1, 1)
+    col_indptr = np.cumsum(col_indptr)
+
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = {
+        "idf": vectorizer.idf,
+        "indptr": prof_indptr,
+        "indices": cols,
+        "data": prof_data,
+        "col_indptr": col_indptr,
+        "col_indices": rows[order].astype(np.int32),
+        "col_data": prof_data[order],
+        "doc_counts": np.bincount(pairs[:, 1], minlength=n_drugs).astype(np.int32),
+    }
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr)
+    with open(os.path.join(out_dir, "vocab.json"), "w", encoding="utf-8") as fh:
+        json.dump({"terms": vectorizer.terms, "drugs": list(drug_ids)}, fh)
+    return {"documents": len(texts), "terms": n_terms, "drugs": n_drugs, "profile_entries": int(len(prof_data))}
+
+
+class TfidfIndex:
+    """Memory-mapped drug profiles: nearest drugs by cosine similarity, and the idf used for relevance."""
+
+    def __init__(self, path: str = TFIDF_PATH):
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self.indptr = load("indptr")
+        self.indices = load("indices")
+        self.data = load("data")
+        self.col_indptr = load("col_indptr")
+        self.col_indices = load("col_indices")
+        self.col_data = load("col_data")
+        self.doc_counts = load("doc_counts")
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as fh:
+            vocab = json.load(fh)
+        self.vectorizer = Vectorizer(vocab["terms"], load("idf"))
+        self.drugs: List[str] = vocab["drugs"]
+        self._drug_ids = {d.lower(): i for i, d in enumerate(self.drugs)}
+
+    def drug_id(self, name: str) -> Optional[int]:
+        i = self._drug_ids.get(name.strip().lower())
+        if i is None:
+            i = self._drug_ids.get(get_drug_lexicon().normalize(name).lower())
+        return i
+
+    def profile(self, d: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = int(self.indptr[d]), int(self.indptr[d + 1])
+        return np.asarray(self.indices[start:end]), np.asarray(self.data[start:end])
+
+    def similar(self, drug: str, k: int = 10, terms: int = 5) -> Optional[List[Dict]]:
+        """The `k` drugs whose profiles are closest to `drug`'s, or None if it is not indexed."""
+        d = self.drug_id(drug)
+        if d is None:
+            return None
+        q_terms, q_data = self.profile(d)
+        positions, lens = _gather(self.col_indptr, q_terms.astype(np.int64))
+        scores = np.bincount(
+            np.asarray(self.col_indices[positions]),
+            weights=np.asarray(self.col_data[positions], dtype=np.float64) * np.repeat(q_data, lens),
+            minlength=len(self.drugs),
+        )
+        scores[d] = -1.0
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        q_weights = dict(zip(q_terms.tolist(), q_data.tolist()))
+        out = []
+        for j in top:
+            if scores[j] <= 0:
+                break
+            j_terms, j_data = self.profile(int(j))
+            shared = sorted(
+                ((q_weights[t] * w, t) for t, w in zip(j_terms.tolist(), j_data.tolist()) if t in q_weights),
+                reverse=True,
+            )[:terms]
+            out.append({
+                "drug": self.drugs[j],
+                "similarity": round(float(scores[j]), 4),
+                "articles": int(self.doc_counts[j]),
+                "shared_terms": [self.vectorizer.terms[t] for _, t in shared],
+            })
+        return out
+
+
+_index: Optional[TfidfIndex] = None
+
+
+def get_tfidf_index() -> Optional[TfidfIndex]:
+    """The index at TFIDF_PATH, or None if it has not been built."""
+    global _index
+    if _index is None and os.path.exists(os.path.join(TFIDF_PATH, "vocab.json")):
+        _index = TfidfIndex(TFIDF_PATH)
+    return _index
+
+
+def relevance(abstracts: List[Dict], query: str) -> np.ndarray:
+    """Per-abstract weight in [MIN_RELEVANCE, 1] from TF-IDF cosine similarity.
+
+    Abstracts are compared with `query`'s drug profile when the index has
+    one, otherwise with the centroid of the result set itself, so on-topic
+    abstracts outweigh ones that only mention the term in passing. Without
+    a built index the idf comes from the result set.
+    """
+    if not abstracts:
+        return np.zeros(0)
+    texts = [document_text(a) for a in abstracts]
+    index = get_tfidf_index()
+    vectorizer = index.vectorizer if index is not None else Vectorizer.fit(texts)
+    indptr, indices, data = vectorizer.transform(texts)
+    target = np.zeros(len(vectorizer.terms), dtype=np.float64)
+    d = index.drug_id(query) if index is not None else None
+    if d is not None:
+        terms, weights = index.profile(d)
+        target[terms] = weights
+    else:
+        np.add.at(target, indices, data)
+    sims = np.bincount(_rows_of(indptr), weights=data * target[indices], minlength=len(texts))
+    top = sims.max()
+    if top <= 0:
+        return np.ones(len(texts))
+    return MIN_RELEVANCE + (1 - MIN_RELEVANCE) * sims / top
+
+
+def with_relevance(abstracts: List[Dict], query: str) -> List[Dict]:
+    """Copies of `abstracts` carrying a `relevance` weight for evidence scoring (when RELEVANCE_WEIGHTS is on)."""
+    if not RELEVANCE_WEIGHTS or not abstracts:
+        return abstracts
+    weights = relevance(abstracts, query)
+    return [dict(a, relevance=round(float(w), 3)) for a, w in zip(abstracts, weights)]
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Run against throwaway cache/state files, never the developer's .cache.
+_TMP = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("CACHE_PATH", os.path.join(_TMP, "upstream.sqlite3"))
+os.environ.setdefault("TRACKED_DB_PATH", os.path.join(_TMP, "tracked.sqlite3"))
+os.environ.setdefault("WARM_STATS_PATH", os.path.join(_TMP, "query_stats.json"))
+os.environ.setdefault("TFIDF_PATH", os.path.join(_TMP, "tfidf"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from data_sources import cache
+from data_sources.cache import ResponseCache, STALE_TTLS, TTLS, cached, make_key
+
+
+def test_purge_deletes_rows_past_ttl_plus_stale(tmp_path, monkeypatch):
+    store = ResponseCache(str(tmp_path / "upstream.sqlite3"))
+    monkeypatch.setattr(ResponseCache, "PURGE_EVERY", 3)
+    expired = make_key("pubmed", {"term": "old"})
+    stale = make_key("trials", {"term": "stale"})
+    store.set(expired, ["a"])
+    store.set(stale, ["b"])
+    now = time.time()
+    with store._lock:
+        store._conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?",
+                            (now - TTLS["pubmed"] - STALE_TTLS["pubmed"] - 1, expired))
+        store._conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (now - TTLS["trials"] - 1, stale))
+        store._conn.commit()
+    store.set(make_key("pubchem", {"name": "aspirin"}), {"cid": 1})  # third write purges
+    assert store.get(expired) is None
+    assert store.get(stale) is not None
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ResponseCache(str(tmp_path / "upstream.sqlite3"))
+    monkeypatch.setattr(cache, "_cache", store)
+    return store
+
+
+def age(store, key, seconds):
+    with store._lock:
+        store._conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time() - seconds, key))
+        store._conn.commit()
+
+
+def test_stale_entries_are_served_while_refreshing(store):
+    calls = []
+
+    @cached("pubmed")
+    async def fetch(term: str):
+        calls.append(term)
+        return [f"{term}-{len(calls)}"]
+
+    async def run():
+        assert await fetch("aspirin") == ["aspirin-1"]
+        assert await fetch("aspirin") == ["aspirin-1"]  # fresh hit
+        age(store, fetch_key("aspirin"), TTLS["pubmed"] + 1)
+        assert await fetch("aspirin") == ["aspirin-1"]  # stale, refresh scheduled
+        await asyncio.gather(*list(cache._refreshing.values()))
+        return await fetch("aspirin")
+
+    assert asyncio.run(run()) == ["aspirin-2"]
+    assert calls == ["aspirin", "aspirin"]
+    assert store.stats["pubmed"] == {"hits": 2, "stale_hits": 1, "misses": 1}
+
+
+def test_entries_past_the_stale_window_are_refetched(store):
+    calls = []
+
+    @cached("pubmed")
+    async def fetch(term: str):
+        calls.append(term)
+        return [len(calls)]
+
+    async def run():
+        await fetch("aspirin")
+        age(store, fetch_key("aspirin"), TTLS["pubmed"] + STALE_TTLS["pubmed"] + 1)
+        return await fetch("aspirin")
+
+    assert asyncio.run(run()) == [2]
+
+
+def test_empty_results_are_not_cached(store):
+    calls = []
+
+    @cached("trials")
+    async def fetch(term: str):
+        calls.append(term)
+        return []
+
+    async def run():
+        await fetch("aspirin")
+        await fetch("aspirin")
+
+    asyncio.run(run())
+    assert calls == ["aspirin", "aspirin"]
+
+
+def fetch_key(term: str) -> str:
+    return make_key("pubmed", {"term": term})
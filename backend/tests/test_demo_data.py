@@ -0,0 +1,63 @@
+import pytest
+
+from utils.demo_data import DemoIndex, demo_evidence, demo_treatments, get_demo_index
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("metformin", "metformin"),
+    ("Metformin HCl", "metformin"),
+    ("METFORMIN hydrochloride 500 mg tablets", "metformin"),
+    ("glucophage", "metformin"),
+    ("atorvastatin calcium", "atorvastatin"),
+])
+def test_evidence_resolves_drug_variants(query, expected):
+    assert get_demo_index()["evidence"].resolve(query) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "simvastatin", "pravastatin", "rosuvastatin",
+    "aspirin allergy", "metformin resistance",
+    "met", "asp", "ator",
+])
+def test_evidence_does_not_match_other_drugs(query):
+    assert get_demo_index()["evidence"].resolve(query) is None
+    assert not demo_evidence(query)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("migraine", "migraine"),
+    ("migrane", "migraine"),
+    ("asthmaa", "asthma"),
+    ("COVID-19", "covid 19"),
+    ("covid", "covid 19"),
+    ("hbp", "hypertension"),
+    ("type 2 diabetes", "diabetes"),
+    ("alzheimers", "alzheimers disease"),
+    ("Alzheimer's Disease", "alzheimers disease"),
+])
+def test_treatments_resolve_spellings_and_aliases(query, expected):
+    assert get_demo_index()["treatments"].resolve(query) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "hypotension", "pulmonary hypertension", "ocular hypertension",
+    "type 1 diabetes", "diabetes insipidus", "covid 18",
+    "dia", "hyp", "hypert", "mig",
+])
+def test_treatments_do_not_match_other_conditions(query):
+    assert get_demo_index()["treatments"].resolve(query) is None
+    assert not demo_treatments(query)
+
+
+def test_ambiguous_misspelling_resolves_to_nothing():
+    index = DemoIndex({"abcdef": {}, "abcdeg": {}})
+    assert index.resolve("abcdex") is None
+    assert index.resolve("abcdeff") == "abcdef"
+
+
+def test_entries_are_shared_and_read_only():
+    first = demo_treatments("migraine")
+    assert first is demo_treatments("Migraine")
+    with pytest.raises(TypeError):
+        first["Aspirin"] = []
+    assert isinstance(first["Sumatriptan"], tuple)
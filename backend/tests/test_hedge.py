@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from data_sources import hedge
+from utils.ratelimit import TokenBucket
+
+
+@pytest.fixture
+def warmed(monkeypatch):
+    """Hedging on, with a 10 ms p95 already observed for the "test" upstream."""
+    monkeypatch.setattr(hedge, "HEDGE_REQUESTS", True)
+    monkeypatch.setattr(hedge, "LATENCIES", hedge.LatencyTracker())
+    for _ in range(hedge.MIN_SAMPLES):
+        hedge.LATENCIES.observe("test", 0.01)
+
+
+def test_hedge_wins_when_the_first_call_is_slow(warmed):
+    delays = [0.5, 0.0]
+    cancelled = []
+
+    async def call():
+        delay = delays.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    wins = hedge.HEDGE_STATS["hedge_wins"]
+    assert asyncio.run(hedge.hedged("test", call)) == 0.0
+    assert hedge.HEDGE_STATS["hedge_wins"] == wins + 1
+    assert cancelled == [0.5]
+
+
+def test_rate_limit_wait_is_not_timed(monkeypatch):
+    monkeypatch.setattr(hedge, "LATENCIES", hedge.LatencyTracker())
+    bucket = TokenBucket(rate=20)
+    assert bucket.try_acquire()  # the next token is 50 ms away
+
+    async def call():
+        return "ok"
+
+    assert asyncio.run(hedge.hedged("test", call, bucket)) == "ok"
+    assert max(hedge.LATENCIES.samples["test"]) < 0.04
+
+
+@pytest.mark.parametrize("capacity, hedges", [(1, 0), (2, 1)])
+def test_each_hedge_needs_its_own_token(warmed, capacity, hedges):
+    bucket = TokenBucket(rate=0.001, capacity=capacity)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    before = dict(hedge.HEDGE_STATS)
+    asyncio.run(hedge.hedged("test", call, bucket))
+    assert len(calls) == 1 + hedges
+    assert hedge.HEDGE_STATS["hedged"] - before["hedged"] == hedges
+    assert hedge.HEDGE_STATS["hedges_skipped"] - before["hedges_skipped"] == 1 - hedges
+    assert not bucket.try_acquire()
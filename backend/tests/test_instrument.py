@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from api.instrument import InstrumentMiddleware
+from utils.metrics import METRICS
+
+app = FastAPI()
+app.add_middleware(InstrumentMiddleware)
+
+
+@app.get("/plain")
+def plain():
+    return {"ok": True}
+
+
+@app.get("/events")
+async def events():
+    async def body():
+        for i in range(3):
+            await asyncio.sleep(0.05)
+            yield f"data: {i}\n\n".encode()
+    return StreamingResponse(body(), media_type="text/event-stream")
+
+
+def histogram(route: str):
+    return METRICS.histograms["http_request_seconds"][(("method", "GET"), ("route", route))]
+
+
+def test_plain_response_reports_total():
+    response = TestClient(app).get("/plain")
+    assert response.json() == {"ok": True}
+    assert "total;dur=" in response.headers["server-timing"]
+    assert histogram("/plain").count == 1
+
+
+def test_stream_is_timed_until_the_body_completes():
+    response = TestClient(app).get("/events")
+    assert response.text.count("data:") == 3
+    timing = response.headers["server-timing"]
+    assert "headers;dur=" in timing and "total" not in timing
+    hist = histogram("/events")
+    assert hist.count == 1 and hist.sum >= 0.15
@@ -0,0 +1,52 @@
+import pytest
+
+from nlp.extract import drug_evidence
+from nlp.lexicon import DrugLexicon, get_drug_lexicon
+from nlp.matcher import PhraseMatcher, load_vocabulary
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Metformin HCl 500 mg tablets", "Metformin"),
+    ("Atorvastatin calcium", "Atorvastatin"),
+    ("Sertraline hydrochloride (Zoloft)", "Sertraline"),
+    ("Diclofenac sodium gel 1%", "Diclofenac"),
+    ("Glucophage XR", "Metformin"),
+])
+def test_normalize_strips_salt_dose_and_formulation(name, expected):
+    assert get_drug_lexicon().normalize(name) == expected
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Magnesium Sulfate", "Magnesium Sulfate"),
+    ("Potassium Chloride", "Potassium Chloride"),
+    ("Sodium Chloride 0.9%", "Sodium Chloride"),
+    ("Calcium", "Calcium"),
+    ("Sodium oxybate", "Sodium oxybate"),
+    ("Oral tablet", "Oral tablet"),
+])
+def test_normalize_keeps_names_made_of_salt_words(name, expected):
+    assert get_drug_lexicon().normalize(name) == expected
+
+
+def test_normalize_empty_only_without_a_name():
+    lexicon = DrugLexicon({})
+    assert lexicon.normalize("500 mg") == ""
+    assert lexicon.normalize("  ") == ""
+
+
+def test_salt_interventions_are_kept_as_evidence():
+    trials = [{
+        "title": "Magnesium for eclampsia", "source_id": "NCT1", "phase": "Phase 3", "status": "Completed",
+        "interventions": ["Magnesium Sulfate", "Sodium Chloride 0.9%"],
+    }]
+    assert drug_evidence([], trials).names == ["Magnesium Sulfate", "Sodium Chloride"]
+
+
+def test_vocabulary_file_is_shared_by_lexicon_and_matcher(tmp_path):
+    path = tmp_path / "vocab.tsv"
+    path.write_text("# comment\nMetformin\tGlucophage| Metformin  HCl \n\nAspirin\tASA|glucophage\n", encoding="utf-8")
+    vocabulary = load_vocabulary(str(path))
+    assert vocabulary == {"metformin": "Metformin", "glucophage": "Metformin", "metformin hcl": "Metformin",
+                          "aspirin": "Aspirin", "asa": "Aspirin"}
+    assert DrugLexicon.from_file(str(path)).names == vocabulary
+    assert PhraseMatcher.from_file(str(path)).find("ASA and glucophage") == ["Aspirin", "Metformin"]
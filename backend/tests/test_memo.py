@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from utils import memo
+from utils.memo import Expiring, QueryStats, SingleFlight, TTLCache, _MISSING, memoized
+
+
+@pytest.fixture(autouse=True)
+def fresh_results(monkeypatch):
+    monkeypatch.setattr(memo, "RESULTS", TTLCache(maxsize=16, ttl=60))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(memo.time, "monotonic", clock)
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=1)
+    clock.now += 5
+    assert cache.get("a") == 1
+    assert cache.get("b") is _MISSING
+    clock.now += 6
+    assert cache.get("a") is _MISSING
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the oldest
+    cache.set("c", 3)
+    assert cache.get("b") is _MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_single_flight_collapses_concurrent_calls():
+    calls = []
+
+    async def work(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do(k, lambda k=k: work(k)) for k in ["x", "x", "x", "y"]))
+        again = await flight.do("x", lambda: work("x"))  # not in flight any more
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert results == ["X", "X", "X", "Y"]
+    assert again == "X"
+    assert calls == ["x", "y", "x"]
+
+
+def test_single_flight_survives_a_cancelled_caller():
+    async def run():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await started.wait()
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_memoized_computes_once_and_peek_prime_share_entries():
+    calls = []
+
+    @memoized("test-once")
+    async def runner(term: str, n: int = 1):
+        calls.append(term)
+        await asyncio.sleep(0.01)
+        return {"term": term, "n": n}
+
+    async def run():
+        assert runner.peek("aspirin") is None
+        results = await asyncio.gather(*(runner("aspirin") for _ in range(5)))
+        assert all(r == {"term": "aspirin", "n": 1} for r in results)
+        assert runner.peek("aspirin", n=1) == {"term": "aspirin", "n": 1}
+        runner.prime({"term": "primed", "n": 2}, "primed", 2)
+        return await runner("primed", 2)
+
+    assert asyncio.run(run()) == {"term": "primed", "n": 2}
+    assert calls == ["aspirin"]
+
+
+def test_memoized_keeps_the_callers_casing():
+    @memoized("test-casing")
+    async def runner(term: str):
+        return {"term": term}
+
+    async def run():
+        return await runner("Aspirin"), await runner("aspirin")
+
+    assert asyncio.run(run()) == ({"term": "Aspirin"}, {"term": "aspirin"})
+
+
+def test_expiring_results_use_their_own_ttl():
+    @memoized("test-expiring")
+    async def runner(term: str):
+        return Expiring({"term": term}, 5)
+
+    async def run():
+        return await runner("aspirin")
+
+    assert asyncio.run(run()) == {"term": "aspirin"}
+    remaining = memo.RESULTS.expires_in(runner.key_for("aspirin"))
+    assert 0 < remaining <= 5
+
+
+def test_query_stats_keep_only_the_most_requested(tmp_path):
+    stats = QueryStats(maxsize=3)
+    for i in range(3):
+        for _ in range(5):
+            stats.record(("repurpose", f"popular {i}"), (f"popular {i}",))
+    for i in range(100):
+        stats.record(("repurpose", f"once {i}"), (f"once {i}",))
+        assert len(stats.counts) <= 6 and stats.args.keys() == stats.counts.keys()
+    assert [k for k, _ in stats.top(3)] == [("repurpose", f"popular {i}") for i in range(3)]
+
+    path = str(tmp_path / "stats.json")
+    stats.save(path)
+    loaded = QueryStats(maxsize=2)
+    loaded.load(path)
+    assert loaded.top(5) == [(("repurpose", "popular 0"), 5), (("repurpose", "popular 1"), 5)]
@@ -0,0 +1,120 @@
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from benchmarks.synthetic import efetch_xml
+from data_sources import http, ncbi
+from data_sources.http import UpstreamError
+from data_sources.ncbi import NcbiClient
+
+
+def record(pmid: str):
+    return {"pmid": pmid, "year": "2020", "title": f"Title {pmid}", "abstract": f"Abstract {pmid}"}
+
+
+def mock_upstream(monkeypatch, handler) -> None:
+    monkeypatch.setattr(http, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(ncbi, "BACKOFF_BASE", 0.001)
+
+
+def efetch_ids(request: httpx.Request):
+    return parse_qs(request.content.decode())["id"][0].split(",")
+
+
+def test_concurrent_callers_share_one_efetch_within_the_batch_window(monkeypatch):
+    seen = []
+
+    async def handler(request):
+        seen.append(request)
+        # PMID 404 does not exist, so efetch leaves it out.
+        return httpx.Response(200, content=efetch_xml([record(p) for p in efetch_ids(request) if p != "404"]))
+
+    mock_upstream(monkeypatch, handler)
+
+    async def run():
+        client = NcbiClient(rate=0)
+        return client, await asyncio.gather(
+            client.efetch_ids(["1", "2"]),
+            client.efetch_ids(["3", "404", "1"]),
+            client.efetch_ids(["4"]),
+        )
+
+    client, results = asyncio.run(run())
+    assert [[r["pmid"] for r in rs] for rs in results] == [["1", "2"], ["3", "1"], ["4"]]
+    assert len(seen) == 1
+    assert efetch_ids(seen[0]) == ["1", "2", "3", "404", "4"]
+    assert client.stats["batches"] == 1 and client.stats["batched_ids"] == 5
+
+
+def test_batches_are_split_at_max_batch(monkeypatch):
+    seen = []
+
+    async def handler(request):
+        seen.append(request)
+        return httpx.Response(200, content=efetch_xml([record(p) for p in efetch_ids(request)]))
+
+    mock_upstream(monkeypatch, handler)
+    monkeypatch.setattr(ncbi, "MAX_BATCH", 3)
+
+    async def run():
+        return await NcbiClient(rate=0).efetch_ids([str(i) for i in range(7)])
+
+    assert [r["pmid"] for r in asyncio.run(run())] == [str(i) for i in range(7)]
+    assert sorted(len(efetch_ids(r)) for r in seen) == [1, 3, 3]
+
+
+def test_server_errors_are_retried(monkeypatch):
+    responses = [httpx.Response(503), httpx.Response(429, headers={"Retry-After": "0"}),
+                 httpx.Response(200, json={"esearchresult": {"idlist": ["1"]}})]
+
+    async def handler(request):
+        return responses.pop(0)
+
+    mock_upstream(monkeypatch, handler)
+
+    async def run():
+        client = NcbiClient(rate=0)
+        return client, await client.get_json(ncbi.ESEARCH, {"term": "aspirin"})
+
+    client, result = asyncio.run(run())
+    assert result == {"esearchresult": {"idlist": ["1"]}}
+    assert client.stats["retries"] == 2 and client.stats["throttled"] == 1 and client.stats["failures"] == 0
+
+
+def test_exhausted_retries_raise_upstream_error(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        return httpx.Response(502)
+
+    mock_upstream(monkeypatch, handler)
+
+    async def run():
+        client = NcbiClient(rate=0)
+        # A failed batch fails every caller waiting on it.
+        return await asyncio.gather(client.efetch_ids(["1"]), client.efetch_ids(["2"]), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, UpstreamError) for r in results)
+    assert len(calls) == ncbi.MAX_RETRIES + 1
+
+
+@pytest.mark.parametrize("error", [httpx.ReadTimeout, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.ConnectError])
+def test_timeouts_and_refused_connections_are_not_retried(monkeypatch, error):
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        raise error("upstream unresponsive", request=request)
+
+    mock_upstream(monkeypatch, handler)
+
+    async def run():
+        return await NcbiClient(rate=0).get_json(ncbi.ESEARCH, {"term": "aspirin"})
+
+    with pytest.raises(error):
+        asyncio.run(run())
+    assert len(calls) == 1
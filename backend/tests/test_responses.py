@@ -0,0 +1,47 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from api.responses import parse_fields, shape
+from utils.evidence import Ranked
+
+ITEMS = [{"disease": f"d{i}", "confidence": 1 - i / 10, "sources": [str(i)]} for i in range(5)]
+
+
+def served(response):
+    return json.loads(response.body)
+
+
+def test_shape_without_paging_or_fields_serves_the_body_as_is():
+    body = {"drug": "aspirin", "opportunities": ITEMS}
+    assert served(shape(body, "opportunities")) == body
+
+
+def test_shape_pages_and_reports_the_unpaged_total():
+    out = served(shape({"drug": "aspirin", "opportunities": ITEMS}, "opportunities", limit=2, offset=1))
+    assert [i["disease"] for i in out["opportunities"]] == ["d1", "d2"]
+    assert out["total"] == 5
+    assert served(shape({"opportunities": ITEMS}, "opportunities", offset=4))["opportunities"] == ITEMS[4:]
+
+
+def test_shape_reports_the_candidate_count_of_a_top_k_list():
+    # A builder asked for the top 3 of 36 candidates.
+    out = served(shape({"opportunities": Ranked(ITEMS[:3], 36)}, "opportunities", limit=2, offset=1))
+    assert [i["disease"] for i in out["opportunities"]] == ["d1", "d2"]
+    assert out["total"] == 36
+    assert served(shape({"opportunities": Ranked([], 36)}, "opportunities", limit=0))["total"] == 36
+
+
+def test_shape_projects_items():
+    out = served(shape({"opportunities": ITEMS}, "opportunities", fields="disease", limit=1))
+    assert out["opportunities"] == [{"disease": "d0"}]
+    out = served(shape({"opportunities": ITEMS}, "opportunities", fields="-sources,-confidence"))
+    assert out["opportunities"] == [{"disease": f"d{i}"} for i in range(5)]
+    assert "total" not in out
+
+
+def test_parse_fields_rejects_mixed_keep_and_drop():
+    assert parse_fields(" , ") is None
+    with pytest.raises(HTTPException):
+        parse_fields("a,-b")
@@ -0,0 +1,50 @@
+import random
+
+import numpy as np
+import pytest
+
+from api.pipeline import build_opportunities
+from utils.evidence import EvidenceTable
+from utils.scoring import score_opportunity
+
+PHASES = ["", "Phase 1", "Phase 2", "Phase 3", "Phase 2/Phase 3"]
+
+
+def random_evidence(rng: random.Random):
+    evidence = {}
+    for c in range(200):
+        items = []
+        for s in range(rng.randint(1, 12)):
+            if rng.random() < 0.5:
+                items.append({"type": "trial", "title": "t", "source_id": f"NCT{c}-{s}",
+                              "phase": rng.choice(PHASES), "status": "Completed"})
+            else:
+                items.append({"type": "literature", "title": "a", "source_id": f"PMID{c}-{s}",
+                              "relevance": rng.choice([1.0, 0.5, 0.25])})
+        evidence[f"candidate {c}"] = items
+    return evidence
+
+
+def test_vectorized_scores_match_per_candidate_scores():
+    evidence = random_evidence(random.Random(7))
+    table = EvidenceTable.from_map(evidence)
+    expected = [score_opportunity("drug", name, ev) for name, ev in evidence.items()]
+    assert np.allclose(table.scores(), expected)
+
+
+@pytest.mark.parametrize("limit", [0, 1, 5, 37, 199, 200, 500])
+def test_top_k_ranking_is_a_prefix_of_the_full_ranking(limit):
+    table = EvidenceTable.from_map(random_evidence(random.Random(11)))
+    scores = table.scores()
+    assert table.ranking(scores, limit).tolist() == table.ranking(scores).tolist()[:limit]
+
+
+def test_builder_limit_keeps_the_best_items():
+    abstracts = [{"pmid": str(i), "title": f"Metformin in breast cancer {i}", "abstract": "breast cancer and diabetes"}
+                 for i in range(5)]
+    trials = [{"title": "Metformin trial", "source_id": "NCT1", "phase": "Phase 3", "status": "Completed",
+               "conditions": ["Polycystic Ovary Syndrome", "Obesity", "Breast Cancer"], "interventions": ["Metformin"]}]
+    full = build_opportunities("metformin", abstracts, trials, fallback=False)
+    top = build_opportunities("metformin", abstracts, trials, fallback=False, limit=2)
+    assert top == full[:2]
+    assert top.total == full.total == len(full) > 2
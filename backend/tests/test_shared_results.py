@@ -0,0 +1,32 @@
+import sqlite3
+import time
+
+from utils.memo import SharedResults, _MISSING
+
+
+def test_roundtrip_and_expiry(tmp_path):
+    shared = SharedResults(str(tmp_path / "results.sqlite3"), ttl=60)
+    shared.set(("repurpose", "aspirin", 15), {"drug": "aspirin"})
+    shared.set(("repurpose", "gone", 15), {"drug": "gone"}, ttl=-1)
+    value, remaining = shared.get(("repurpose", "aspirin", 15))
+    assert value == {"drug": "aspirin"} and 0 < remaining <= 60
+    assert shared.get(("repurpose", "gone", 15))[0] is _MISSING
+
+
+def test_locked_database_is_a_skipped_write_not_a_wait(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    shared = SharedResults(path, ttl=60)
+    shared.set(("k", 1), "before")
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")  # another worker holds the write lock
+    try:
+        start = time.perf_counter()
+        shared.set(("k", 2), "during")
+        assert time.perf_counter() - start < 1
+        assert shared.get(("k", 1))[0] == "before"  # WAL readers are not blocked
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+    assert shared.get(("k", 2))[0] is _MISSING
+    shared.set(("k", 2), "after")
+    assert shared.get(("k", 2))[0] == "after"
@@ -0,0 +1,44 @@
+import numpy as np
+
+from nlp import tfidf
+
+
+def article(pmid, title, abstract):
+    return {"pmid": pmid, "title": title, "abstract": abstract}
+
+
+ON_TOPIC = [
+    article("1", "Metformin in breast cancer", "Metformin lowers insulin and slows breast tumor growth in mice."),
+    article("2", "Metformin and breast tumor metabolism", "AMPK activation by metformin in breast cancer cells."),
+    article("3", "Breast cancer outcomes with metformin", "Diabetic women on metformin had fewer breast tumor recurrences."),
+]
+OFF_TOPIC = article("4", "Hospital parking survey", "Visitors rated parking availability and signage at the hospital.")
+
+
+def test_relevance_weights_on_topic_abstracts_higher():
+    weights = tfidf.relevance(ON_TOPIC + [OFF_TOPIC], "metformin")
+    assert weights.shape == (4,)
+    assert np.all((weights >= tfidf.MIN_RELEVANCE) & (weights <= 1.0))
+    assert weights.max() == 1.0
+    assert weights[:3].min() > weights[3]
+
+
+def test_relevance_uses_the_drug_profile_when_indexed(tmp_path, monkeypatch):
+    corpus = ON_TOPIC + [
+        article("5", "Metformin for breast cancer prevention", "Metformin and breast tumor risk."),
+        article("6", "Aspirin and colorectal cancer", "Aspirin reduced colorectal adenoma recurrence."),
+        article("7", "Aspirin in colorectal adenoma", "Low dose aspirin and colorectal polyps."),
+    ]
+    tfidf.build_tfidf(corpus, str(tmp_path), min_df=1, max_df=1.0)
+    monkeypatch.setattr(tfidf, "_index", tfidf.TfidfIndex(str(tmp_path)))
+    weights = tfidf.relevance([corpus[5], corpus[0]], "metformin")
+    assert weights[1] == 1.0 and weights[0] < weights[1]
+
+
+def test_weighting_is_opt_in(monkeypatch):
+    assert tfidf.with_relevance(ON_TOPIC, "metformin") is ON_TOPIC
+    monkeypatch.setattr(tfidf, "RELEVANCE_WEIGHTS", True)
+    weighted = tfidf.with_relevance(ON_TOPIC + [OFF_TOPIC], "metformin")
+    assert [a["pmid"] for a in weighted] == ["1", "2", "3", "4"]
+    assert weighted[3]["relevance"] < min(a["relevance"] for a in weighted[:3])
+    assert "relevance" not in ON_TOPIC[0]
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from api import pipeline
+from data_sources import tracked
+from data_sources.tracked import TrackedStore, refresh_tracked
+from utils.memo import TTLCache
+
+PUBMED = [str(i) for i in range(1, 26)]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = TrackedStore(str(tmp_path / "tracked.sqlite3"))
+    monkeypatch.setattr(tracked, "_store", store)
+    monkeypatch.setattr(tracked, "ID_PAGE_SIZE", 10)
+
+    async def search_pmids(term, retmax, since=None, retstart=0):
+        return PUBMED[retstart:retstart + retmax]
+
+    async def fetch_pmids(pmids):
+        return [{"pmid": p, "title": f"Article {p}"} for p in pmids]
+
+    async def iter_trials(term, max_records=20, since=None):
+        for i in range(min(max_records, 3)):
+            yield {"nct_id": f"NCT{i}", "title": f"Trial {i}"}
+
+    monkeypatch.setattr(tracked, "search_pmids", search_pmids)
+    monkeypatch.setattr(tracked, "fetch_pmids", fetch_pmids)
+    monkeypatch.setattr(tracked, "iter_trials", iter_trials)
+    return store
+
+
+def test_truncated_delta_keeps_last_sync_until_fetched(store, monkeypatch):
+    store.track("aspirin", "drug", 5)
+    first = asyncio.run(refresh_tracked("aspirin"))
+    assert first["full_sync"] and first["new_articles"] == 5 and not first["truncated"]
+
+    monkeypatch.setattr(tracked, "DELTA_MAX_RECORDS", 12)
+    second = asyncio.run(refresh_tracked("aspirin"))
+    assert second["new_articles"] == 12
+    assert second["truncated"] and second["pending_articles"] == 8
+    assert store.get("aspirin")["last_sync"] == first["last_sync"]
+
+    third = asyncio.run(refresh_tracked("aspirin"))
+    assert third["new_articles"] == 8 and not third["truncated"]
+    assert store.get("aspirin")["last_sync"] == third["last_sync"] > first["last_sync"]
+    assert len(store.known_ids("aspirin", "pubmed")) == len(PUBMED)
+
+
+def test_tracked_bodies_are_rebuilt_only_after_new_records(store, monkeypatch):
+    monkeypatch.setattr(pipeline, "TRACKED_RESULTS", TTLCache(maxsize=8, ttl=60))
+    built = []
+
+    def build(abstracts, trials):
+        built.append(len(abstracts))
+        return {"articles": len(abstracts), "trials": len(trials)}
+
+    async def read():
+        return await pipeline.run_tracked("aspirin", store.get("aspirin"), build)
+
+    store.track("aspirin", "drug", 5)
+    asyncio.run(refresh_tracked("aspirin"))
+    assert asyncio.run(read()) == asyncio.run(read()) == {"articles": 5, "trials": 3}
+    assert built == [5]
+
+    asyncio.run(refresh_tracked("aspirin"))
+    assert asyncio.run(read()) == {"articles": len(PUBMED), "trials": 3}
+    assert built == [5, len(PUBMED)]
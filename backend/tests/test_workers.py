@@ -0,0 +1,44 @@
+import asyncio
+
+from workers.base import Worker
+
+DELAYS = {"fast": 0.0, "quick": 0.01, "slow": 0.3}
+
+
+async def lookup(drug: str):
+    await asyncio.sleep(DELAYS[drug])
+    return {"drug": drug}
+
+
+def test_slow_key_does_not_discard_finished_results():
+    async def run():
+        worker = Worker("test", lookup, key=("drug",), timeout=0.1)
+        candidates = [{"drug": d} for d in ("fast", "slow", "quick")]
+        first = await worker.resolve(candidates)
+        assert first == [{"drug": "fast"}, worker.fallback, {"drug": "quick"}]
+        assert len(worker.cache) == 2
+        # The slow lookup keeps running and is cached when it lands.
+        await asyncio.sleep(0.3)
+        return await worker.resolve(candidates)
+
+    assert asyncio.run(run()) == [{"drug": "fast"}, {"drug": "slow"}, {"drug": "quick"}]
+
+
+def test_failed_lookups_fall_back_and_are_not_cached():
+    calls = []
+
+    def flaky(drug: str):
+        calls.append(drug)
+        if drug == "bad":
+            raise RuntimeError("upstream down")
+        return {"drug": drug}
+
+    async def run():
+        worker = Worker("test", flaky, key=("drug",))
+        out = await worker.resolve([{"drug": "good"}, {"drug": "bad"}])
+        again = await worker.resolve([{"drug": "good"}, {"drug": "bad"}])
+        return worker, out, again
+
+    worker, out, again = asyncio.run(run())
+    assert out == again == [{"drug": "good"}, worker.fallback]
+    assert calls == ["good", "bad", "bad"]
@@ -0,0 +1,33 @@
+import os
+import sqlite3
+
+# How long a writer waits for another process's write lock before failing.
+BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+# Caches run their queries on the event loop; they wait at most this long
+# for a lock held by another worker and treat it as a miss.
+CACHE_BUSY_TIMEOUT = float(os.getenv("CACHE_BUSY_TIMEOUT", "0.05"))
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """SQLite connection that several threads and worker processes can share.
+
+    WAL lets readers in every worker proceed while one process writes;
+    synchronous=NORMAL is durable across process crashes, which is all a
+    cache needs.
+    """
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def fail_fast(conn: sqlite3.Connection, timeout: float = CACHE_BUSY_TIMEOUT) -> None:
+    """Shorten `conn`'s busy timeout once its schema is set up (see CACHE_BUSY_TIMEOUT).
+
+    Queries then raise sqlite3.OperationalError instead of blocking the
+    caller while another process writes.
+    """
+    conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
@@ -1,138 +1,151 @@
-from typing import Dict, List
-
-def demo_evidence(drug: str) -> Dict[str, List[dict]]:
-    d = drug.strip().lower()
-    data: Dict[str, Dict[str, List[dict]]] = {
-        "metformin": {
-            "Breast Cancer": [
-                {"type": "literature", "title": "Metformin and tumor metabolism", "source_id": "PMID:demo1"},
-                {"type": "trial", "title": "Metformin in HER2- breast cancer", "phase": "Phase 2", "status": "Recruiting", "source_id": "NCT:demo1"},
-            ],
-            "Alzheimer's Disease": [
-                {"type": "literature", "title": "AMPK activation and neuroprotection", "source_id": "PMID:demo2"},
-            ],
-            "Polycystic Ovary Syndrome": [
-                {"type": "trial", "title": "Metformin in PCOS", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demo2"},
-            ],
-        },
-        "aspirin": {
-            "Colorectal Cancer": [
-                {"type": "literature", "title": "Aspirin and colorectal cancer chemoprevention", "source_id": "PMID:demo3"},
-            ],
-            "Preeclampsia": [
-                {"type": "trial", "title": "Low-dose aspirin for preeclampsia prevention", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demo3"},
-            ],
-            "COVID-19": [
-                {"type": "literature", "title": "Antiplatelet therapy and COVID coagulopathy", "source_id": "PMID:demo4"},
-            ],
-        },
-        "propranolol": {
-            "Infantile Hemangioma": [
-                {"type": "trial", "title": "Propranolol for hemangioma", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demo4"},
-            ],
-            "PTSD": [
-                {"type": "literature", "title": "Beta-blockade and memory reconsolidation", "source_id": "PMID:demo5"},
-            ],
-        },
-        "atorvastatin": {
-            "Sepsis": [
-                {"type": "literature", "title": "Statins and inflammation modulation in sepsis", "source_id": "PMID:demo6"},
-            ],
-            "Multiple Sclerosis": [
-                {"type": "trial", "title": "Atorvastatin adjunct in MS", "phase": "Phase 2", "status": "Completed", "source_id": "NCT:demo5"},
-            ],
-        },
-    }
-    return data.get(d, {})
-
-
-def demo_treatments(condition: str) -> Dict[str, List[dict]]:
-    c = condition.strip().lower()
-    data: Dict[str, Dict[str, List[dict]]] = {
-        "migraine": {
-            "Sumatriptan": [
-                {"type": "trial", "title": "Sumatriptan in acute migraine", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demoM1"}
-            ],
-            "Propranolol": [
-                {"type": "literature", "title": "Beta-blockers for migraine prophylaxis", "source_id": "PMID:demoM2"}
-            ],
-        },
-        "asthma": {
-            "Salbutamol": [
-                {"type": "trial", "title": "Albuterol efficacy in asthma", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demoA1"}
-            ],
-            "Montelukast": [
-                {"type": "literature", "title": "Leukotriene antagonists in asthma control", "source_id": "PMID:demoA2"}
-            ],
-        },
-        "hypertension": {
-            "Amlodipine": [
-                {"type": "trial", "title": "Amlodipine monotherapy in hypertension", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demoH1"}
-            ],
-            "Losartan": [
-                {"type": "literature", "title": "ARB therapy outcomes", "source_id": "PMID:demoH2"}
-            ],
-        },
-        "diabetes": {
-            "Metformin": [
-                {"type": "trial", "title": "Metformin outcomes in T2D", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demoD1"}
-            ],
-            "Empagliflozin": [
-                {"type": "literature", "title": "SGLT2 inhibitors and cardio-renal benefit", "source_id": "PMID:demoD2"}
-            ],
-        },
-    }
-    return data.get(c, {})
+import json
+import os
+import re
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
 
+from nlp.lexicon import get_drug_lexicon
 
-def _normalize_condition(name: str) -> str:
-    n = (name or "").strip().lower()
-    aliases = {
-        "migrane": "migraine",
-        "covid": "covid-19",
-        "hbp": "hypertension",
-        "bp": "hypertension",
-    }
-    return aliases.get(n, n)
-
-
-def demo_treatments(condition: str) -> Dict[str, List[dict]]:
-    c = _normalize_condition(condition)
-    data: Dict[str, Dict[str, List[dict]]] = {
-        "migraine": {
-            "Sumatriptan": [
-                {"type": "trial", "title": "Sumatriptan for acute migraine", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demo7"},
-            ],
-            "Propranolol": [
-                {"type": "literature", "title": "Beta-blockers for migraine prophylaxis", "source_id": "PMID:demo8"},
-            ],
-            "Topiramate": [
-                {"type": "trial", "title": "Topiramate in episodic migraine prevention", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demo9"},
-            ],
-        },
-        "asthma": {
-            "Budesonide": [
-                {"type": "trial", "title": "ICS therapy in persistent asthma", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demo10"},
-            ],
-            "Montelukast": [
-                {"type": "literature", "title": "Leukotriene receptor antagonists in asthma", "source_id": "PMID:demo11"},
-            ],
-        },
-        "hypertension": {
-            "Losartan": [
-                {"type": "trial", "title": "ARB efficacy in stage 1 hypertension", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demo12"},
-            ],
-            "Amlodipine": [
-                {"type": "literature", "title": "Calcium-channel blockers in hypertension management", "source_id": "PMID:demo13"},
-            ],
-        },
-        "covid-19": {
-            "Dexamethasone": [
-                {"type": "trial", "title": "RECOVERY: Dexamethasone in hospitalized COVID-19", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demo14"},
-            ],
-            "Remdesivir": [
-                {"type": "trial", "title": "Antiviral therapy and time-to-recovery", "phase": "Phase 3", "status": "Completed", "source_id": "NCT:demo15"},
-            ],
-        },
+DEMO_DATA_PATH = os.getenv(
+    "DEMO_DATA_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "demo.json")
+)
+# Misspellings are matched only in names at least this long, and only one edit away.
+FUZZY_MIN_LENGTH = 5
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_DIGITS = re.compile(r"\d")
+_EMPTY: Mapping[str, Sequence[Mapping]] = MappingProxyType({})
+
+
+def _key(name: str) -> str:
+    """Lowercase words only: "Alzheimer's" -> "alzheimers", "COVID-19" -> "covid 19"."""
+    return _NON_WORD.sub(" ", (name or "").lower().replace("'", "")).strip()
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if `a` and `b` differ by at most one insertion, deletion or substitution."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i + (len(a) == len(b)):] == b[i + 1:]
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class DemoIndex:
+    """Read-only curated entries with exact and near-miss lookup.
+
+    Every name and alias is normalized once, and a deletion index over the
+    names finds misspellings one edit away, so lookups are a few dict
+    probes and return the shared frozen entry without copying. Matching is
+    deliberately narrow: a fallback answer for a different drug or
+    condition is worse than none.
+    """
+
+    def __init__(
+        self,
+        entries: Dict[str, Dict[str, List[dict]]],
+        aliases: Optional[Dict[str, str]] = None,
+        normalize: Optional[Callable[[str], str]] = None,
+    ):
+        self.entries: Mapping[str, Mapping[str, Sequence[Mapping]]] = _freeze(
+            {_key(name): value for name, value in entries.items()}
+        )
+        self.normalize = normalize
+        keys: Dict[str, str] = {k: k for k in self.entries}
+        for name in self.entries:
+            # "alzheimers disease" is also found as "alzheimers".
+            if name.endswith(" disease"):
+                keys.setdefault(name[:-len(" disease")], name)
+        for alias, target in (aliases or {}).items():
+            if _key(target) in self.entries:
+                keys.setdefault(_key(alias), _key(target))
+        self._keys = keys
+
+        # Each name under itself and every one-character deletion; a query
+        # within one edit of a name shares at least one of these variants.
+        deletions: Dict[str, set] = {}
+        for name in keys:
+            if len(name) < FUZZY_MIN_LENGTH:
+                continue
+            for variant in {name} | {name[:i] + name[i + 1:] for i in range(len(name))}:
+                deletions.setdefault(variant, set()).add(name)
+        self._deletions = {v: tuple(names) for v, names in deletions.items()}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def resolve(self, query: str) -> Optional[str]:
+        """Entry name for `query`, or None.
+
+        Tries the exact name or alias, then (when the index has a
+        `normalize`, e.g. DrugLexicon.normalize) the name with dose, salt
+        and formulation words removed ("Metformin HCl 500 mg" ->
+        metformin), then a single name one edit away ("migrane" ->
+        migraine) for queries of at least FUZZY_MIN_LENGTH characters.
+        """
+        key = _key(query)
+        if not key:
+            return None
+        hit = self._keys.get(key)
+        if hit is None and self.normalize is not None:
+            hit = self._keys.get(_key(self.normalize(query)))
+        if hit is None and len(key) >= FUZZY_MIN_LENGTH:
+            hit = self._near(key)
+        return hit
+
+    def _near(self, key: str) -> Optional[str]:
+        candidates = set()
+        for variant in {key} | {key[:i] + key[i + 1:] for i in range(len(key))}:
+            candidates.update(self._deletions.get(variant, ()))
+        digits = _DIGITS.findall(key)
+        # An edit that changes a number names something else ("type 1" vs "type 2").
+        targets = {self._keys[n] for n in candidates if _within_one_edit(key, n) and _DIGITS.findall(n) == digits}
+        # Ambiguous misspellings resolve to nothing.
+        return targets.pop() if len(targets) == 1 else None
+
+    def get(self, query: str) -> Mapping[str, Sequence[Mapping]]:
+        hit = self.resolve(query)
+        return self.entries[hit] if hit is not None else _EMPTY
+
+
+def load_demo(path: str = DEMO_DATA_PATH) -> Dict[str, DemoIndex]:
+    """`{"evidence": {drug: {...}}, "treatments": {condition: {...}}, "aliases": {section: {alias: name}}}`."""
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    aliases = data.get("aliases", {})
+    return {
+        "evidence": DemoIndex(data.get("evidence", {}), aliases.get("evidence"), get_drug_lexicon().normalize),
+        "treatments": DemoIndex(data.get("treatments", {}), aliases.get("treatments")),
     }
-    return data.get(c, {})
+
+
+_demo: Optional[Dict[str, DemoIndex]] = None
+
+
+def get_demo_index() -> Dict[str, DemoIndex]:
+    """Process-wide indexes over DEMO_DATA_PATH, by section."""
+    global _demo
+    if _demo is None:
+        _demo = load_demo(DEMO_DATA_PATH)
+    return _demo
+
+
+def demo_evidence(drug: str) -> Mapping[str, Sequence[Mapping]]:
+    """Curated disease -> evidence for `drug`; empty when there is none."""
+    return get_demo_index()["evidence"].get(drug)
+
+
+def demo_treatments(condition: str) -> Mapping[str, Sequence[Mapping]]:
+    """Curated medicine -> evidence for `condition`; empty when there is none."""
+    return get_demo_index()["treatments"].get(condition)
@@ -0,0 +1,137 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.scoring import phase_rank, score_counts
+
+# Columns of EvidenceTable.counts
+TRIALS, LITS = 0, 1
+RANK0 = 2  # RANK0 + r is the number of trials whose phase ranks r (0-3)
+
+
+class Ranked(list):
+    """Ranked items, possibly cut to a limit; `total` counts every candidate."""
+
+    def __init__(self, items=(), total: Optional[int] = None):
+        super().__init__(items)
+        self.total = len(self) if total is None else total
+
+
+class EvidenceTable:
+    """Candidate -> evidence aggregate built in a single pass.
+
+    Source records (a trial or an abstract) are interned once and referenced
+    by index, so a trial listing five conditions costs one tuple and five
+    ints instead of five dict copies. Per-candidate counters (trials,
+    publications, phase histogram, status counts) are updated as evidence is
+    added, which lets scoring and summaries skip re-filtering evidence lists.
+    Literature sources may carry a relevance weight (see nlp.tfidf); scoring
+    counts each publication by its weight.
+    """
+
+    def __init__(self):
+        self.sources: List[Tuple[str, str, str, str, str]] = []  # (type, title, source_id, phase, status)
+        self._source_ranks: List[int] = []
+        self._source_weights: List[float] = []
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.refs: List[List[int]] = []
+        self.counts: List[List[int]] = []
+        self.lit_weights: List[float] = []
+        self.statuses: List[Dict[str, int]] = []
+        self.phases: List[Dict[str, None]] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __bool__(self) -> bool:
+        return bool(self.names)
+
+    def source(self, type_: str, title: str, source_id: str, phase: str = "", status: str = "", relevance: float = 1.0) -> int:
+        self.sources.append((type_, title, source_id, phase, status))
+        self._source_ranks.append(phase_rank(phase) if type_ == "trial" else 0)
+        self._source_weights.append(relevance)
+        return len(self.sources) - 1
+
+    def add(self, name: str, src: int) -> None:
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids[name] = len(self.names)
+            self.names.append(name)
+            self.refs.append([])
+            self.counts.append([0, 0, 0, 0, 0, 0])
+            self.lit_weights.append(0.0)
+            self.statuses.append({})
+            self.phases.append({})
+        self.refs[i].append(src)
+        type_, _, _, phase, status = self.sources[src]
+        c = self.counts[i]
+        if type_ == "trial":
+            c[TRIALS] += 1
+            c[RANK0 + self._source_ranks[src]] += 1
+            if phase:
+                self.phases[i][phase] = None
+            if status:
+                statuses = self.statuses[i]
+                statuses[status] = statuses.get(status, 0) + 1
+        elif type_ == "literature":
+            c[LITS] += 1
+            self.lit_weights[i] += self._source_weights[src]
+
+    @classmethod
+    def from_map(cls, evidence_map: Dict[str, List[dict]]) -> "EvidenceTable":
+        """Build from the dict-of-lists form (e.g. curated demo data)."""
+        table = cls()
+        for name, evidence in evidence_map.items():
+            for e in evidence:
+                src = table.source(e.get("type", ""), e.get("title", ""), e.get("source_id", ""),
+                                   e.get("phase", ""), e.get("status", ""), e.get("relevance", 1.0))
+                table.add(name, src)
+        return table
+
+    def evidence(self, i: int) -> List[dict]:
+        out = []
+        for src in self.refs[i]:
+            type_, title, source_id, phase, status = self.sources[src]
+            e = {"type": type_, "title": title, "source_id": source_id}
+            if type_ == "trial":
+                e["phase"] = phase
+                e["status"] = status
+            elif self._source_weights[src] != 1.0:
+                e["relevance"] = self._source_weights[src]
+            out.append(e)
+        return out
+
+    def to_map(self) -> Dict[str, List[dict]]:
+        return {name: self.evidence(i) for i, name in enumerate(self.names)}
+
+    def source_ids(self, i: int) -> List[str]:
+        return list(dict.fromkeys(self.sources[s][2] for s in self.refs[i] if self.sources[s][2]))
+
+    def top_phase(self, i: int) -> int:
+        c = self.counts[i]
+        return next((r for r in (3, 2, 1) if c[RANK0 + r]), 0)
+
+    def scores(self) -> np.ndarray:
+        """Confidence for every candidate in one vectorized call (see utils.scoring)."""
+        counts = np.array(self.counts, dtype=np.float64).reshape(-1, 6)
+        counts[:, LITS] = self.lit_weights
+        return score_counts(counts)
+
+    def ranking(self, scores: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+        """Candidate indices by descending rounded score, ties in insertion order.
+
+        With `limit`, only the best `limit` candidates are selected
+        (argpartition) before sorting.
+        """
+        rounded = np.round(scores, 2)
+        idx = np.arange(len(rounded))
+        if limit is not None and limit < len(rounded):
+            idx = np.argpartition(-rounded, limit)[:limit] if limit > 0 else idx[:0]
+            # argpartition splits ties at the cut arbitrarily; keep the earliest.
+            cut = rounded[idx].min() if len(idx) else None
+            if cut is not None:
+                above = np.flatnonzero(rounded > cut)
+                ties = np.flatnonzero(rounded == cut)[:limit - len(above)]
+                idx = np.concatenate([above, ties])
+        return idx[np.lexsort((idx, -rounded[idx]))]
@@ -0,0 +1,282 @@
+import asyncio
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from utils.db import connect, fail_fast
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Size-bounded LRU whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Seconds until `key` expires, or None if absent; does not count as a lookup."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        remaining = entry[1] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedResults:
+    """Second result tier in SQLite, shared by every worker process on the host.
+
+    A result computed by one worker is served by all of them; entries keep
+    the expiry they were stored with. Lookups and writes run on the event
+    loop, so a database locked by another worker counts as a miss (or a
+    skipped write) rather than a wait.
+    """
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        fail_fast(self._conn)
+
+    def get(self, key: Tuple) -> Tuple[Any, float]:
+        """(value, seconds left), or (_MISSING, 0)."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM results WHERE key = ?", (json.dumps(key),)
+                ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        remaining = row[1] - time.time() if row else 0
+        if remaining <= 0:
+            self.misses += 1
+            return _MISSING, 0
+        self.hits += 1
+        return json.loads(row[0]), remaining
+
+    def set(self, key: Tuple, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                    (json.dumps(key), json.dumps(value), now + (self.ttl if ttl is None else ttl)),
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    self._conn.execute("DELETE FROM results WHERE expires_at < ?", (now,))
+                self._conn.commit()
+            except sqlite3.OperationalError:
+                self._conn.rollback()  # another worker holds the lock; this process's LRU still has it
+
+
+class QueryStats:
+    """How often each memoized runner is asked for each argument set.
+
+    At most `maxsize` argument sets are kept: once twice as many have been
+    seen, only the `maxsize` most requested survive, so one-off queries
+    (free-text terms, arbitrary max_records) cannot grow it without bound.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.counts: Counter = Counter()
+        self.args: Dict[Tuple, Tuple] = {}
+
+    def record(self, key: Tuple, args: Tuple) -> None:
+        self.counts[key] += 1
+        self.args[key] = args
+        if len(self.counts) > 2 * self.maxsize:
+            self._prune()
+
+    def _prune(self) -> None:
+        self.counts = Counter(dict(self.counts.most_common(self.maxsize)))
+        self.args = {k: self.args[k] for k in self.counts}
+
+    def top(self, n: int) -> List[Tuple[Tuple, int]]:
+        return self.counts.most_common(n)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rows = [{"key": list(k), "args": list(self.args[k]), "count": n} for k, n in self.counts.most_common(self.maxsize)]
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(rows, fh)
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> None:
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as fh:
+            for row in json.load(fh):
+                key = tuple(row["key"])
+                self.counts[key] = max(self.counts[key], row["count"])
+                self.args[key] = tuple(row["args"])
+        if len(self.counts) > self.maxsize:
+            self._prune()
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one in-flight task."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shield so one disconnecting client does not cancel the shared work.
+        return await asyncio.shield(task)
+
+
+class Expiring(NamedTuple):
+    """A memoized result to keep for `ttl` seconds instead of the cache's TTL.
+
+    Runners return one for results built from incomplete data, so a
+    transient upstream failure is not served for the full TTL.
+    """
+
+    value: Any
+    ttl: float
+
+
+RESULTS = TTLCache(
+    maxsize=int(os.getenv("RESULT_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("RESULT_CACHE_TTL", "600")),
+)
+# TTL for Expiring results built while an upstream failed or came back empty.
+DEGRADED_RESULT_TTL = float(os.getenv("DEGRADED_RESULT_TTL", "30"))
+# Set (main.py does so for multi-worker runs) to share results across processes.
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "")
+_shared: Optional[SharedResults] = None
+_flight = SingleFlight()
+QUERIES = QueryStats(int(os.getenv("QUERY_STATS_SIZE", "10000")))
+# endpoint -> memoized runner, so the cache warmer can recompute any key.
+RUNNERS: Dict[str, Callable] = {}
+
+
+def get_shared_results() -> Optional[SharedResults]:
+    global _shared
+    if _shared is None and RESULT_CACHE_PATH:
+        _shared = SharedResults(RESULT_CACHE_PATH, RESULTS.ttl)
+    return _shared
+
+
+def _lookup_shared(key: Tuple) -> Any:
+    shared = get_shared_results()
+    if shared is None:
+        return _MISSING
+    value, remaining = shared.get(key)
+    if value is not _MISSING:
+        RESULTS.set(key, value, remaining)
+    return value
+
+
+def _lookup(key: Tuple) -> Any:
+    value = RESULTS.get(key)
+    return _lookup_shared(key) if value is _MISSING else value
+
+
+def _store(key: Tuple, result: Any) -> Any:
+    """Cache a result (or an Expiring one) in both tiers; returns the bare value."""
+    value, ttl = result if isinstance(result, Expiring) else (result, None)
+    RESULTS.set(key, value, ttl)
+    shared = get_shared_results()
+    if shared is not None:
+        shared.set(key, value, ttl)
+    return value
+
+
+def memoized(endpoint: str):
+    """Memoize an async result builder by endpoint and arguments.
+
+    Arguments are not case-folded: bodies echo the caller's term (also in
+    summaries), and the upstream cache below already shares fetches across
+    spellings. `fn` may return an Expiring result to shorten its TTL.
+    """
+    def decorator(fn):
+        sig = inspect.signature(fn)
+
+        def key_for(*args, **kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return (endpoint,) + tuple(bound.arguments.values())
+
+        def requested(*args, **kwargs):
+            key = key_for(*args, **kwargs)
+            QUERIES.record(key, key[1:])
+            return key
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = requested(*args, **kwargs)
+            value = RESULTS.get(key)
+            if value is not _MISSING:
+                return value
+
+            async def compute():
+                # The shared tier is checked once per key, inside the single flight.
+                result = _lookup_shared(key)
+                if result is _MISSING:
+                    result = _store(key, await fn(*args, **kwargs))
+                return result
+
+            return await _flight.do(key, compute)
+
+        def peek(*args, **kwargs):
+            """Cached result for these arguments, or None; never computes."""
+            value = _lookup(requested(*args, **kwargs))
+            return None if value is _MISSING else value
+
+        def prime(result, *args, **kwargs):
+            """Store a result (or an Expiring one) computed elsewhere, e.g. by a streaming run."""
+            _store(key_for(*args, **kwargs), result)
+
+        wrapper.peek = peek
+        wrapper.prime = prime
+        wrapper.key_for = key_for
+        RUNNERS[endpoint] = wrapper
+        return wrapper
+    return decorator
@@ -0,0 +1,146 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Latency buckets in seconds, from cheap in-process stages to slow upstreams.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Stage durations of the request being served: {stage: [seconds, calls]}.
+_timings: contextvars.ContextVar[Optional[Dict[str, List[float]]]] = contextvars.ContextVar("timings", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Metrics:
+    """Process-wide histograms and counters, keyed by metric name and label values."""
+
+    def __init__(self):
+        self.histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], Histogram]] = {}
+        self.counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self.help: Dict[str, str] = {}
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        series = self.histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = Histogram()
+        hist.observe(seconds)
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + amount
+
+
+METRICS = Metrics()
+METRICS.help.update({
+    "http_request_seconds": "End-to-end latency per route.",
+    "stage_seconds": "Time spent per pipeline stage.",
+    "upstream_request_seconds": "Latency of individual upstream HTTP calls.",
+    "upstream_errors_total": "Upstream calls that raised, by exception type.",
+})
+
+
+def record(stage: str, seconds: float) -> None:
+    """Account `seconds` to `stage` in the metrics and the current request's Server-Timing."""
+    METRICS.observe("stage_seconds", seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        entry = timings.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    """Decorator form of stage() for sync and async functions."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_request() -> Dict[str, List[float]]:
+    timings: Dict[str, List[float]] = {}
+    _timings.set(timings)
+    return timings
+
+
+def server_timing(timings: Dict[str, List[float]], total: float, name: str = "total") -> str:
+    """Format stage timings as a Server-Timing header value (durations in ms); `total` is reported as `name`."""
+    parts = [f'{stage};dur={seconds * 1000:.2f};desc="{calls} call(s)"' for stage, (seconds, calls) in timings.items()]
+    parts.append(f"{name};dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def _labels(key: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    items = [f"{k}={_quote(v)}" for k, v in key]
+    if extra:
+        items.append(extra)
+    return "{" + ",".join(items) + "}" if items else ""
+
+
+def _quote(value) -> str:
+    return '"' + str(value) + '"'
+
+
+def render(prefix: str = "drugapi_", snapshot: Optional[Dict[str, Dict[Tuple[Tuple[str, str], ...], float]]] = None) -> str:
+    """Prometheus text exposition of METRICS plus counters owned elsewhere (`snapshot`)."""
+    lines: List[str] = []
+    for name, series in METRICS.histograms.items():
+        metric = prefix + name
+        if name in METRICS.help:
+            lines.append(f"# HELP {metric} {METRICS.help[name]}")
+        lines.append(f"# TYPE {metric} histogram")
+        for key, hist in series.items():
+            cumulative = 0
+            for bound, n in zip(hist.buckets, hist.counts):
+                cumulative += n
+                lines.append(f"{metric}_bucket{_labels(key, 'le=%s' % _quote(bound))} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels(key, 'le=%s' % _quote('+Inf'))} {hist.count}")
+            lines.append(f"{metric}_sum{_labels(key)} {hist.sum:.6f}")
+            lines.append(f"{metric}_count{_labels(key)} {hist.count}")
+    for name, series in list(METRICS.counters.items()) + list((snapshot or {}).items()):
+        metric = prefix + name
+        if name in METRICS.help:
+            lines.append(f"# HELP {metric} {METRICS.help[name]}")
+        lines.append(f"# TYPE {metric} counter")
+        for key, value in series.items():
+            lines.append(f"{metric}{_labels(key)} {value:g}")
+    return "\n".join(lines) + "\n"
@@ -1,21 +1,46 @@
 from typing import List, Dict
 
+import numpy as np
+
+from utils.metrics import timed
+
+
+def phase_rank(p: str) -> int:
+    p = (p or "").lower()
+    if "phase 3" in p:
+        return 3
+    if "phase 2" in p:
+        return 2
+    if "phase 1" in p:
+        return 1
+    return 0
+
+
+def confidence(trials, publications, phase1, phase2, phase3):
+    """Opportunity confidence from evidence counts; scalars or NumPy arrays (elementwise).
+
+    Trials and publications add up to 0.6 and 0.3; each trial adds 0.06,
+    0.12 or 0.2 for phase 1, 2 or 3; the total is capped at 1.0.
+    """
+    score = np.minimum(trials * 0.15, 0.6) + np.minimum(publications * 0.05, 0.3)
+    score = score + phase1 * 0.06 + phase2 * 0.12 + phase3 * 0.2
+    return np.clip(score, 0.0, 1.0)
+
 
 def score_opportunity(drug: str, disease: str, evidence: List[Dict]) -> float:
     trials = [e for e in evidence if e.get("type") == "trial"]
-    lits = [e for e in evidence if e.get("type") == "literature"]
-    score = 0.0
-    # Base on counts
-    score += min(len(trials) * 0.15, 0.6)
-    score += min(len(lits) * 0.05, 0.3)
-    # Phase weighting
-    for t in trials:
-        ph = (t.get("phase") or "").lower()
-        if "phase 3" in ph:
-            score += 0.2
-        elif "phase 2" in ph:
-            score += 0.12
-        elif "phase 1" in ph:
-            score += 0.06
-    # Cap at 1.0
-    return max(0.0, min(score, 1.0))
+    # A publication counts by its relevance weight (default 1)
+    publications = sum(e.get("relevance", 1.0) for e in evidence if e.get("type") == "literature")
+    ranks = [phase_rank(t.get("phase", "")) for t in trials]
+    return float(confidence(len(trials), publications, ranks.count(1), ranks.count(2), ranks.count(3)))
+
+
+@timed("score")
+def score_counts(counts: np.ndarray) -> np.ndarray:
+    """confidence() over many candidates at once.
+
+    `counts` has one row per candidate: trials, publications (or their
+    summed relevance weights), then the number of trials at phase rank 0,
+    1, 2 and 3.
+    """
+    return confidence(counts[:, 0], counts[:, 1], counts[:, 3], counts[:, 4], counts[:, 5])
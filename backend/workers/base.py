@@ -0,0 +1,114 @@
+import asyncio
+import functools
+import inspect
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.memo import TTLCache, _MISSING
+
+WORKER_TIMEOUT = float(os.getenv("WORKER_TIMEOUT", "2.0"))
+WORKER_CACHE_TTL = float(os.getenv("WORKER_CACHE_TTL", "3600"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "8"))
+
+Key = Tuple[str, ...]
+
+
+class Worker:
+    """An enrichment lookup attached to explorer candidates.
+
+    `key` names the candidate fields the result depends on, e.g.
+    ("condition",) for market data or ("drug", "condition") for patent
+    risk; results are memoized per key, so a condition-only worker runs once
+    per explorer call however many medicines are listed. `lookup(*key)` may
+    be sync or async (set `blocking` for sync lookups that do I/O so they
+    run in a thread). `batch(keys) -> {key: result}` replaces per-key
+    lookups when the backend accepts many keys per call. Lookups that fail
+    or outlast `timeout` yield `fallback`; the timeout applies to each key,
+    so one slow key does not discard the others, and a per-key lookup that
+    finishes late is still cached for the next call.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        lookup: Callable[..., Any],
+        key: Tuple[str, ...] = ("drug", "condition"),
+        timeout: float = WORKER_TIMEOUT,
+        batch: Optional[Callable[[List[Key]], Awaitable[Dict[Key, Dict]]]] = None,
+        blocking: bool = False,
+        concurrency: int = WORKER_CONCURRENCY,
+        fallback: Optional[Dict] = None,
+    ):
+        self.name = name
+        self.lookup = lookup
+        self.key = key
+        self.timeout = timeout
+        self.batch = batch
+        self.blocking = blocking
+        self.fallback = fallback if fallback is not None else {"status": "unavailable"}
+        self.cache = TTLCache(maxsize=4096, ttl=WORKER_CACHE_TTL)
+        self._pool = asyncio.Semaphore(concurrency)
+        self._late: set = set()
+
+    def key_for(self, candidate: Dict[str, str]) -> Key:
+        return tuple(candidate[f] for f in self.key)
+
+    async def _one(self, args: Key) -> Dict:
+        async with self._pool:
+            if inspect.iscoroutinefunction(self.lookup):
+                return await self.lookup(*args)
+            if self.blocking:
+                return await asyncio.to_thread(self.lookup, *args)
+            return self.lookup(*args)
+
+    def _cache_late(self, key: Key, task: asyncio.Task) -> None:
+        self._late.discard(task)
+        if not task.cancelled() and task.exception() is None:
+            self.cache.set(key, task.result())
+
+    async def _fetch(self, keys: List[Key]) -> Dict[Key, Dict]:
+        if self.batch is not None:
+            try:
+                return await asyncio.wait_for(self.batch(keys), self.timeout)
+            except Exception:
+                return {}
+        tasks = {asyncio.ensure_future(self._one(k)): k for k in keys}
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.timeout)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        for task in pending:
+            self._late.add(task)
+            task.add_done_callback(functools.partial(self._cache_late, tasks[task]))
+        return {tasks[t]: t.result() for t in done if t.exception() is None}
+
+    async def resolve(self, candidates: List[Dict[str, str]]) -> List[Dict]:
+        """Results aligned with `candidates`, from cache or one concurrent round of lookups."""
+        keys = [self.key_for(c) for c in candidates]
+        found: Dict[Key, Dict] = {}
+        missing: List[Key] = []
+        for key in dict.fromkeys(keys):
+            value = self.cache.get(key)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = await self._fetch(missing)
+            for key, value in fetched.items():
+                self.cache.set(key, value)
+            found.update(fetched)
+        return [found.get(key, self.fallback) for key in keys]
+
+
+async def enrich(candidates: List[Dict[str, str]], workers: Iterable[Worker]) -> List[Dict[str, Dict]]:
+    """Run every worker over all candidates concurrently.
+
+    Returns one {worker name: result} dict per candidate; latency is that of
+    the slowest worker (bounded by its timeout), not a sum over candidates.
+    """
+    workers = list(workers)
+    columns = await asyncio.gather(*(w.resolve(candidates) for w in workers))
+    return [{w.name: column[i] for w, column in zip(workers, columns)} for i in range(len(candidates))]
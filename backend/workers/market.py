@@ -1,7 +1,11 @@
 from typing import Dict
 
+from utils.metrics import timed
+from workers.base import Worker
+
 # Simple mock worker for hackathon
 
+@timed("worker_market")
 def market_insight(disease: str) -> Dict:
     """Return simple market metrics with numeric unmet-need score (0-100)."""
     mock_map = {
@@ -10,3 +14,7 @@ def market_insight(disease: str) -> Dict:
     }
     default = {"tam_usd_b": 3.0, "growth_cagr": 3.0, "unmet_need_score": 55, "unmet_need_label": "medium"}
     return mock_map.get(disease, default)
+
+
+# Market size depends only on the condition.
+market_worker = Worker("market", market_insight, key=("condition",))
@@ -1,7 +1,11 @@
 from typing import Dict
 
+from utils.metrics import timed
+from workers.base import Worker
+
 # Mock patent validation worker
 
+@timed("worker_patent")
 def patent_risk(drug: str, disease: str) -> Dict:
     """Return numeric patent risk score (0-100, higher=worse)."""
     # Simple heuristic/mock: shorter, off-patent generics => lower score
@@ -9,3 +13,6 @@ def patent_risk(drug: str, disease: str) -> Dict:
     score = max(0, min(100, base))
     label = "low" if score < 35 else ("medium" if score < 70 else "high")
     return {"risk_score": score, "risk_label": label, "notes": "Preliminary search suggests manageable freedom-to-operate."}
+
+
+patent_worker = Worker("patent", patent_risk, key=("drug", "condition"))
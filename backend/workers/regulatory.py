@@ -1,6 +1,13 @@
 from typing import Dict
 
+from utils.metrics import timed
+from workers.base import Worker
+
 # Mock regulatory pathway worker
 
+@timed("worker_regulatory")
 def regulatory_pathway(drug: str, disease: str) -> Dict:
     return {"pathway": "505(b)(2)", "notes": "Existing safety data may support expedited development."}
+
+
+regulatory_worker = Worker("regulatory", regulatory_pathway, key=("drug", "condition"))